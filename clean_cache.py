@@ -33,47 +33,28 @@ def clean_test_articles():
         real_articles = 0
         cleaned_articles = []
         
-        for date_key in list(cache.article_details.keys()):
-            date_articles = cache.article_details[date_key]
-            articles_to_remove = []
-            
-            for article_hash, article in list(date_articles.items()):
-                total_articles += 1
-                
-                # 识别测试文章的条件
-                is_test_article = (
-                    article.link.startswith("https://test.com/") or
-                    article.title in ["优质文章1", "优质文章2", "中等文章1", "低质文章1", "低质文章2", "低质文章3"] or
-                    "测试文章" in article.description or
-                    article.title == "测试标题"
-                )
-                
-                if is_test_article:
-                    test_articles += 1
-                    articles_to_remove.append(article_hash)
-                    cleaned_articles.append({
-                        "title": article.title,
-                        "link": article.link,
-                        "date": date_key
-                    })
-                    print(f"   🗑️ 标记清除: {article.title} ({article.link})")
-                else:
-                    real_articles += 1
-            
-            # 删除测试文章
-            for article_hash in articles_to_remove:
-                del date_articles[article_hash]
-            
-            # 如果该日期下没有文章了，删除整个日期条目和对应的缓存文件
-            if not date_articles:
-                del cache.article_details[date_key]
-                print(f"   📅 删除空日期条目: {date_key}")
-                
-                # 删除对应的缓存文件
-                cache_file = Path(f"cache/rss_{date_key}.json")
-                if cache_file.exists():
-                    cache_file.unlink()
-                    print(f"   🗑️ 删除空缓存文件: {cache_file.name}")
+        for article in cache.iter_items():
+            total_articles += 1
+
+            # 识别测试文章的条件
+            is_test_article = (
+                article.link.startswith("https://test.com/") or
+                article.title in ["优质文章1", "优质文章2", "中等文章1", "低质文章1", "低质文章2", "低质文章3"] or
+                "测试文章" in article.description or
+                article.title == "测试标题"
+            )
+
+            if is_test_article:
+                test_articles += 1
+                cache.remove_item(article)
+                cleaned_articles.append({
+                    "title": article.title,
+                    "link": article.link,
+                    "date": article.date_key
+                })
+                print(f"   🗑️ 清除: {article.title} ({article.link})")
+            else:
+                real_articles += 1
         
         print(f"\n📈 清理统计:")
         print(f"   总文章数: {total_articles}")
@@ -81,20 +62,7 @@ def clean_test_articles():
         print(f"   真实文章: {real_articles}")
         print(f"   清理文章: {len(cleaned_articles)}")
         
-        # 保存清理后的缓存
         if cleaned_articles:
-            print("\n💾 保存清理后的缓存...")
-            
-            # 为每个修改的日期保存缓存
-            modified_dates = set()
-            for article in cleaned_articles:
-                modified_dates.add(article['date'])
-            
-            for date_key in modified_dates:
-                if date_key in cache.article_details:
-                    cache._save_cache(date_key)
-                    print(f"   ✅ 已保存 {date_key} 的缓存")
-            
             print("✅ 缓存已更新")
             
             # 显示被清理的文章
@@ -114,41 +82,28 @@ def clean_test_articles():
 
 
 def clean_old_cache(days_to_keep=7):
-    """清除过期缓存文件"""
-    print(f"\n🗂️ 清理过期缓存文件 (保留 {days_to_keep} 天)...")
+    """清除过期缓存数据"""
+    print(f"\n🗂️ 清理过期缓存 (保留 {days_to_keep} 天)...")
     
     try:
-        cache_dir = Path("cache")
-        if not cache_dir.exists():
-            print("⚠️ 缓存目录不存在")
-            return 0
+        cache = MultiRSSManager().cache
+        before = cache.get_daily_stats()
+        cache.cleanup_old_cache(keep_days=days_to_keep)
+        after = cache.get_daily_stats()
         
-        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-        deleted_files = []
+        deleted_dates = sorted(set(before) - set(after))
+        for date_key in deleted_dates:
+            print(f"   🗑️ 删除过期日期: {date_key} ({before[date_key]} 篇)")
         
-        for cache_file in cache_dir.glob("rss_*.json"):
-            try:
-                # 从文件名提取日期
-                date_str = cache_file.stem.replace("rss_", "")
-                file_date = datetime.strptime(date_str, "%Y-%m-%d")
-                
-                if file_date < cutoff_date:
-                    cache_file.unlink()
-                    deleted_files.append(cache_file.name)
-                    print(f"   🗑️ 删除过期文件: {cache_file.name}")
-                    
-            except (ValueError, OSError) as e:
-                print(f"   ⚠️ 处理文件 {cache_file.name} 时出错: {e}")
-        
-        if deleted_files:
-            print(f"✅ 删除了 {len(deleted_files)} 个过期缓存文件")
+        if deleted_dates:
+            print(f"✅ 删除了 {len(deleted_dates)} 天的过期缓存")
         else:
-            print("ℹ️ 没有发现过期的缓存文件")
+            print("ℹ️ 没有发现过期的缓存")
             
-        return len(deleted_files)
+        return len(deleted_dates)
         
     except Exception as e:
-        print(f"❌ 清理过期文件失败: {e}")
+        print(f"❌ 清理过期缓存失败: {e}")
         return 0
 
 
@@ -164,18 +119,17 @@ def verify_cleanup():
         remaining_test_articles = []
         total_articles = 0
         
-        for date_key in cache.article_details:
-            for article in cache.article_details[date_key].values():
-                total_articles += 1
-                
-                is_test_article = (
-                    article.link.startswith("https://test.com/") or
-                    article.title in ["优质文章1", "优质文章2", "中等文章1", "低质文章1", "低质文章2", "低质文章3"] or
-                    "测试文章" in article.description
-                )
-                
-                if is_test_article:
-                    remaining_test_articles.append(article.title)
+        for article in cache.iter_items():
+            total_articles += 1
+            
+            is_test_article = (
+                article.link.startswith("https://test.com/") or
+                article.title in ["优质文章1", "优质文章2", "中等文章1", "低质文章1", "低质文章2", "低质文章3"] or
+                "测试文章" in article.description
+            )
+            
+            if is_test_article:
+                remaining_test_articles.append(article.title)
         
         print(f"   总文章数: {total_articles}")
         print(f"   剩余测试文章: {len(remaining_test_articles)}")
@@ -211,7 +165,7 @@ if __name__ == "__main__":
     print("=" * 80)
     
     print(f"✅ 清理测试文章: {cleaned_count} 篇")
-    print(f"✅ 删除过期文件: {deleted_count} 个")
+    print(f"✅ 删除过期缓存: {deleted_count} 天")
     print(f"✅ 清理状态: {'完全清理' if is_clean else '部分清理'}")
     
     if is_clean and (cleaned_count > 0 or deleted_count > 0):
@@ -22,7 +22,7 @@ def debug_article_status():
     
     # 创建管理器
     manager = MultiRSSManager()
-    send_manager = SendManager()
+    send_manager = SendManager(multi_rss_manager=manager)
     
     print("\n🔍 步骤1: 检查当前缓存状态")
     unsent_items = manager.cache.get_unsent_items()
@@ -20,17 +20,37 @@ class Config:
     RSS_FEED_URLS: str = os.getenv("RSS_FEED_URLS", "")  # 多RSS源，用分号分隔
     CHECK_INTERVAL_MINUTES: int = int(os.getenv("CHECK_INTERVAL_MINUTES", "30"))  # RSS检查间隔
     FETCH_ARTICLES_HOURS: int = int(os.getenv("FETCH_ARTICLES_HOURS", "6"))  # 文章获取时间范围（小时）
+    FEED_FETCH_CONCURRENCY: int = int(os.getenv("FEED_FETCH_CONCURRENCY", "64"))  # RSS抓取全局最大并发数
+    FEED_FETCH_PER_HOST: int = int(os.getenv("FEED_FETCH_PER_HOST", "4"))  # 同一主机的最大并发抓取数
+    FEED_FETCH_TIMEOUT: int = int(os.getenv("FEED_FETCH_TIMEOUT", "60"))  # 单个RSS源抓取超时（秒）
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "sqlite")  # 文章存储后端: sqlite 或 json
+    CACHE_WRITE_BEHIND: bool = os.getenv("CACHE_WRITE_BEHIND", "true").lower() == "true"  # JSON缓存延迟批量写入
+    CACHE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("CACHE_FLUSH_INTERVAL_SECONDS", "5"))  # 延迟写入的最长间隔（秒）
+    CACHE_MAX_DIRTY: int = int(os.getenv("CACHE_MAX_DIRTY", "200"))  # 累计多少次变更后立即写入
+    DEDUP_WINDOW_DAYS: int = int(os.getenv("DEDUP_WINDOW_DAYS", "90"))  # 跨天去重窗口（天），0表示只做同日去重
+    DEDUP_FILTER_SLICES: int = int(os.getenv("DEDUP_FILTER_SLICES", "6"))  # 去重过滤器按时间划分的分片数
+    DEDUP_EXPECTED_ITEMS_PER_DAY: int = int(os.getenv("DEDUP_EXPECTED_ITEMS_PER_DAY", "2000"))  # 预计每天的去重键数量
+    DEDUP_FALSE_POSITIVE_RATE: float = float(os.getenv("DEDUP_FALSE_POSITIVE_RATE", "0.001"))  # 去重过滤器目标误判率
+    NEAR_DUPLICATE_ENABLED: bool = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() == "true"  # 跨源近似重复检测
+    NEAR_DUPLICATE_SIMILARITY: float = float(os.getenv("NEAR_DUPLICATE_SIMILARITY", "0.9"))  # SimHash相似度阈值（0-1）
+    NEAR_DUPLICATE_WINDOW_DAYS: int = int(os.getenv("NEAR_DUPLICATE_WINDOW_DAYS", "7"))  # 近似重复签名保留天数
     
     # 图片配置
     PREFERRED_IMAGE_WIDTH: int = int(os.getenv("PREFERRED_IMAGE_WIDTH", "460"))  # 首选图片宽度
     MIN_IMAGE_WIDTH: int = int(os.getenv("MIN_IMAGE_WIDTH", "140"))  # 最小图片宽度
     MAX_IMAGE_WIDTH: int = int(os.getenv("MAX_IMAGE_WIDTH", "700"))  # 最大图片宽度
+    IMAGE_CACHE_MAX_MB: int = int(os.getenv("IMAGE_CACHE_MAX_MB", "500"))  # 图片缓存总容量上限（MB），超出按LRU淘汰，0表示不限
+    IMAGE_PROCESS_WORKERS: int = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))  # 图片转码进程数
     
     # 代理配置
     HTTP_PROXY: Optional[str] = os.getenv("HTTP_PROXY")
     HTTPS_PROXY: Optional[str] = os.getenv("HTTPS_PROXY")
     PROXY_URL: Optional[str] = os.getenv("PROXY_URL")  # 统一代理地址，格式如: http://localhost:7897
 
+    # HTTP连接池配置
+    HTTP_POOL_CONNECTIONS: int = int(os.getenv("HTTP_POOL_CONNECTIONS", "32"))  # 缓存的主机连接池数量
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # 每个主机的最大连接数
+
     # AI总结配置
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
@@ -40,6 +60,31 @@ class Config:
     SUMMARY_MAX_LENGTH: int = int(
         os.getenv("SUMMARY_MAX_LENGTH", "300")
     )  # 增加到300字，允许更深度的分析
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"  # 缓存模型输出，相同请求不重复调用
+    LLM_CACHE_TTL_HOURS: int = int(os.getenv("LLM_CACHE_TTL_HOURS", "168"))  # LLM响应缓存有效期（小时），0表示不过期
+    LLM_CACHE_MAX_MB: int = int(os.getenv("LLM_CACHE_MAX_MB", "50"))  # LLM响应缓存总容量上限（MB），超出按LRU淘汰，0表示不限
+    SCORING_BATCH_TOKEN_BUDGET: int = int(os.getenv("SCORING_BATCH_TOKEN_BUDGET", "6000"))  # 批量评分每次调用的输入token预算
+    SCORING_BATCH_MAX_ITEMS: int = int(os.getenv("SCORING_BATCH_MAX_ITEMS", "20"))  # 批量评分每次调用最多包含的文章数
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # 并发的模型请求数
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))  # 每分钟请求数上限，0表示不限
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "100000"))  # 每分钟token数上限，0表示不限
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))  # 限流(429)和网络错误的最大重试次数
+    SUMMARY_STREAMING_ENABLED: bool = os.getenv("SUMMARY_STREAMING_ENABLED", "true").lower() == "true"  # 流式生成文章总结，记录延迟并提前检查输出结构
+    SUMMARY_STREAM_RETRIES: int = int(os.getenv("SUMMARY_STREAM_RETRIES", "1"))  # 流式输出结构异常时中止并重新生成的次数
+    SCORING_QUEUE_SIZE: int = int(os.getenv("SCORING_QUEUE_SIZE", "1000"))  # 后台评分队列容量
+    SCORING_WORKER_BATCH_SIZE: int = int(os.getenv("SCORING_WORKER_BATCH_SIZE", "100"))  # 后台评分每轮最多处理的文章数
+    SCORING_RESCAN_INTERVAL_SECONDS: int = int(os.getenv("SCORING_RESCAN_INTERVAL_SECONDS", "600"))  # 后台评分空闲时从存储补查遗漏的未评分文章的间隔（秒）
+    PREFILTER_ENABLED: bool = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"  # 模型评分前的规则预过滤
+    PREFILTER_MIN_TITLE_LENGTH: int = int(os.getenv("PREFILTER_MIN_TITLE_LENGTH", "2"))  # 标题最少字数，不足直接判为0分
+    PREFILTER_MIN_CONTENT_LENGTH: int = int(os.getenv("PREFILTER_MIN_CONTENT_LENGTH", "30"))  # 正文最少字数，不足时不用规则和本地模型判断，交给模型评分
+    PREFILTER_DENY_KEYWORDS: str = os.getenv("PREFILTER_DENY_KEYWORDS", "")  # 全局拒绝关键词，逗号分隔
+    PREFILTER_DENY_SCAN_CHARS: int = int(os.getenv("PREFILTER_DENY_SCAN_CHARS", "100"))  # 拒绝关键词在正文中的检查范围（开头字数），命中时交给模型评分
+    PREFILTER_ALLOW_KEYWORDS: str = os.getenv("PREFILTER_ALLOW_KEYWORDS", "")  # 全局允许关键词，逗号分隔
+    PREFILTER_ALLOW_SCORE: int = int(os.getenv("PREFILTER_ALLOW_SCORE", "8"))  # 命中允许关键词时直接给出的评分
+    PREFILTER_RULES_FILE: str = os.getenv("PREFILTER_RULES_FILE", "prefilter_rules.json")  # 按源配置的关键词规则文件（可选）
+    PREFILTER_MODEL_CONFIDENCE: float = float(os.getenv("PREFILTER_MODEL_CONFIDENCE", "0.9"))  # 本地模型置信度达到该值时跳过模型评分
+    LOCAL_SCORER_ENABLED: bool = os.getenv("LOCAL_SCORER_ENABLED", "true").lower() == "true"  # 使用本地评分模型（需先运行tools/train_local_scorer.py）
+    LOCAL_SCORER_PATH: str = os.getenv("LOCAL_SCORER_PATH", "cache/local_scorer.npz")  # 本地评分模型文件
 
     # 发送控制配置
     MAX_ARTICLES_PER_BATCH: int = int(
@@ -49,6 +94,9 @@ class Config:
         os.getenv("SEND_INTERVAL_MINUTES", "1")
     )  # 发送间隔（分钟）
     MIN_QUALITY_SCORE: int = int(os.getenv("MIN_QUALITY_SCORE", "7"))  # 最低质量分数要求
+    SEND_PRIORITY_HALF_LIFE_HOURS: float = float(
+        os.getenv("SEND_PRIORITY_HALF_LIFE_HOURS", "6")
+    )  # 发送优先级新鲜度半衰期（小时），0表示只按评分排序
 
     # 发送时间控制配置
     SEND_START_HOUR: int = int(os.getenv("SEND_START_HOUR", "9"))  # 允许发送开始时间（24小时制）
@@ -81,6 +129,7 @@ class Config:
     WECHAT_OFFICIAL_FOOTER_TEXT: str = os.getenv("WECHAT_OFFICIAL_FOOTER_TEXT", "📱 更多科技资讯，请关注我们")
     WECHAT_OFFICIAL_AUTHOR_NAME: str = os.getenv("WECHAT_OFFICIAL_AUTHOR_NAME", "RSS助手")
     WECHAT_OFFICIAL_DEFAULT_THUMB_MEDIA_ID: Optional[str] = os.getenv("WECHAT_OFFICIAL_DEFAULT_THUMB_MEDIA_ID")  # 默认封面图片media_id
+    WECHAT_TOKEN_REFRESH_AHEAD_SECONDS: int = int(os.getenv("WECHAT_TOKEN_REFRESH_AHEAD_SECONDS", "600"))  # access_token过期前多少秒在后台刷新，0为不主动刷新
 
     @classmethod
     def validate(cls) -> bool:
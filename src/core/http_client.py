@@ -0,0 +1,165 @@
+"""
+共享HTTP客户端模块
+为RSS获取、图片下载和微信接口调用提供统一的连接池会话
+"""
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util import make_headers
+
+from .config import Config
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+
+class ConnectionStats:
+    """连接复用统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0  # 新建的TCP(+TLS)连接数
+        self.reused = 0  # 从连接池复用的连接数
+
+    def record(self, reused: bool):
+        with self._lock:
+            if reused:
+                self.reused += 1
+            else:
+                self.opened += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.opened + self.reused
+        return {
+            'connections_opened': self.opened,
+            'connections_reused': self.reused,
+            'reuse_rate': self.reused / total if total else 0.0,
+        }
+
+
+def _counting_pool_class(base: type, stats: ConnectionStats) -> type:
+    """生成在取出连接时统计新建/复用次数的连接池类"""
+
+    def _get_conn(self, timeout=None):
+        conn = base._get_conn(self, timeout)
+        # 已建立socket的连接说明是复用的keep-alive连接
+        stats.record(reused=getattr(conn, 'sock', None) is not None)
+        return conn
+
+    return type(f"Counting{base.__name__}", (base,), {'_get_conn': _get_conn})
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """为直连和代理连接池安装带统计功能的连接池类"""
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self._pool_classes = {
+            'http': _counting_pool_class(HTTPConnectionPool, stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, stats),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = self._pool_classes
+        return manager
+
+
+class HttpClient:
+    """基于requests.Session的共享HTTP客户端（按主机复用连接池、keep-alive、压缩协商）"""
+
+    def __init__(self, pool_connections: int = None, pool_maxsize: int = None,
+                 proxies: Optional[dict] = None):
+        """
+        初始化HTTP客户端
+
+        Args:
+            pool_connections: 缓存的主机连接池数量
+            pool_maxsize: 每个主机连接池的最大连接数
+            proxies: 代理配置，默认读取Config.get_proxies()
+        """
+        self.pool_connections = pool_connections or Config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        self.stats = ConnectionStats()
+
+        self.session = requests.Session()
+        adapter = _CountingHTTPAdapter(
+            self.stats,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # urllib3会在安装了brotli时自动加入br
+        self.session.headers.update(make_headers(accept_encoding=True, keep_alive=True))
+        self.session.headers['User-Agent'] = DEFAULT_USER_AGENT
+
+        proxies = proxies if proxies is not None else Config.get_proxies()
+        if proxies:
+            self.session.proxies.update(proxies)
+            logger.info(f"HTTP客户端使用代理: {proxies}")
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送HTTP请求"""
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """发送GET请求"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """发送POST请求"""
+        return self.request('POST', url, **kwargs)
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """获取连接复用统计"""
+        stats = self.stats.to_dict()
+        stats['pool_connections'] = self.pool_connections
+        stats['pool_maxsize'] = self.pool_maxsize
+        return stats
+
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
+
+
+_shared_client: Optional[HttpClient] = None
+_direct_client: Optional[HttpClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """获取进程内共享的HTTP客户端"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = HttpClient()
+    return _shared_client
+
+
+def get_direct_http_client() -> HttpClient:
+    """
+    获取进程内共享的不走配置代理的HTTP客户端
+
+    微信接口按服务器出口IP做白名单校验，需保持直连（与RSS抓取分开使用连接池）
+    """
+    global _direct_client
+    if _direct_client is None:
+        with _shared_client_lock:
+            if _direct_client is None:
+                _direct_client = HttpClient(proxies={})
+    return _direct_client
@@ -4,6 +4,16 @@ AI Prompts Configuration
 """
 
 
+# 文章评分、分类和标签规则（单篇分析和批量评分共用，保证两条路径的判定标准一致）
+_ANALYSIS_RUBRIC = """- If content is in non-Chinese language, understand it first before scoring
+- score: an integer between 0 and 10, comprehensively considering clarity, accuracy, depth, logical structure, language expression, and completeness.
+  Note: If the content is an article or detailed text, length is an important factor. Generally, content under 300 words may receive a lower score due to lack of substance, unless its type (such as poetry or summary) is inherently suitable for brevity
+- category: the SINGLE most appropriate category, must be one of: 科技, 开发, 娱乐, 金融, 健康, 政治, 其他
+- tags: 2-4 Chinese tags covering the main topics, key concepts and domain
+- language: ISO 639-1 code of the original content language, e.g. "zh", "en", "ja"
+"""
+
+
 class PromptTemplates:
     """AI提示词模板类"""
 
@@ -189,53 +199,24 @@ News content:
 Please generate a WeChat message entirely in Chinese:
 """
 
-    # 文章分类提示词
-    ARTICLE_CLASSIFICATION = """
-Analyze the content and categorize it into exactly one of these categories (respond in Chinese):
-科技 (Technology), 开发 (Development), 娱乐 (Entertainment), 金融 (Finance), 健康 (Health), 政治 (Politics), 其他 (Other)
-
-Classification requirements:
-- If the content is in a non-Chinese language, understand it first, then classify
-- Choose the SINGLE most appropriate category based on:
-  * Primary topic and main focus of the content
-  * Key terminology and concepts used
-  * Target audience and purpose
-  * Technical depth and complexity level
-- For content that could fit multiple categories:
-  * Identify the dominant theme
-  * Consider the most specific applicable category
-  * Use the primary intended purpose
-
+    # 批量文章评分提示词
+    ARTICLE_BATCH_SCORING = """
+Please analyze each of the following articles and return its score, category, tags and language.
+- Each article starts with its id in square brackets, e.g. "[3]"
+- Evaluate each article independently
+""" + _ANALYSIS_RUBRIC + """
 Output format:
-Return ONLY the Chinese category name, no other text or explanation.
-Must be one of: 科技, 开发, 娱乐, 金融, 健康, 政治, 其他
+Return ONLY a JSON array with one object per article, no other text or explanation.
+Example: [{"id": 1, "score": 8, "category": "科技", "tags": ["人工智能", "开源"], "language": "en"}, {"id": 2, "score": 5, "category": "金融", "tags": ["股市"], "language": "zh"}]
 """
 
-    # 文章标签生成提示词
-    ARTICLE_TAGS = """
-Analyze the content and add appropriate tags in Chinese based on:
-- If content is in non-Chinese language, understand it first
-- Main topics and themes
-- Key concepts and terminology
-- Target audience and purpose
-- Technical depth and domain
-- 2-4 tags are enough
-
-Output format:
-Return a list of Chinese tags, separated by commas, no other text or explanation.
-Example: "人工智能, 科技, 创新, 未来"
-"""
-
-    # 文章评分提示词
-    ARTICLE_SCORING = """
-Please give a score between 0 and 10 based on the following content.
-- If content is in non-Chinese language, understand it first before scoring
-- Evaluate the content comprehensively considering clarity, accuracy, depth, logical structure, language expression, and completeness
-- Note: If the content is an article or detailed text, length is an important factor. Generally, content under 300 words may receive a lower score due to lack of substance, unless its type (such as poetry or summary) is inherently suitable for brevity
-
+    # 文章综合分析提示词（一次调用同时返回评分、分类、标签和语言）
+    ARTICLE_ANALYSIS = """
+Analyze the following content and return its score, category, tags and language together.
+""" + _ANALYSIS_RUBRIC + """
 Output format:
-Return only the score (0-10), no other text or explanation.
-Examples: "8", "5", "3", etc.
+Return ONLY a JSON object, no other text or explanation.
+Example: {"score": 8, "category": "科技", "tags": ["人工智能", "开源"], "language": "en"}
 """
 
     # 孔子评论提示词
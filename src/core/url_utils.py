@@ -0,0 +1,93 @@
+"""
+URL规范化工具
+去除跟踪参数、统一协议/主机/结尾斜杠并还原常见AMP链接，
+使同一篇文章的不同链接变体得到相同的规范URL
+"""
+import hashlib
+import re
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+# 跟踪参数（精确匹配）
+TRACKING_PARAMS = {
+    "ref", "ref_src", "ref_url", "referrer",
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "spm", "scm", "share_token", "share_source", "from", "isappinstalled",
+    "cmpid", "ncid", "guccounter", "rss", "amp", "outputtype",
+}
+# 跟踪参数（前缀匹配）
+TRACKING_PREFIXES = ("utm_", "__twitter", "_hs", "hmsr", "pk_", "mtm_")
+
+# 移动版/AMP主机前缀
+_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+# Google AMP缓存：https://example-com.cdn.ampproject.org/c/s/example.com/path
+_AMP_CACHE_RE = re.compile(r"^/[cv]/(?:s/)?(?P<rest>.+)$")
+# 路径中的AMP标记：/amp、/amp/、.amp、/amp.html
+_AMP_PATH_RE = re.compile(r"(?:/amp(?:\.html?)?|\.amp)(?=/?$)")
+_AMP_SEGMENT_RE = re.compile(r"^/amp(?=/)")
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化文章链接
+
+    Args:
+        url: 原始链接
+
+    Returns:
+        规范化后的链接，无法解析时返回去除空白后的原始链接
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    host = (parts.hostname or "").lower()
+    path = parts.path or "/"
+
+    # Google AMP缓存链接还原为源站链接
+    if host.endswith(".cdn.ampproject.org"):
+        match = _AMP_CACHE_RE.match(path)
+        if match:
+            return canonicalize_url(f"https://{unquote(match.group('rest'))}")
+
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and str(port) != _DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+
+    path = _AMP_SEGMENT_RE.sub("", path)
+    path = _AMP_PATH_RE.sub("", path)
+    path = re.sub(r"/{2,}", "/", path).rstrip("/") or "/"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(key)
+    ]
+    query.sort()
+
+    # http/https视为同一地址，片段不参与比较
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def url_hash(url: str) -> str:
+    """规范化链接的短哈希，用于去重索引"""
+    return hashlib.md5(url.encode("utf-8")).hexdigest()[:16]
+
+
+def _is_tracking_param(key: str) -> bool:
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
@@ -1,7 +1,9 @@
 """
-日志配置模块
+日志配置及通用工具模块
 """
 import logging
+import sys
+from concurrent.futures import Executor
 from pathlib import Path
 
 from .config import Config
@@ -47,3 +49,17 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     logger.addHandler(file_handler)
 
     return logger
+
+
+def shutdown_executor(executor: Executor) -> None:
+    """
+    不等待地关闭线程池/进程池，并取消尚未开始的任务
+
+    Args:
+        executor: 要关闭的执行器
+    """
+    if sys.version_info >= (3, 9):
+        executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        # Python 3.8没有cancel_futures参数，已排队的任务会执行完再退出
+        executor.shutdown(wait=False)
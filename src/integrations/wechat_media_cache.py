@@ -0,0 +1,115 @@
+"""
+微信素材media_id缓存模块
+按 (app_id, 素材类型, 文件内容哈希) 持久化已上传素材的media_id，
+相同图片（包括默认封面）只上传一次；微信报告素材失效时删除对应记录。
+上传的文件复制一份到缓存目录，不受图片存储LRU淘汰影响，素材失效时可以原样重新上传
+"""
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from ..core.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 微信返回的素材无效错误码
+INVALID_MEDIA_ID_ERRCODE = 40007
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    app_id TEXT NOT NULL,
+    media_type TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    media_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    PRIMARY KEY (app_id, media_type, digest)
+);
+CREATE INDEX IF NOT EXISTS idx_media_media_id ON media (app_id, media_id);
+"""
+
+
+class WeChatMediaCache:
+    """已上传素材的media_id缓存"""
+
+    def __init__(self, db_path: str = "cache/wechat_media.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pin_dir = self.db_path.parent / f"{self.db_path.stem}_files"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, app_id: str, media_type: str, digest: str) -> Optional[str]:
+        """查找已上传素材的media_id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_id FROM media WHERE app_id = ? AND media_type = ? AND digest = ?",
+                (app_id, media_type, digest),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def _pin(self, digest: str, file_path: str) -> str:
+        """把上传的文件复制到缓存目录（同一内容只保存一份），复制失败时返回原路径"""
+        pinned_path = self.pin_dir / f"{digest}{Path(file_path).suffix}"
+        if pinned_path.exists():
+            return str(pinned_path)
+        try:
+            self.pin_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = pinned_path.with_suffix(pinned_path.suffix + ".tmp")
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, pinned_path)
+            return str(pinned_path)
+        except OSError as e:
+            logger.warning(f"保存素材文件副本失败 {file_path}: {e}")
+            return file_path
+
+    def put(self, app_id: str, media_type: str, digest: str, media_id: str, file_path: str):
+        """记录上传成功的素材（file_path的内容会复制到缓存目录，供失效时重新上传）"""
+        file_path = self._pin(digest, file_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?)",
+                (app_id, media_type, digest, media_id, file_path, datetime.now().isoformat()),
+            )
+            self._conn.commit()
+
+    def invalidate(self, app_id: str, media_id: str) -> Optional[Tuple[str, str]]:
+        """
+        删除失效的media_id记录
+
+        Returns:
+            (素材类型, 缓存的素材文件路径)，未缓存时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_type, file_path FROM media WHERE app_id = ? AND media_id = ?",
+                (app_id, media_id),
+            ).fetchone()
+            self._conn.execute("DELETE FROM media WHERE app_id = ? AND media_id = ?", (app_id, media_id))
+            self._conn.commit()
+        if row is not None:
+            logger.warning(f"素材media_id已失效，删除缓存记录: {media_id}")
+        return tuple(row) if row else None
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存统计"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
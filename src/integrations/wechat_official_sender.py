@@ -9,7 +9,12 @@ import json
 from typing import Dict, Any, Optional
 
 from .base_sender import BaseSender
+from ..core.http_client import HttpClient, get_direct_http_client
 from ..core.utils import setup_logger
+from ..services.image_processor import MEDIA_BYTE_BUDGETS, get_image_processor
+from ..services.image_store import file_digest
+from .wechat_media_cache import INVALID_MEDIA_ID_ERRCODE, WeChatMediaCache
+from .wechat_token_manager import TOKEN_INVALID_ERRCODES, WeChatTokenManager, get_token_manager
 
 logger = setup_logger(__name__)
 
@@ -17,10 +22,14 @@ logger = setup_logger(__name__)
 class WeChatOfficialSender(BaseSender):
     """微信公众号发送器"""
     
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None, http_client: HttpClient = None,
+                 media_cache: WeChatMediaCache = None, token_manager: WeChatTokenManager = None):
         super().__init__(config)
+        self.http_client = http_client or get_direct_http_client()  # 共享连接池，避免每次调用重新握手；微信IP白名单要求直连
+        self._media_cache = media_cache  # 已上传素材的media_id缓存（首次上传时创建）
         self.app_id = self.config.get('app_id', '')
         self.app_secret = self.config.get('app_secret', '')
+        self._token_manager = token_manager  # 跨进程共享的access_token（首次使用时获取）
         self.access_token = None
         self.token_expires_at = 0
         
@@ -97,71 +106,50 @@ class WeChatOfficialSender(BaseSender):
             logger.error(f"发送微信公众号消息失败: {e}")
             return False
     
+    @property
+    def media_cache(self) -> WeChatMediaCache:
+        if self._media_cache is None:
+            self._media_cache = WeChatMediaCache()
+        return self._media_cache
+
+    @property
+    def token_manager(self) -> WeChatTokenManager:
+        if self._token_manager is None:
+            self._token_manager = get_token_manager(self.app_id, self.app_secret, self.http_client)
+        return self._token_manager
+
     def _ensure_access_token(self) -> bool:
         """确保有有效的access_token"""
-        current_time = time.time()
-        
-        # 如果token还有效，直接返回
-        if self.access_token and current_time < self.token_expires_at:
-            return True
-        
-        # 获取新的access_token
-        token = self._get_access_token()
-        return token is not None
+        return self._get_access_token() is not None
     
     def _get_access_token(self) -> Optional[str]:
         """
-        获取微信公众号access_token
+        获取微信公众号access_token（由共享的token管理器维护，有效期内不请求微信接口）
         
         Returns:
             access_token或None
         """
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                url = "https://api.weixin.qq.com/cgi-bin/token"
-                params = {
-                    'grant_type': 'client_credential',
-                    'appid': self.app_id,
-                    'secret': self.app_secret
-                }
-                
-                response = requests.get(
-                    url, 
-                    params=params, 
-                    timeout=(5, 30),  # 连接超时5秒，读取超时30秒
-                    verify=True,
-                    allow_redirects=True
-                )
-                data = response.json()
-                
-                if 'access_token' in data:
-                    self.access_token = data['access_token']
-                    # 提前5分钟过期，确保安全边际
-                    current_time = time.time()
-                    self.token_expires_at = current_time + data.get('expires_in', 7200) - 300
-                    logger.info(f"微信公众号access_token获取成功 (尝试 {attempt + 1}/{max_retries})")
-                    return self.access_token
-                else:
-                    logger.warning(f"获取access_token失败: {data} (尝试 {attempt + 1}/{max_retries})")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
-                        continue
-                    return None
-                    
-            except (requests.exceptions.SSLError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-                logger.warning(f"获取access_token网络错误 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(3)
-                    continue
-                else:
-                    logger.error("所有重试都失败了，无法获取access_token")
-                    return None
-            except Exception as e:
-                logger.error(f"获取access_token异常: {e}")
-                return None
+        token = self.token_manager.get_token()
+        if token:
+            self.access_token = token
+            self.token_expires_at = self.token_manager.expires_at
+        return token
+
+    def _refresh_invalid_token(self, result: Dict[str, Any]) -> bool:
+        """
+        微信报告access_token无效时强制刷新
         
-        return None
+        Returns:
+            是否已换用新的access_token
+        """
+        if result.get('errcode') not in TOKEN_INVALID_ERRCODES:
+            return False
+        token = self.token_manager.force_refresh(self.access_token)
+        if not token:
+            return False
+        self.access_token = token
+        self.token_expires_at = self.token_manager.expires_at
+        return True
     
     def _upload_permanent_media(self, image_path: str, media_type: str = "image") -> Optional[str]:
         """
@@ -177,10 +165,23 @@ class WeChatOfficialSender(BaseSender):
         if not os.path.exists(image_path):
             logger.error(f"图片文件不存在: {image_path}")
             return None
+
+        # 缩放并重新编码到该素材类型的大小限制内（封面64KB）
+        if media_type in MEDIA_BYTE_BUDGETS:
+            prepared_path = get_image_processor().prepare(image_path, media_type)
+            if not prepared_path:
+                logger.error(f"图片无法满足{media_type}素材限制: {image_path}")
+                return None
+            image_path = prepared_path
+
+        # 相同内容的素材已上传过时直接复用media_id
+        digest = file_digest(image_path)
+        cached_media_id = self.media_cache.get(self.app_id or "", media_type, digest)
+        if cached_media_id:
+            logger.info(f"复用已上传的素材: {cached_media_id}")
+            return cached_media_id
         
         try:
-            url = f"https://api.weixin.qq.com/cgi-bin/material/add_material?access_token={self.access_token}&type={media_type}"
-            
             # 检查文件大小限制
             file_size = os.path.getsize(image_path)
             size_limits = {
@@ -199,6 +200,7 @@ class WeChatOfficialSender(BaseSender):
             max_retries = 3
             for attempt in range(max_retries):
                 try:
+                    url = f"https://api.weixin.qq.com/cgi-bin/material/add_material?access_token={self.access_token}&type={media_type}"
                     with open(image_path, 'rb') as f:
                         files = {'media': f}
                         # 对于永久素材，需要添加description参数
@@ -207,7 +209,7 @@ class WeChatOfficialSender(BaseSender):
                         } if media_type == 'video' else {}
                         
                         # 增加SSL配置和超时设置
-                        response = requests.post(
+                        response = self.http_client.post(
                             url, 
                             files=files, 
                             data=data, 
@@ -220,9 +222,13 @@ class WeChatOfficialSender(BaseSender):
                         if result.get('errcode') == 0 or 'media_id' in result:
                             media_id = result['media_id']
                             logger.info(f"永久素材上传成功: {media_id} (尝试 {attempt + 1}/{max_retries})")
+                            self.media_cache.put(self.app_id or "", media_type, digest, media_id, image_path)
                             return media_id
                         else:
                             logger.warning(f"永久素材上传失败: {result} (尝试 {attempt + 1}/{max_retries})")
+                            # access_token失效：换新token后立即重试
+                            if attempt < max_retries - 1 and self._refresh_invalid_token(result):
+                                continue
                             if attempt < max_retries - 1:
                                 time.sleep(2)  # 重试前等待2秒
                                 continue
@@ -265,6 +271,25 @@ class WeChatOfficialSender(BaseSender):
         """
         return self._upload_permanent_media(image_path, "image")
     
+    def _replace_invalid_media(self, media_id: str) -> Optional[str]:
+        """
+        作废失效的缓存素材并用原文件重新上传
+        
+        Args:
+            media_id: 微信报告无效的media_id
+            
+        Returns:
+            新的media_id，素材不在缓存中或原文件已不存在时返回None
+        """
+        entry = self.media_cache.invalidate(self.app_id or "", media_id)
+        if not entry:
+            return None
+        media_type, file_path = entry
+        if not os.path.exists(file_path):
+            return None
+        logger.info(f"重新上传失效的素材: {file_path}")
+        return self._upload_permanent_media(file_path, media_type)
+
     def _create_draft_v2(self, title: str, content: str, thumb_media_id: str = None, rss_item = None) -> bool:
         """
         创建草稿 (使用正式API)
@@ -279,8 +304,6 @@ class WeChatOfficialSender(BaseSender):
             是否创建成功
         """
         try:
-            url = f"https://api.weixin.qq.com/cgi-bin/draft/add?access_token={self.access_token}"
-            
             # 根据API要求，图文消息必须有thumb_media_id
             # 如果没有提供，尝试使用配置的默认封面或上传新的默认封面
             if not thumb_media_id:
@@ -296,8 +319,7 @@ class WeChatOfficialSender(BaseSender):
                         uploaded_media_id = self._upload_thumb_media(default_cover_path)
                         if uploaded_media_id:
                             thumb_media_id = uploaded_media_id
-                            logger.info(f"默认封面上传成功: {thumb_media_id}")
-                            logger.info(f"💡 建议将此media_id保存到配置中: WECHAT_OFFICIAL_DEFAULT_THUMB_MEDIA_ID={thumb_media_id}")
+                            logger.info(f"默认封面media_id: {thumb_media_id}（已缓存，后续发送不再重复上传）")
                         else:
                             logger.warning("上传默认封面失败，将创建纯文字草稿")
                             # 继续尝试创建草稿，微信可能会使用默认封面
@@ -369,7 +391,8 @@ class WeChatOfficialSender(BaseSender):
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    response = requests.post(
+                    url = f"https://api.weixin.qq.com/cgi-bin/draft/add?access_token={self.access_token}"
+                    response = self.http_client.post(
                         url, 
                         data=json_data.encode('utf-8'), 
                         headers=headers, 
@@ -385,6 +408,17 @@ class WeChatOfficialSender(BaseSender):
                     # 检查是否有错误码
                     if 'errcode' in result and result['errcode'] != 0:
                         logger.warning(f"草稿创建失败: {result} (尝试 {attempt + 1}/{max_retries})")
+                        # 缓存的封面素材已被删除：作废缓存并重新上传
+                        if result['errcode'] == INVALID_MEDIA_ID_ERRCODE and thumb_media_id:
+                            new_thumb_media_id = self._replace_invalid_media(thumb_media_id)
+                            if new_thumb_media_id and attempt < max_retries - 1:
+                                thumb_media_id = new_thumb_media_id
+                                article_data["thumb_media_id"] = thumb_media_id
+                                json_data = json.dumps(data, ensure_ascii=False, indent=2)
+                                continue
+                        # access_token失效：换新token后立即重试
+                        if attempt < max_retries - 1 and self._refresh_invalid_token(result):
+                            continue
                         if attempt < max_retries - 1:
                             time.sleep(2)
                             continue
@@ -961,7 +995,7 @@ class WeChatOfficialSender(BaseSender):
                 }]
             }
             
-            response = requests.post(url, json=data, timeout=30)
+            response = self.http_client.post(url, json=data, timeout=30)
             result = response.json()
             
             if result.get('errcode') == 0:
@@ -1006,6 +1040,7 @@ class WeChatOfficialSender(BaseSender):
             'enabled': self.is_enabled(),
             'app_id': self.app_id[:8] + '...' if self.app_id else '',
             'has_token': bool(self.access_token),
+            'media_cache': self._media_cache.get_stats() if self._media_cache else {},
             'description': '微信公众号文章发布'
         }
     
@@ -0,0 +1,244 @@
+"""
+微信公众号access_token管理模块
+token及过期时间持久化到磁盘并用文件锁保护，多个进程共用同一个token；
+后台线程在过期前主动刷新，并发调用只触发一次刷新（single-flight）
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import requests
+
+from ..core.config import Config
+from ..core.http_client import HttpClient, get_direct_http_client
+from ..core.utils import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = setup_logger(__name__)
+
+TOKEN_URL = "https://api.weixin.qq.com/cgi-bin/token"
+# access_token无效或已过期的错误码
+TOKEN_INVALID_ERRCODES = {40001, 40014, 42001}
+# 使用token时至少保留的有效期（秒）
+_MIN_VALID_SECONDS = 60
+
+
+class _FileLock:
+    """跨进程文件锁"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class WeChatTokenManager:
+    """进程间共享的access_token管理器"""
+
+    def __init__(self, app_id: str, app_secret: str, http_client: HttpClient = None,
+                 token_dir: str = "cache", refresh_ahead_seconds: int = None):
+        """
+        初始化token管理器
+
+        Args:
+            app_id: 公众号AppID
+            app_secret: 公众号AppSecret
+            http_client: 共享HTTP客户端
+            token_dir: token文件目录
+            refresh_ahead_seconds: 提前多少秒在后台刷新
+        """
+        self.app_id = app_id or ""
+        self.app_secret = app_secret or ""
+        self.http_client = http_client or get_direct_http_client()
+        self.token_path = Path(token_dir) / f"wechat_token_{self.app_id or 'default'}.json"
+        self.lock_path = self.token_path.with_suffix(".lock")
+        self.refresh_ahead_seconds = (
+            Config.WECHAT_TOKEN_REFRESH_AHEAD_SECONDS if refresh_ahead_seconds is None else refresh_ahead_seconds
+        )
+
+        self._token: Optional[str] = None
+        self._expires_at: float = 0
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self.api_requests = 0  # 实际请求/cgi-bin/token的次数
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    def get_token(self) -> Optional[str]:
+        """获取有效的access_token（内存中有效时无锁直接返回）"""
+        token, expires_at = self._token, self._expires_at
+        if token and expires_at - time.time() > _MIN_VALID_SECONDS:
+            return token
+        return self._refresh(_MIN_VALID_SECONDS)
+
+    def force_refresh(self, stale_token: Optional[str]) -> Optional[str]:
+        """
+        微信报告token无效（40001/42001）时调用：其他进程已换新时直接采用，否则重新获取
+
+        Args:
+            stale_token: 被微信拒绝的token
+        """
+        logger.warning("access_token已失效，强制刷新")
+        return self._refresh(_MIN_VALID_SECONDS, stale_token=stale_token)
+
+    def _refresh(self, min_valid_seconds: float, stale_token: str = None) -> Optional[str]:
+        """
+        刷新token：进程内同一时间只有一个刷新，其余调用等待并复用结果；
+        持有文件锁时先读取其他进程写入的token，仍不满足要求才请求微信接口
+        """
+        with self._refresh_lock:
+            now = time.time()
+            if self._token and self._token != stale_token and self._expires_at - now > min_valid_seconds:
+                return self._token
+
+            with _FileLock(self.lock_path):
+                stored_token, stored_expires_at = self._read_token_file()
+                if stored_token and stored_token != stale_token and stored_expires_at - now > min_valid_seconds:
+                    self._adopt(stored_token, stored_expires_at)
+                    logger.debug("使用其他进程刷新的access_token")
+                    return stored_token
+
+                token, expires_in = self._request_token()
+                if not token:
+                    return None
+                expires_at = time.time() + expires_in
+                self._write_token_file(token, expires_at)
+                self._adopt(token, expires_at)
+                return token
+
+    def _adopt(self, token: str, expires_at: float):
+        self._token = token
+        self._expires_at = expires_at
+        self._ensure_refresher()
+
+    def _read_token_file(self) -> Tuple[Optional[str], float]:
+        try:
+            with open(self.token_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("access_token"), float(data.get("expires_at", 0))
+        except FileNotFoundError:
+            return None, 0
+        except Exception as e:
+            logger.warning(f"读取access_token文件失败 {self.token_path}: {e}")
+            return None, 0
+
+    def _write_token_file(self, token: str, expires_at: float):
+        tmp_path = self.token_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"app_id": self.app_id, "access_token": token, "expires_at": expires_at}, f)
+            os.replace(tmp_path, self.token_path)
+        except Exception as e:
+            logger.error(f"保存access_token文件失败 {self.token_path}: {e}")
+
+    def _request_token(self) -> Tuple[Optional[str], int]:
+        """
+        请求微信接口获取新token
+
+        Returns:
+            (access_token, 有效期秒数)，失败时access_token为None
+        """
+        max_retries = 3
+        params = {"grant_type": "client_credential", "appid": self.app_id, "secret": self.app_secret}
+        for attempt in range(max_retries):
+            try:
+                self.api_requests += 1
+                response = self.http_client.get(
+                    TOKEN_URL,
+                    params=params,
+                    timeout=(5, 30),  # 连接超时5秒，读取超时30秒
+                    verify=True,
+                    allow_redirects=True
+                )
+                data = response.json()
+
+                if "access_token" in data:
+                    logger.info(f"微信公众号access_token获取成功 (尝试 {attempt + 1}/{max_retries})")
+                    return data["access_token"], int(data.get("expires_in", 7200))
+
+                logger.warning(f"获取access_token失败: {data} (尝试 {attempt + 1}/{max_retries})")
+                if attempt < max_retries - 1:
+                    time.sleep(2)
+            except (requests.exceptions.SSLError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                logger.warning(f"获取access_token网络错误 (尝试 {attempt + 1}/{max_retries}): {e}")
+                if attempt < max_retries - 1:
+                    time.sleep(3)
+            except Exception as e:
+                logger.error(f"获取access_token异常: {e}")
+                break
+
+        logger.error("无法获取access_token")
+        return None, 0
+
+    def _ensure_refresher(self):
+        """启动后台刷新线程（每个管理器一个）"""
+        if self.refresh_ahead_seconds <= 0 or (self._refresher and self._refresher.is_alive()):
+            return
+        self._stop_event.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, name=f"wechat-token-{self.app_id}", daemon=True
+        )
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        """在token过期前refresh_ahead_seconds秒主动刷新"""
+        while True:
+            delay = max(self._expires_at - self.refresh_ahead_seconds - time.time(), 5)
+            if self._stop_event.wait(timeout=delay):
+                return
+            try:
+                if self._refresh(self.refresh_ahead_seconds) is None:
+                    # 刷新失败时稍后重试
+                    if self._stop_event.wait(timeout=30):
+                        return
+            except Exception as e:
+                logger.error(f"后台刷新access_token失败: {e}")
+
+    def stop(self):
+        """停止后台刷新线程"""
+        self._stop_event.set()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(app_id: str, app_secret: str, http_client: HttpClient = None) -> WeChatTokenManager:
+    """获取进程内共享的token管理器（每个AppID一个）"""
+    with _managers_lock:
+        manager = _managers.get(app_id)
+        if manager is None or manager.app_secret != (app_secret or ""):
+            manager = WeChatTokenManager(app_id, app_secret, http_client=http_client)
+            _managers[app_id] = manager
+        return manager
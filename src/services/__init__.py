@@ -3,15 +3,21 @@ Services module - 业务服务层
 """
 
 from .ai_service import Summarizer
+from .article_store import SQLiteRSSCache, create_rss_cache, get_shared_cache
 from .rss_service import RSSCache, RSSFetcher, RSSItem
 from .scheduler_service import NewsScheduler
+from .send_queue import SendQueue
 from .send_service import SendManager
 
 __all__ = [
     "RSSFetcher",
     "RSSItem",
     "RSSCache",
+    "SQLiteRSSCache",
+    "create_rss_cache",
+    "get_shared_cache",
     "Summarizer",
     "SendManager",
+    "SendQueue",
     "NewsScheduler",
 ]
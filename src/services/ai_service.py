@@ -2,8 +2,9 @@
 AI总结模块
 """
 import re
+import json
 import logging
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from openai import OpenAI
 import time
 from bs4 import BeautifulSoup
@@ -14,22 +15,38 @@ import os
 from ..core.config import Config
 from ..core.prompts import PromptTemplates
 from ..core.utils import setup_logger
+from .llm_cache import LLMResponseCache, make_cache_key
+from .llm_executor import LLMExecutor, get_llm_executor
+from .llm_stream import LatencyRecorder, MalformedOutputError, StreamValidator, consume_stream
 from .rss_service import RSSItem
 
 logger = setup_logger(__name__)
 
+# analyze_article返回的文章分类
+ARTICLE_CATEGORIES = ("科技", "开发", "娱乐", "金融", "健康", "政治", "其他")
+
 
 class Summarizer:
     """AI总结器"""
 
-    def __init__(self):
+    def __init__(self, response_cache: LLMResponseCache = None, executor: LLMExecutor = None):
         if not Config.OPENAI_API_KEY:
             raise ValueError("需要配置OPENAI_API_KEY")
 
+        # 相同请求复用已缓存的模型输出
+        if response_cache is None and Config.LLM_CACHE_ENABLED:
+            response_cache = LLMResponseCache()
+        self.response_cache = response_cache
+        self.last_scoring_stats: dict = {}  # 最近一次批量评分的吞吐统计
+        # 并发执行和速率限制（重试由执行器统一处理，客户端不再自行重试）
+        self.executor = executor or get_llm_executor()
+        self.latency = LatencyRecorder()  # 流式调用按发送源的延迟分布
+
         # 基础配置
         client_kwargs = {
             "api_key": Config.OPENAI_API_KEY,
-            "base_url": Config.OPENAI_BASE_URL
+            "base_url": Config.OPENAI_BASE_URL,
+            "max_retries": 0,
         }
         
         # 尝试添加代理配置
@@ -54,7 +71,8 @@ class Summarizer:
             logger.info("尝试不使用代理重新初始化...")
             client_kwargs_no_proxy = {
                 "api_key": Config.OPENAI_API_KEY,
-                "base_url": Config.OPENAI_BASE_URL
+                "base_url": Config.OPENAI_BASE_URL,
+                "max_retries": 0,
             }
             try:
                 self.client = OpenAI(**client_kwargs_no_proxy)
@@ -63,6 +81,109 @@ class Summarizer:
                 logger.error(f"无代理初始化也失败: {e2}")
                 raise
 
+    def _chat(self, system_role: str, prompt: str, max_tokens: int, temperature: float,
+              sender_type: str = None, model: str = "deepseek-chat", usage: dict = None,
+              stream: bool = False) -> str:
+        """
+        调用对话接口，相同参数的请求直接返回缓存的结果
+
+        Args:
+            system_role: 系统角色提示词
+            prompt: 用户提示词
+            max_tokens: 最大生成token数
+            temperature: 采样温度
+            sender_type: 发送源类型（参与缓存键）
+            model: 模型名称
+            usage: 传入时累加本次调用消耗的token数（prompt_tokens/completion_tokens）
+            stream: 是否流式读取（记录延迟并提前检查输出结构）
+
+        Returns:
+            去除首尾空白的模型输出
+        """
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = make_cache_key(model, system_role, prompt, max_tokens, temperature, sender_type)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("命中LLM响应缓存")
+                return cached
+
+        request_kwargs = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_role},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        estimated_tokens = self._estimate_tokens(system_role + prompt) + max_tokens
+        if stream:
+            response = self._stream_chat(request_kwargs, estimated_tokens, sender_type)
+            content = response.text.strip()
+        else:
+            response = self.executor.call(
+                lambda: self.client.chat.completions.create(**request_kwargs),
+                estimated_tokens=estimated_tokens,
+            )
+            content = response.choices[0].message.content.strip()
+
+        if usage is not None:
+            for field in ("prompt_tokens", "completion_tokens"):
+                count = getattr(getattr(response, "usage", None), field, None)
+                if isinstance(count, int):
+                    usage[field] = usage.get(field, 0) + count
+
+        if cache_key is not None and content:
+            self.response_cache.put(cache_key, content, model)
+        return content
+
+    def _stream_chat(self, request_kwargs: dict, estimated_tokens: int, sender_type: str = None):
+        """
+        流式调用：边接收边检查结构，明显异常时中止并重新请求；
+        最后一次尝试不再中止，完整读取输出
+
+        Returns:
+            StreamResult
+        """
+        retries = max(0, Config.SUMMARY_STREAM_RETRIES)
+        for attempt in range(retries + 1):
+            validator = StreamValidator(sender_type) if attempt < retries else None
+
+            def request():
+                started = time.monotonic()
+                chunks = self.client.chat.completions.create(
+                    **request_kwargs, stream=True, stream_options={"include_usage": True}
+                )
+                return consume_stream(chunks, started, validator, estimate_tokens=self._estimate_tokens)
+
+            try:
+                result = self.executor.call(request, estimated_tokens=estimated_tokens)
+            except MalformedOutputError as e:
+                self.latency.record(sender_type, e.ttft, aborted=True)
+                logger.warning(f"流式输出结构异常，提前中止并重试 (尝试 {attempt + 1}/{retries + 1}): {e.reason}")
+                continue
+
+            self.latency.record(sender_type, result.ttft, result.tokens_per_second)
+            if result.ttft is not None:
+                logger.info(
+                    f"流式总结完成 ({sender_type}) - 首token {result.ttft:.2f}秒, "
+                    f"{result.tokens_per_second or 0:.1f} tokens/秒, 总耗时 {result.elapsed:.2f}秒"
+                )
+            return result
+
+    def get_cache_stats(self) -> dict:
+        """获取LLM响应缓存统计"""
+        return self.response_cache.get_stats() if self.response_cache is not None else {}
+
+    def get_executor_stats(self) -> dict:
+        """获取LLM请求并发和速率限制统计"""
+        return self.executor.get_stats()
+
+    def get_latency_stats(self) -> dict:
+        """获取流式调用按发送源的首token延迟和生成速度分布"""
+        return self.latency.get_stats()
+
 
     def clean_html(self, text: str) -> str:
         """清理HTML标签"""
@@ -384,24 +505,16 @@ class Summarizer:
                 )
                 max_tokens = 800
 
-            # 调用AI API，使用发送源对应的系统角色
-            response = self.client.chat.completions.create(
-                model="deepseek-chat",  # 使用DeepSeek模型
-                messages=[
-                    {
-                        "role": "system",
-                        "content": PromptTemplates.get_system_role(
-                            "content_strategist", sender_type
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
+            # 调用AI API，使用发送源对应的系统角色（使用DeepSeek模型）
+            summary = self._chat(
+                PromptTemplates.get_system_role("content_strategist", sender_type),
+                prompt,
                 max_tokens=max_tokens,
                 temperature=0.8,
+                sender_type=sender_type,
+                stream=Config.SUMMARY_STREAMING_ENABLED,
             )
 
-            summary = response.choices[0].message.content.strip()
-
             # 解析和处理评分标签信息（仅对微信公众号）
             if sender_type == "wechat_official":
                 summary, metadata = self._extract_article_metadata(summary)
@@ -453,8 +566,8 @@ class Summarizer:
         # 多篇文章时，生成简化的汇总
         try:
             summaries = []
-            for item in items[:3]:  # 最多处理3篇
-                summary = self.summarize_single_item(item)
+            # 最多处理3篇，并发生成
+            for item, summary in zip(items[:3], self.executor.map(self.summarize_single_item, items[:3])):
                 if summary:
                     summaries.append(f"📰 {item.title}\n{summary}")
 
@@ -509,50 +622,86 @@ class Summarizer:
         for i, item in enumerate(items[:3], 1):
             return summary
 
+    def analyze_article(self, item: RSSItem) -> dict:
+        """
+        一次调用同时获取文章的评分、分类、标签和语言，结果保存在item.analysis上
+        （随文章写回存储），已分析过的文章直接返回保存的结果
+
+        Args:
+            item: RSS条目
+
+        Returns:
+            {"score": 0-10, "category": 分类, "tags": [标签], "language": 语言代码}
+
+        Raises:
+            调用失败或响应无法解析时抛出异常，不保存结果
+        """
+        if item.analysis:
+            return item.analysis
+
+        content = f"Title: {item.title}\nContent: {self.clean_html(item.description)[:500]}"
+        response_text = self._chat(
+            PromptTemplates.get_system_role("content_analyst"),
+            f"{PromptTemplates.ARTICLE_ANALYSIS}\n\nContent:\n{content}",
+            max_tokens=120,
+            temperature=0.1,
+        )
+        item.analysis = self._parse_analysis(response_text)
+        logger.info(f"文章分析完成: {item.title[:30]}... -> {item.analysis}")
+        return item.analysis
+
+    @staticmethod
+    def _parse_analysis(response_text: str) -> dict:
+        """解析综合分析的JSON对象，评分缺失或无法解析时抛出ValueError"""
+        match = re.search(r"\{.*\}", response_text, re.DOTALL)
+        if not match:
+            raise ValueError(f"文章分析响应不是JSON对象: {response_text[:100]}")
+        data = json.loads(match.group(0))
+        if not isinstance(data, dict):
+            raise ValueError(f"文章分析响应不是JSON对象: {response_text[:100]}")
+        return Summarizer._normalize_analysis(data, response_text)
+
+    @staticmethod
+    def _normalize_analysis(data: dict, response_text: str = "") -> dict:
+        """规范化单篇文章的分析结果（评分限制在0-10、分类限定在固定列表、最多4个标签），评分无效时抛出ValueError"""
+        try:
+            score = max(0, min(10, int(round(float(data["score"])))))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"文章分析响应缺少有效评分: {response_text[:100]}")
+
+        category = str(data.get("category") or "").strip()
+        tags = data.get("tags") or []
+        if isinstance(tags, str):
+            tags = re.split(r"[,，、]", tags)
+        return {
+            "score": score,
+            "category": category if category in ARTICLE_CATEGORIES else "其他",
+            "tags": [str(tag).strip() for tag in tags if str(tag).strip()][:4],
+            "language": str(data.get("language") or "unknown").strip().lower(),
+        }
+
     def classify_article(self, item: RSSItem) -> str:
         """
-        对文章进行分类
+        获取文章分类（读取analyze_article的结果）
 
         Args:
             item: RSS条目
 
         Returns:
-            文章分类（Technology, Development, Entertainment, Finance, Health, Politics, Other）
+            文章分类（科技, 开发, 娱乐, 金融, 健康, 政治, 其他），失败时返回Other
         """
         if not item:
             return "Other"
 
         try:
-            # 准备文章内容
-            content = f"Title: {item.title}\nContent: {self.clean_html(item.description)[:300]}"
-
-            response = self.client.chat.completions.create(
-                model="deepseek-chat",  # 文章分类使用DeepSeek模型
-                messages=[
-                    {
-                        "role": "system",
-                        "content": PromptTemplates.get_system_role("content_analyst"),
-                    },
-                    {
-                        "role": "user",
-                        "content": f"{PromptTemplates.ARTICLE_CLASSIFICATION}\n\nContent:\n{content}",
-                    },
-                ],
-                max_tokens=50,
-                temperature=0.1,
-            )
-
-            category = response.choices[0].message.content.strip()
-            logger.info(f"文章分类完成: {item.title[:30]}... -> {category}")
-            return category
-
+            return self.analyze_article(item)["category"]
         except Exception as e:
             logger.error(f"文章分类失败: {e}")
             return "Other"
 
     def generate_tags(self, item: RSSItem) -> str:
         """
-        为文章生成标签
+        获取文章标签（读取analyze_article的结果）
 
         Args:
             item: RSS条目
@@ -564,36 +713,14 @@ class Summarizer:
             return ""
 
         try:
-            # 准备文章内容
-            content = f"Title: {item.title}\nContent: {self.clean_html(item.description)[:300]}"
-
-            response = self.client.chat.completions.create(
-                model="deepseek-chat",  # 标签生成使用DeepSeek模型
-                messages=[
-                    {
-                        "role": "system",
-                        "content": PromptTemplates.get_system_role("content_analyst"),
-                    },
-                    {
-                        "role": "user",
-                        "content": f"{PromptTemplates.ARTICLE_TAGS}\n\nContent:\n{content}",
-                    },
-                ],
-                max_tokens=100,
-                temperature=0.3,
-            )
-
-            tags = response.choices[0].message.content.strip()
-            logger.info(f"标签生成完成: {item.title[:30]}... -> {tags}")
-            return tags
-
+            return ", ".join(self.analyze_article(item)["tags"])
         except Exception as e:
             logger.error(f"标签生成失败: {e}")
             return ""
 
     def score_article(self, item: RSSItem) -> int:
         """
-        为文章评分
+        为文章评分（读取analyze_article的结果）
 
         Args:
             item: RSS条目
@@ -601,43 +728,160 @@ class Summarizer:
         Returns:
             文章评分（0-10）
         """
+        return self._score_article_with_source(item)[0]
+
+    def _score_article_with_source(self, item: RSSItem) -> Tuple[int, str]:
+        """为文章评分，同时返回评分来源：llm，或模型调用失败时的heuristic（简单规则降级评分）"""
         if not item:
-            return 0
+            return 0, "heuristic"
 
         try:
-            # 准备文章内容
-            content = f"Title: {item.title}\nContent: {self.clean_html(item.description)[:500]}"
-
-            response = self.client.chat.completions.create(
-                model="deepseek-chat",  # 文章评分使用DeepSeek模型
-                messages=[
-                    {
-                        "role": "system",
-                        "content": PromptTemplates.get_system_role("content_analyst"),
-                    },
-                    {
-                        "role": "user",
-                        "content": f"{PromptTemplates.ARTICLE_SCORING}\n\nContent:\n{content}",
-                    },
-                ],
-                max_tokens=20,
-                temperature=0.1,
-            )
+            return self.analyze_article(item)["score"], "llm"
+        except Exception as e:
+            logger.error(f"文章评分失败: {e}")
+            # 基于简单规则的降级评分
+            return self._simple_score_article(item), "heuristic"
+
+    def score_articles(self, items: List[RSSItem], sources: List[str] = None) -> List[int]:
+        """
+        批量为文章评分：按token预算把多篇文章打包进一次调用，模型返回 [{id, score, category, tags, language}]
+        JSON数组，分析结果保存在item.analysis上；已分析过的文章直接使用保存的评分，
+        批量结果中缺失或无法解析的文章逐篇调用score_article补评
+
+        Args:
+            items: RSS条目列表
+            sources: 可选，传入空列表时按items顺序填入每篇的评分来源（llm 或 heuristic）
 
-            score_text = response.choices[0].message.content.strip()
+        Returns:
+            与items顺序一致的评分列表（0-10）
+        """
+        if not items:
+            return []
+
+        started = time.time()
+        scores: List[Optional[int]] = [item.analysis["score"] if item.analysis else None for item in items]
+        score_sources = ["llm"] * len(items)
+        pending = [index for index, score in enumerate(scores) if score is None]
+
+        def run_batch(batch: List[int]):
+            usage = {}
             try:
-                score = int(score_text)
-                score = max(0, min(10, score))  # 确保分数在0-10范围内
-            except ValueError:
-                score = 5  # 默认分数
+                return batch, self._score_batch([items[index] for index in batch], usage), usage
+            except Exception as e:
+                logger.error(f"批量评分失败（{len(batch)}篇）: {e}")
+                return batch, {}, usage
+
+        # 各批次并发请求，由执行器控制速率
+        total_tokens = 0
+        batches = [[pending[position] for position in batch]
+                   for batch in self._plan_scoring_batches([items[index] for index in pending])]
+        for batch, analyses, usage in self.executor.map(run_batch, batches):
+            total_tokens += usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+            for position, index in enumerate(batch, 1):
+                analysis = analyses.get(position)
+                if analysis is None:
+                    continue
+                scores[index] = analysis["score"]
+                if "category" in analysis:
+                    items[index].analysis = analysis
+
+        missing = [index for index, score in enumerate(scores) if score is None]
+        if missing:
+            logger.info(f"批量评分遗漏 {len(missing)} 篇，逐篇补评")
+            fallback_scores = self.executor.map(self._score_article_with_source, [items[index] for index in missing])
+            for index, (score, source) in zip(missing, fallback_scores):
+                scores[index] = score
+                score_sources[index] = source
+
+        elapsed = time.time() - started
+        self.last_scoring_stats = {
+            "articles": len(items),
+            "fallback_articles": len(missing),
+            "heuristic_articles": score_sources.count("heuristic"),
+            "seconds": round(elapsed, 3),
+            "articles_per_second": round(len(items) / elapsed, 2) if elapsed > 0 else None,
+            "tokens_per_article": round(total_tokens / len(items), 1) if total_tokens else None,
+        }
+        logger.info(
+            f"批量评分完成: {len(items)}篇，逐篇补评{len(missing)}篇"
+            f"（其中规则降级{self.last_scoring_stats['heuristic_articles']}篇），"
+            f"{self.last_scoring_stats['articles_per_second']}篇/秒，"
+            f"{self.last_scoring_stats['tokens_per_article']} tokens/篇"
+        )
+        if sources is not None:
+            sources[:] = score_sources
+        return scores
+
+    def _scoring_text(self, item: RSSItem) -> str:
+        return f"Title: {item.title}\nContent: {self.clean_html(item.description)[:500]}"
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗略估算token数：中日韩字符按1个token，其他字符按4个字符1个token"""
+        cjk = len(re.findall(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]", text))
+        return cjk + (len(text) - cjk) // 4 + 1
+
+    def _plan_scoring_batches(self, items: List[RSSItem]) -> List[List[int]]:
+        """按输入token预算和单批篇数上限划分批次（返回条目下标）"""
+        budget = Config.SCORING_BATCH_TOKEN_BUDGET - self._estimate_tokens(PromptTemplates.ARTICLE_BATCH_SCORING)
+        max_items = max(1, Config.SCORING_BATCH_MAX_ITEMS)
+        batches, current, used = [], [], 0
+        for index, item in enumerate(items):
+            cost = self._estimate_tokens(self._scoring_text(item)) + 8
+            if current and (used + cost > budget or len(current) >= max_items):
+                batches.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _score_batch(self, items: List[RSSItem], usage: dict) -> dict:
+        """
+        一次调用为一批文章评分并分析分类、标签和语言
 
-            logger.info(f"文章评分完成: {item.title[:30]}... -> {score}")
-            return score
+        Returns:
+            {批内序号(从1开始): 分析结果}，只包含成功解析的文章；
+            响应中没有分类的条目只含score
+        """
+        articles = "\n\n".join(f"[{i}] {self._scoring_text(item)}" for i, item in enumerate(items, 1))
+        response_text = self._chat(
+            PromptTemplates.get_system_role("content_analyst"),
+            f"{PromptTemplates.ARTICLE_BATCH_SCORING}\n\nArticles:\n{articles}",
+            max_tokens=60 * len(items) + 20,  # 每篇约50个token的JSON输出
+            temperature=0.1,
+            usage=usage,
+        )
+        return self._parse_batch_analyses(response_text, len(items))
+
+    @staticmethod
+    def _parse_batch_analyses(response_text: str, count: int) -> dict:
+        """
+        解析 [{"id": 1, "score": 8, "category": "科技", "tags": [...], "language": "en"}, ...]，
+        忽略越界id和无法解析的分数；没有分类的条目只保留评分
+        """
+        match = re.search(r"\[.*\]", response_text, re.DOTALL)
+        if not match:
+            logger.warning(f"批量评分响应不是JSON数组: {response_text[:100]}")
+            return {}
+        try:
+            entries = json.loads(match.group(0))
+        except ValueError:
+            logger.warning(f"批量评分响应JSON解析失败: {response_text[:100]}")
+            return {}
 
-        except Exception as e:
-            logger.error(f"文章评分失败: {e}")
-            # 基于简单规则的降级评分
-            return self._simple_score_article(item)
+        analyses = {}
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                article_id = int(entry["id"])
+                analysis = Summarizer._normalize_analysis(entry)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 1 <= article_id <= count:
+                continue
+            analyses[article_id] = analysis if entry.get("category") else {"score": analysis["score"]}
+        return analyses
 
     def _simple_score_article(self, item: RSSItem) -> int:
         """
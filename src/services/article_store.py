@@ -0,0 +1,412 @@
+"""
+SQLite文章存储模块
+以SQLite（WAL模式）实现与RSSCache相同的接口，每篇文章一行，
+发送状态和质量评分查询走索引，不再每次改动都重写整天的JSON文件
+"""
+import json
+import sqlite3
+import threading
+import weakref
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+from .dedup_filter import dedup_keys, link_key, open_dedup_filter
+from .rss_service import RSSCache, RSSItem
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    date_key TEXT NOT NULL,
+    title_hash TEXT NOT NULL,
+    published TEXT NOT NULL,
+    sent_status INTEGER NOT NULL DEFAULT 0,
+    send_success INTEGER NOT NULL DEFAULT 0,
+    excluded INTEGER NOT NULL DEFAULT 0,
+    quality_score INTEGER,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (date_key, title_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_unsent
+    ON articles (published DESC)
+    WHERE sent_status = 0 AND send_success = 0 AND excluded = 0;
+CREATE INDEX IF NOT EXISTS idx_articles_unscored
+    ON articles (published DESC)
+    WHERE quality_score IS NULL;
+CREATE INDEX IF NOT EXISTS idx_articles_excluded
+    ON articles (published DESC)
+    WHERE excluded = 1;
+CREATE INDEX IF NOT EXISTS idx_articles_quality_score
+    ON articles (quality_score);
+CREATE TABLE IF NOT EXISTS dedup_keys (
+    key TEXT PRIMARY KEY,
+    seen_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dedup_keys_seen_at
+    ON dedup_keys (seen_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SQLiteRSSCache:
+    """基于SQLite的RSS文章存储（与RSSCache接口一致）"""
+
+    def __init__(self, cache_dir: str = "cache", db_name: str = "articles.db"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / db_name
+        self._lock = threading.RLock()
+        # (date_key, title_hash) -> 仍被引用的RSSItem
+        self._identity_map: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+        self._state_observers: List[Callable[[RSSItem], None]] = []
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        if not self._get_meta("json_migrated"):
+            migrated = self.migrate_from_json()
+            self._set_meta("json_migrated", datetime.now().isoformat())
+            if migrated:
+                logger.info(f"已从JSON缓存迁移 {migrated} 篇文章到 {self.db_path}")
+
+        if not self._get_meta("dedup_keys_backfilled"):
+            for item in self.iter_items():
+                self._record_dedup_keys(item)
+            self._set_meta("dedup_keys_backfilled", datetime.now().isoformat())
+
+        # 跨天去重：布隆过滤器快速排除，命中后查dedup_keys表精确确认
+        self.dedup_filter = open_dedup_filter(self.cache_dir)
+        if self.dedup_filter is not None and self.dedup_filter.is_new:
+            with self._lock:
+                rows = self._conn.execute("SELECT key FROM dedup_keys").fetchall()
+            for (key,) in rows:
+                self.dedup_filter.add(key)
+            self.dedup_filter.save()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _row_values(item: RSSItem) -> tuple:
+        """RSSItem转换为表行"""
+        return (
+            item.date_key,
+            item.title_hash,
+            item.published.isoformat(),
+            int(bool(item.sent_status)),
+            int(bool(item.send_success)),
+            int(bool(item.excluded_from_sending)),
+            item.quality_score if item.has_quality_score() else None,
+            json.dumps(item.to_dict(), ensure_ascii=False),
+            datetime.now().isoformat(),
+        )
+
+    def _active_since(self) -> str:
+        """查询的时间窗口起点（与JSON缓存一致：今天和昨天）"""
+        start = datetime.now() - timedelta(days=1)
+        return start.strftime("%Y-%m-%d")
+
+    def _select_items(self, sql: str, params: tuple = ()) -> List[RSSItem]:
+        """查询文章；仍被引用的文章复用同一对象，保证各处看到的状态一致"""
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            items = []
+            for row in rows:
+                data = json.loads(row[0])
+                item = RSSItem.from_dict(data)
+                item = self._identity_map.setdefault((item.date_key, item.title_hash), item)
+                item.add_state_listener(self._on_item_state_change)
+                items.append(item)
+        return items
+
+    def _on_item_state_change(self, item: RSSItem):
+        """文章状态变化时写回存储并通知观察者"""
+        self.update_item_sent_status(item)
+        self._notify_observers(item)
+
+    def add_state_observer(self, observer: Callable[[RSSItem], None]):
+        """注册存储级状态观察者，文章入库或状态变化时调用（如发送队列）"""
+        if observer not in self._state_observers:
+            self._state_observers.append(observer)
+
+    def _notify_observers(self, item: RSSItem):
+        for observer in list(self._state_observers):
+            observer(item)
+
+    def migrate_from_json(self, json_dir: str = None) -> int:
+        """
+        将按天保存的JSON缓存文件一次性导入SQLite
+
+        Args:
+            json_dir: JSON缓存目录，默认为当前缓存目录
+
+        Returns:
+            导入的文章数量
+        """
+        source_dir = Path(json_dir) if json_dir else self.cache_dir
+        migrated = 0
+        for cache_file in sorted(source_dir.glob("rss_*.json")):
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                rows = [
+                    self._row_values(RSSItem.from_dict(item_data))
+                    for item_data in data.get("articles", [])
+                ]
+                with self._lock:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                    )
+                    self._conn.commit()
+                migrated += len(rows)
+            except Exception as e:
+                logger.error(f"迁移缓存文件失败 {cache_file}: {e}")
+        return migrated
+
+    def _record_dedup_keys(self, item: RSSItem):
+        """记录文章的去重键（不提交事务）"""
+        keys = dedup_keys(item)
+        seen_at = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO dedup_keys (key, seen_at) VALUES (?, ?)",
+                [(key, seen_at) for key in keys],
+            )
+        if getattr(self, "dedup_filter", None) is not None:
+            for key in keys:
+                self.dedup_filter.add(key)
+
+    def is_known_link(self, canonical_link: str) -> bool:
+        """检查规范化链接是否已入库（在构造RSSItem之前调用，过滤器未命中时无需查表）"""
+        if not canonical_link:
+            return False
+        key = link_key(canonical_link)
+        if self.dedup_filter is not None and not self.dedup_filter.might_contain(key):
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM dedup_keys WHERE key = ?", (key,)).fetchone()
+        if self.dedup_filter is not None:
+            self.dedup_filter.record_confirmation(row is not None)
+        return row is not None
+
+    def is_duplicate(self, item: RSSItem) -> bool:
+        """检查文章是否重复（同一天的相同标题，或去重窗口内标题/guid/链接相同）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM articles WHERE date_key = ? AND title_hash = ?",
+                (item.date_key, item.title_hash),
+            ).fetchone()
+        if row is not None:
+            return True
+        if self.dedup_filter is None:
+            return False
+
+        hits = [key for key in dedup_keys(item) if self.dedup_filter.might_contain(key)]
+        if not hits:
+            return False
+
+        placeholders = ", ".join("?" for _ in hits)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM dedup_keys WHERE key IN ({placeholders}) LIMIT 1", hits
+            ).fetchone()
+        confirmed = row is not None
+        self.dedup_filter.record_confirmation(confirmed)
+        if confirmed:
+            logger.debug(f"跨天重复文章: {item.title[:30]}...")
+        return confirmed
+
+    def add_item(self, item: RSSItem):
+        """添加文章到存储"""
+        item.add_state_listener(self._on_item_state_change)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row_values(item),
+            )
+            self._record_dedup_keys(item)
+            self._conn.commit()
+            self._identity_map[(item.date_key, item.title_hash)] = item
+        self._notify_observers(item)
+
+    def update_item_sent_status(self, item: RSSItem):
+        """更新文章状态（发送状态、评分、排除状态等整行更新）"""
+        values = self._row_values(item)
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE articles
+                SET published = ?, sent_status = ?, send_success = ?, excluded = ?,
+                    quality_score = ?, data = ?, updated_at = ?
+                WHERE date_key = ? AND title_hash = ?
+                """,
+                values[2:] + values[:2],
+            )
+            self._conn.commit()
+
+    def get_send_candidates(self, date_key: str = None) -> List[RSSItem]:
+        """获取未发送、未排除且未判定为不合格的文章（不检查重试间隔，按发布时间倒序）"""
+        sql = """
+            SELECT data FROM articles
+            WHERE sent_status = 0 AND send_success = 0 AND excluded = 0
+              AND (quality_score IS NULL OR quality_score >= ?)
+        """
+        params = [Config.MIN_QUALITY_SCORE]
+        if date_key:
+            sql += " AND date_key = ?"
+            params.append(date_key)
+        else:
+            sql += " AND published >= ?"
+            params.append(self._active_since())
+        sql += " ORDER BY published DESC"
+        return self._select_items(sql, tuple(params))
+
+    def get_unsent_items(self, date_key: str = None) -> List[RSSItem]:
+        """获取未发送且可发送的文章（按发布时间倒序）"""
+        candidates = self.get_send_candidates(date_key)
+        # 重试间隔依赖当前时间，在结果集上判断
+        sendable_items = [item for item in candidates if item.should_retry_send()]
+        logger.info(f"📊 文章状态统计 - 候选: {len(candidates)}, 可发送: {len(sendable_items)}")
+        return sendable_items
+
+    def get_items_needing_quality_check(self) -> List[RSSItem]:
+        """获取需要质量检查的文章"""
+        if not getattr(Config, 'ENABLE_QUALITY_CHECK', True):
+            return []
+        return self._select_items(
+            """
+            SELECT data FROM articles
+            WHERE quality_score IS NULL AND published >= ?
+            ORDER BY published DESC
+            """,
+            (self._active_since(),),
+        )
+
+    def get_excluded_items(self) -> List[RSSItem]:
+        """获取被排除出发送队列的文章"""
+        return self._select_items(
+            """
+            SELECT data FROM articles
+            WHERE excluded = 1 AND published >= ?
+            ORDER BY published DESC
+            """,
+            (self._active_since(),),
+        )
+
+    def get_item(self, article_key: str) -> Optional[RSSItem]:
+        """按article_key获取文章"""
+        date_key, _, title_hash = article_key.partition(":")
+        items = self._select_items(
+            "SELECT data FROM articles WHERE date_key = ? AND title_hash = ?",
+            (date_key, title_hash),
+        )
+        return items[0] if items else None
+
+    def iter_items(self) -> Iterator[RSSItem]:
+        """遍历存储中的所有文章"""
+        yield from self._select_items("SELECT data FROM articles ORDER BY date_key, published")
+
+    def remove_item(self, item: RSSItem):
+        """从存储中删除文章"""
+        with self._lock:
+            self._identity_map.pop((item.date_key, item.title_hash), None)
+            self._conn.execute(
+                "DELETE FROM articles WHERE date_key = ? AND title_hash = ?",
+                (item.date_key, item.title_hash),
+            )
+            self._conn.commit()
+
+    def get_daily_stats(self) -> Dict[str, int]:
+        """获取每天的文章数量"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date_key, COUNT(*) FROM articles GROUP BY date_key"
+            ).fetchall()
+        return {date_key: count for date_key, count in rows}
+
+    def clear(self, date_key: str = None):
+        """清理指定日期的文章，或清理全部文章及去重记录"""
+        with self._lock:
+            if date_key:
+                self._conn.execute("DELETE FROM articles WHERE date_key = ?", (date_key,))
+                for key in [key for key in self._identity_map.keys() if key[0] == date_key]:
+                    self._identity_map.pop(key, None)
+            else:
+                self._conn.execute("DELETE FROM articles")
+                self._conn.execute("DELETE FROM dedup_keys")
+                self._identity_map.clear()
+                if self.dedup_filter is not None:
+                    self.dedup_filter.clear()
+            self._conn.commit()
+
+    def cleanup_old_cache(self, keep_days: int = 7):
+        """清理旧的文章记录"""
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM articles WHERE date_key < ?", (cutoff,))
+            self._conn.commit()
+        if cursor.rowcount > 0:
+            logger.info(f"删除 {cursor.rowcount} 条 {cutoff} 之前的文章记录")
+
+        # 去重键按去重窗口保留，比文章本身保留得更久
+        if self.dedup_filter is not None:
+            key_cutoff = (datetime.now() - timedelta(days=self.dedup_filter.window_days)).isoformat()
+            with self._lock:
+                self._conn.execute("DELETE FROM dedup_keys WHERE seen_at < ?", (key_cutoff,))
+                self._conn.commit()
+
+    def get_dedup_stats(self) -> Dict[str, object]:
+        """获取跨天去重过滤器统计"""
+        return self.dedup_filter.get_stats() if self.dedup_filter is not None else {}
+
+    def flush(self):
+        """保存去重过滤器（文章变更已逐条提交）"""
+        if self.dedup_filter is not None:
+            self.dedup_filter.save()
+
+    def close(self):
+        """保存去重过滤器并关闭数据库连接"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def create_rss_cache(cache_dir: str = "cache"):
+    """根据CACHE_BACKEND配置创建文章存储（sqlite 或 json）"""
+    backend = Config.CACHE_BACKEND.lower()
+    if backend == "json":
+        return RSSCache(cache_dir)
+    if backend != "sqlite":
+        logger.warning(f"未知的缓存后端 {backend}，使用sqlite")
+    return SQLiteRSSCache(cache_dir)
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """获取进程内共享的文章存储（所有RSS获取器和管理器共用）"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = create_rss_cache()
+    return _shared_cache
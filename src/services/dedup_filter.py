@@ -0,0 +1,222 @@
+"""
+跨天去重过滤器模块
+按时间分片轮转的布隆过滤器，覆盖可配置的去重窗口（如90天），内存占用固定，
+以二进制文件持久化，启动时直接读入位数组
+"""
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..core.config import Config
+from ..core.url_utils import url_hash
+from ..core.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_FILE_MAGIC = b"RBF1"
+_HEADER = struct.Struct("<4sQII")  # 魔数, 位数, 哈希函数个数, 分片数
+_SLICE_HEADER = struct.Struct("<dQ")  # 分片创建时间, 元素数
+
+
+def link_key(canonical_link: str) -> str:
+    """规范化链接的去重键"""
+    return f"link:{url_hash(canonical_link)}"
+
+
+def dedup_keys(item) -> List[str]:
+    """文章的去重键：规范化标题哈希、guid 和规范化链接哈希"""
+    keys = [f"title:{item.title_hash}"]
+    guid = (getattr(item, "guid", None) or "").strip()
+    if guid:
+        keys.append(f"guid:{guid}")
+    if item.canonical_link:
+        keys.append(link_key(item.canonical_link))
+    return keys
+
+
+class BloomFilter:
+    """定长位数组布隆过滤器（双重哈希）"""
+
+    def __init__(self, num_bits: int, num_hashes: int, created_at: float = None,
+                 bits: bytearray = None, count: int = 0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.created_at = created_at if created_at is not None else time.time()
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = count
+
+    def add_positions(self, positions: List[int]):
+        for position in positions:
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains_positions(self, positions: List[int]) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def estimated_false_positive_rate(self) -> float:
+        """按当前元素数估算的误判率"""
+        if self.count == 0:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class RotatingBloomFilter:
+    """
+    按时间分片轮转的布隆过滤器
+
+    去重窗口被划分为若干分片，新元素写入最新分片，查询检查所有分片；
+    最旧的分片整体过期丢弃，因此内存占用与窗口内的文章数量无关
+    """
+
+    def __init__(self, path: str, window_days: int = None, slices: int = None,
+                 items_per_day: int = None, false_positive_rate: float = None):
+        """
+        初始化过滤器，存在持久化文件且参数一致时直接加载
+
+        Args:
+            path: 持久化文件路径
+            window_days: 去重窗口（天）
+            slices: 窗口划分的分片数
+            items_per_day: 预计每天的去重键数量，用于确定位数组大小
+            false_positive_rate: 整个窗口的目标误判率
+        """
+        self.path = Path(path)
+        self.window_days = window_days or Config.DEDUP_WINDOW_DAYS
+        self.slice_count = slices or Config.DEDUP_FILTER_SLICES
+        items_per_day = items_per_day or Config.DEDUP_EXPECTED_ITEMS_PER_DAY
+        false_positive_rate = false_positive_rate or Config.DEDUP_FALSE_POSITIVE_RATE
+
+        self.window_seconds = self.window_days * 86400
+        self.slice_seconds = self.window_seconds / self.slice_count
+        # 查询会检查所有分片，整体误判率约为各分片之和
+        capacity = max(1, int(items_per_day * self.window_days / self.slice_count))
+        slice_rate = false_positive_rate / self.slice_count
+        self.num_bits = max(8, int(-capacity * math.log(slice_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+
+        self._slices: List[BloomFilter] = []
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.is_new = not self._load()
+
+        # 命中统计：过滤器命中后由精确存储确认
+        self.positive_hits = 0
+        self.confirmed_hits = 0
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _rotate(self, now: float):
+        """过期旧分片，必要时开启新分片"""
+        expired_before = now - self.window_seconds - self.slice_seconds
+        if self._slices and self._slices[0].created_at <= expired_before:
+            self._slices = [s for s in self._slices if s.created_at > expired_before]
+            self._dirty = True
+        if not self._slices or now - self._slices[-1].created_at >= self.slice_seconds:
+            self._slices.append(BloomFilter(self.num_bits, self.num_hashes, created_at=now))
+            self._dirty = True
+
+    def add(self, key: str):
+        """加入一个键"""
+        positions = self._positions(key)
+        with self._lock:
+            self._rotate(time.time())
+            self._slices[-1].add_positions(positions)
+            self._dirty = True
+
+    def might_contain(self, key: str) -> bool:
+        """检查键是否可能存在（无漏判，可能误判）"""
+        positions = self._positions(key)
+        with self._lock:
+            return any(s.contains_positions(positions) for s in self._slices)
+
+    def clear(self):
+        """清空所有分片"""
+        with self._lock:
+            self._slices = []
+            self._dirty = True
+
+    def record_confirmation(self, confirmed: bool):
+        """记录一次命中后的精确确认结果，用于统计实际误判率"""
+        with self._lock:
+            self.positive_hits += 1
+            if confirmed:
+                self.confirmed_hits += 1
+
+    def get_stats(self) -> Dict[str, object]:
+        """获取过滤器统计（含估算误判率和观测误判率）"""
+        with self._lock:
+            estimated = 1.0
+            for s in self._slices:
+                estimated *= 1 - s.estimated_false_positive_rate()
+            false_positives = self.positive_hits - self.confirmed_hits
+            return {
+                "window_days": self.window_days,
+                "slices": len(self._slices),
+                "keys": sum(s.count for s in self._slices),
+                "memory_bytes": len(self._slices) * ((self.num_bits + 7) // 8),
+                "estimated_false_positive_rate": 1 - estimated,
+                "positive_hits": self.positive_hits,
+                "false_positives": false_positives,
+                "observed_false_positive_rate": (
+                    false_positives / self.positive_hits if self.positive_hits else 0.0
+                ),
+            }
+
+    def _load(self) -> bool:
+        """从文件加载分片，参数不一致或文件损坏时返回False"""
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                magic, num_bits, num_hashes, slice_count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _FILE_MAGIC or num_bits != self.num_bits or num_hashes != self.num_hashes:
+                    logger.warning(f"去重过滤器参数已变化，重新构建: {self.path}")
+                    return False
+                byte_len = (num_bits + 7) // 8
+                slices = []
+                for _ in range(slice_count):
+                    created_at, count = _SLICE_HEADER.unpack(f.read(_SLICE_HEADER.size))
+                    bits = bytearray(f.read(byte_len))
+                    if len(bits) != byte_len:
+                        raise ValueError("分片数据不完整")
+                    slices.append(BloomFilter(num_bits, num_hashes, created_at, bits, count))
+            self._slices = slices
+            logger.debug(f"加载去重过滤器: {len(slices)} 个分片")
+            return True
+        except Exception as e:
+            logger.error(f"加载去重过滤器失败 {self.path}: {e}")
+            self._slices = []
+            return False
+
+    def save(self):
+        """有变更时写入文件（临时文件+替换）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(_HEADER.pack(_FILE_MAGIC, self.num_bits, self.num_hashes, len(self._slices)))
+                    for s in self._slices:
+                        f.write(_SLICE_HEADER.pack(s.created_at, s.count))
+                        f.write(s.bits)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                logger.error(f"保存去重过滤器失败 {self.path}: {e}")
+
+
+def open_dedup_filter(cache_dir: Path) -> Optional[RotatingBloomFilter]:
+    """按配置创建文章存储使用的去重过滤器，DEDUP_WINDOW_DAYS为0时不启用"""
+    if Config.DEDUP_WINDOW_DAYS <= 0:
+        return None
+    return RotatingBloomFilter(str(Path(cache_dir) / "dedup.bloom"))
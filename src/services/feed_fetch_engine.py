@@ -0,0 +1,168 @@
+"""
+RSS并发抓取引擎
+基于asyncio调度大量RSS源的抓取，全局并发和单主机并发分别受信号量限制，
+HTTP请求和feedparser解析在线程池中执行，不阻塞事件循环；
+线程无法从外部中断，超时时间同时传给抓取函数用于HTTP请求；超时后通过取消标记通知抓取函数，
+抓取函数在写入缓存和源统计之前确认未被取消，超时的源不会留下任何写入
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class FetchCancellation:
+    """
+    单个源的抓取取消标记
+
+    引擎超时后调用cancel()，抓取函数在写入缓存、校验信息和源统计之前调用commit()；
+    两者先到者生效：已取消的抓取不再写入，已开始写入的抓取不会被取消，引擎等待其完成
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Optional[str] = None  # None、"cancelled" 或 "committed"
+
+    def cancel(self) -> bool:
+        """取消抓取，抓取函数已开始写入时返回False"""
+        with self._lock:
+            if self._state is None:
+                self._state = "cancelled"
+            return self._state == "cancelled"
+
+    def commit(self) -> bool:
+        """开始写入前调用，抓取已被取消时返回False（可重复调用）"""
+        with self._lock:
+            if self._state is None:
+                self._state = "committed"
+            return self._state == "committed"
+
+    @property
+    def cancelled(self) -> bool:
+        with self._lock:
+            return self._state == "cancelled"
+
+
+class AsyncFeedFetchEngine:
+    """asyncio RSS抓取引擎"""
+
+    def __init__(self, max_concurrency: int = None, per_host_limit: int = None,
+                 timeout: float = None):
+        """
+        初始化抓取引擎
+
+        Args:
+            max_concurrency: 全局最大并发抓取数
+            per_host_limit: 同一主机的最大并发抓取数
+            timeout: 单个源的抓取超时（秒）
+        """
+        self.max_concurrency = max_concurrency or Config.FEED_FETCH_CONCURRENCY
+        self.per_host_limit = per_host_limit or Config.FEED_FETCH_PER_HOST
+        self.timeout = timeout or Config.FEED_FETCH_TIMEOUT
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="feed-fetch"
+        )
+
+    def fetch_all(self, sources: List, fetch_func: Callable,
+                  on_error: Callable = None) -> List[Tuple[object, list]]:
+        """
+        并发抓取所有源，按完成顺序收集结果
+
+        Args:
+            sources: RSS源列表（需要有url和name属性）
+            fetch_func: 阻塞的单源抓取函数，参数为(source, 超时秒数, FetchCancellation)，返回文章列表；
+                        超时应传给HTTP请求，使线程在引擎放弃等待后尽快结束，
+                        写入缓存和源统计之前须调用commit()，返回False时不再写入
+            on_error: 抓取超时或异常时的回调，参数为(source, error)
+
+        Returns:
+            (source, items) 列表，按完成先后排列
+        """
+        if not sources:
+            return []
+        return self._run_coroutine(self._fetch_all(sources, fetch_func, on_error))
+
+    async def _fetch_all(self, sources: List, fetch_func: Callable,
+                         on_error: Callable) -> List[Tuple[object, list]]:
+        """在事件循环中调度所有抓取任务"""
+        global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        host_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host_limit)
+        )
+        start_time = time.monotonic()
+
+        tasks = [
+            asyncio.ensure_future(
+                self._fetch_one(source, fetch_func, on_error, global_semaphore,
+                                host_semaphores[urlparse(source.url).netloc])
+            )
+            for source in sources
+        ]
+
+        results = []
+        for completed in asyncio.as_completed(tasks):
+            source, items = await completed
+            results.append((source, items))
+            logger.debug(f"抓取完成 {len(results)}/{len(sources)}: {source.name} ({len(items)} 篇)")
+
+        elapsed = time.monotonic() - start_time
+        logger.info(f"并发抓取 {len(sources)} 个RSS源完成，耗时 {elapsed:.1f} 秒")
+        return results
+
+    async def _fetch_one(self, source, fetch_func: Callable, on_error: Callable,
+                         global_semaphore: asyncio.Semaphore,
+                         host_semaphore: asyncio.Semaphore) -> Tuple[object, list]:
+        """在信号量限制下于线程池中抓取单个源"""
+        loop = asyncio.get_running_loop()
+        # 先取主机信号量：等待繁忙主机的任务不占用全局并发名额
+        async with host_semaphore, global_semaphore:
+            cancellation = FetchCancellation()
+            future = loop.run_in_executor(self._executor, fetch_func, source, self.timeout, cancellation)
+            try:
+                try:
+                    items = await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    if cancellation.cancel():
+                        raise
+                    # 抓取函数已开始写入缓存和源统计，等待写入完成后照常返回结果
+                    items = await future
+                return source, items or []
+            except asyncio.TimeoutError:
+                error = f"抓取超时 ({self.timeout}秒)"
+                future.add_done_callback(lambda _: logger.warning(f"{source.name} 超时后才返回，已取消写入"))
+            except Exception as e:
+                error = str(e)
+
+        logger.error(f"从 {source.name} 获取文章超时或失败: {error}")
+        if on_error:
+            on_error(source, error)
+        return source, []
+
+    def _run_coroutine(self, coroutine):
+        """运行协程；若当前线程已有事件循环在运行，则在独立线程中运行"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        result = {}
+
+        def runner():
+            result['value'] = asyncio.run(coroutine)
+
+        thread = threading.Thread(target=runner, name="feed-fetch-loop")
+        thread.start()
+        thread.join()
+        return result.get('value', [])
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
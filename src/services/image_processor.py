@@ -0,0 +1,245 @@
+"""
+图片转码模块
+把下载的图片解码、按宽度限制缩放并重新编码，通过质量搜索保证文件大小
+符合微信素材限制（封面thumb 64KB、正文image 10MB）。编码在进程池中执行，
+转码结果按源图片内容哈希存入图片存储，与原图一起参与LRU淘汰
+"""
+import atexit
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+from ..core.config import Config
+from ..core.utils import setup_logger, shutdown_executor
+from .image_store import ImageStore, file_digest, get_image_store
+
+logger = setup_logger(__name__)
+
+# 各素材类型的文件大小上限
+MEDIA_BYTE_BUDGETS = {
+    "thumb": 64 * 1024,
+    "image": 10 * 1024 * 1024,
+}
+# 微信素材接口接受的格式：封面只支持JPG
+MEDIA_FORMATS = {
+    "thumb": "JPEG",
+    "image": "JPEG",
+}
+_FORMAT_SUFFIXES = {"JPEG": ".jpg", "WEBP": ".webp"}
+_SOURCE_SUFFIXES = {
+    "thumb": {".jpg", ".jpeg"},
+    "image": {".jpg", ".jpeg", ".png", ".gif", ".bmp"},
+}
+_MIN_QUALITY = 30
+_MAX_QUALITY = 90
+_MIN_WIDTH = 64
+
+
+def _encode(image, image_format: str, quality: int) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def transcode_image(source_path: str, max_width: int, max_bytes: int,
+                    image_format: str = "JPEG") -> Optional[bytes]:
+    """
+    解码、缩放并以不超过大小上限的最高质量重新编码（在工作进程中执行）
+
+    质量在[30, 90]之间二分搜索；最低质量仍超出上限时把尺寸缩小到3/4再搜索
+
+    Args:
+        source_path: 源图片路径
+        max_width: 最大宽度
+        max_bytes: 文件大小上限
+        image_format: 输出格式（JPEG或WEBP）
+
+    Returns:
+        编码后的图片数据，无法满足大小上限时返回None
+    """
+    with Image.open(source_path) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "L"):
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.split()[-1])
+            image = background
+
+    width = min(image.width, max_width)
+    while width >= _MIN_WIDTH:
+        if width != image.width:
+            height = max(1, round(image.height * width / image.width))
+            candidate = image.resize((width, height), Image.LANCZOS)
+        else:
+            candidate = image
+
+        best = None
+        low, high = _MIN_QUALITY, _MAX_QUALITY
+        while low <= high:
+            quality = (low + high) // 2
+            data = _encode(candidate, image_format, quality)
+            if len(data) <= max_bytes:
+                best = data
+                low = quality + 1
+            else:
+                high = quality - 1
+
+        if best is not None:
+            return best
+        width = int(width * 0.75)
+
+    return None
+
+
+class ImageProcessor:
+    """图片转码器（进程池执行，结果按内容哈希缓存，同一变体的并发请求只转码一次）"""
+
+    def __init__(self, store: ImageStore = None, max_workers: int = None):
+        """
+        初始化转码器
+
+        Args:
+            store: 保存转码结果的图片存储，默认使用images目录
+            max_workers: 进程池大小，默认使用IMAGE_PROCESS_WORKERS配置
+        """
+        self._store = store
+        self.max_workers = max_workers or Config.IMAGE_PROCESS_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Pillow是否可用"""
+        return Image is not None
+
+    @property
+    def store(self) -> ImageStore:
+        with self._lock:
+            if self._store is None:
+                self._store = get_image_store()
+            return self._store
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    @staticmethod
+    def fits(source_path: str, media_type: str) -> bool:
+        """源文件格式和大小已满足素材限制时无需转码"""
+        path = Path(source_path)
+        return (
+            path.suffix.lower() in _SOURCE_SUFFIXES.get(media_type, set())
+            and path.stat().st_size <= MEDIA_BYTE_BUDGETS[media_type]
+        )
+
+    def submit(self, source_path: str, media_type: str = "thumb") -> Optional[Future]:
+        """
+        提交转码任务（不等待结果），文章选中后即可调用，让编码与总结并行
+
+        Returns:
+            结果为转码后图片路径的Future；无需转码或Pillow不可用时返回None
+        """
+        if media_type not in MEDIA_BYTE_BUDGETS or not Path(source_path).exists():
+            return None
+        if self.fits(source_path, media_type) or not self.available:
+            return None
+
+        image_format = MEDIA_FORMATS[media_type]
+        max_width = Config.PREFERRED_IMAGE_WIDTH if media_type == "thumb" else Config.MAX_IMAGE_WIDTH
+        key = f"variant:{file_digest(source_path)}:{media_type}:{max_width}:{image_format}"
+
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+
+        result: Future = Future()
+        cached_path = self.store.lookup(key)
+        if cached_path:
+            result.set_result(cached_path)
+            return result
+
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            self._pending[key] = result
+
+        def on_done(task: Future):
+            try:
+                data = task.result()
+                path = self.store.put(key, [data], suffix=_FORMAT_SUFFIXES[image_format]) if data else None
+                result.set_result(path)
+            except Exception as e:
+                result.set_exception(e)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+        self._get_executor().submit(
+            transcode_image, source_path, max_width, MEDIA_BYTE_BUDGETS[media_type], image_format
+        ).add_done_callback(on_done)
+        return result
+
+    def prepare(self, source_path: str, media_type: str = "thumb", timeout: float = 60) -> Optional[str]:
+        """
+        获取符合素材限制的图片路径
+
+        Args:
+            source_path: 源图片路径
+            media_type: 素材类型（thumb或image）
+            timeout: 等待转码的最长时间（秒）
+
+        Returns:
+            可直接上传的图片路径，无法满足限制时返回None
+        """
+        if media_type not in MEDIA_BYTE_BUDGETS:
+            return source_path
+        try:
+            future = self.submit(source_path, media_type)
+            if future is None:
+                if self.fits(source_path, media_type):
+                    return source_path
+                logger.warning(f"Pillow未安装，无法转码超出{media_type}限制的图片: {source_path}")
+                return None
+
+            output_path = future.result(timeout=timeout)
+            if output_path:
+                logger.info(f"图片转码完成({media_type}): {output_path}")
+            else:
+                logger.warning(f"图片无法压缩到{media_type}限制内: {source_path}")
+            return output_path
+        except Exception as e:
+            logger.error(f"图片转码失败 {source_path}: {e}")
+            return None
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        shutdown_executor(executor)
+
+
+_shared_processor: Optional[ImageProcessor] = None
+_shared_processor_lock = threading.Lock()
+
+
+def get_image_processor() -> ImageProcessor:
+    """获取进程内共享的图片转码器"""
+    global _shared_processor
+    with _shared_processor_lock:
+        if _shared_processor is None:
+            _shared_processor = ImageProcessor()
+            atexit.register(_shared_processor.shutdown)
+        return _shared_processor
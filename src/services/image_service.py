@@ -3,14 +3,15 @@
 """
 import os
 import re
-import hashlib
 import requests
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import urlparse, urljoin
 
 from ..core.config import Config
+from ..core.http_client import HttpClient, get_http_client
 from ..core.utils import setup_logger
+from .image_store import ImageStore, get_image_store
 
 logger = setup_logger(__name__)
 
@@ -18,15 +19,17 @@ logger = setup_logger(__name__)
 class ImageDownloader:
     """图片下载器"""
     
-    def __init__(self, download_dir: str = "images"):
+    def __init__(self, download_dir: str = "images", http_client: HttpClient = None):
         """
         初始化图片下载器
         
         Args:
             download_dir: 图片下载目录
+            http_client: 共享HTTP客户端（默认使用进程内共享实例）
         """
+        self.http_client = http_client or get_http_client()
         self.download_dir = Path(download_dir)
-        self.download_dir.mkdir(exist_ok=True)
+        self._store: Optional[ImageStore] = None
         
         # 支持的图片格式
         self.supported_formats = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
@@ -36,6 +39,13 @@ class ImageDownloader:
         
         # 请求超时时间
         self.timeout = 10
+
+    @property
+    def store(self) -> ImageStore:
+        """内容寻址图片存储（首次下载时才打开，只提取URL的获取器不会打开索引）"""
+        if self._store is None:
+            self._store = get_image_store(str(self.download_dir))
+        return self._store
     
     def extract_image_from_content(self, content: str, base_url: str = None) -> Optional[str]:
         """
@@ -84,6 +94,19 @@ class ImageDownloader:
         Returns:
             图片URL或None
         """
+        candidates = self.extract_image_candidates(entry)
+        return candidates[0] if candidates else None
+
+    def extract_image_candidates(self, entry) -> List[str]:
+        """
+        从RSS条目中提取所有有效的候选图片URL（按优先级排序、去重）
+        
+        Args:
+            entry: RSS条目对象
+            
+        Returns:
+            图片URL列表
+        """
         # 尝试从不同字段获取图片
         image_candidates = []
         
@@ -124,21 +147,21 @@ class ImageDownloader:
                     if extracted_url:
                         image_candidates.append(extracted_url)
         
-        # 返回第一个有效的图片URL
+        # 保留有效的图片URL
+        valid_urls = []
         for url in image_candidates:
-            if self._is_valid_image_url(url):
-                logger.debug(f"从RSS条目中提取到图片: {url}")
-                return url
-        
-        return None
+            if self._is_valid_image_url(url) and url not in valid_urls:
+                valid_urls.append(url)
+        if valid_urls:
+            logger.debug(f"从RSS条目中提取到 {len(valid_urls)} 个候选图片: {valid_urls[0]}")
+        return valid_urls
     
-    def download_image(self, image_url: str, filename: str = None) -> Optional[str]:
+    def download_image(self, image_url: str) -> Optional[str]:
         """
-        下载图片
+        下载图片（内容寻址存储，同一URL或相同内容不会重复下载和保存）
         
         Args:
             image_url: 图片URL
-            filename: 自定义文件名（可选）
             
         Returns:
             本地文件路径或None
@@ -148,62 +171,46 @@ class ImageDownloader:
             return None
         
         try:
-            # 生成文件名
-            if not filename:
-                filename = self._generate_filename(image_url)
-            
-            local_path = self.download_dir / filename
-            
-            # 检查文件是否已存在
-            if local_path.exists():
-                logger.debug(f"图片已存在: {local_path}")
-                return str(local_path)
+            # 检查是否已缓存
+            local_path = self.store.lookup(image_url)
+            if local_path:
+                logger.debug(f"图片已缓存: {local_path}")
+                return local_path
             
             # 下载图片
             logger.info(f"开始下载图片: {image_url}")
             
-            proxies = Config.get_proxies()
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(
+            response = self.http_client.get(
                 image_url, 
-                headers=headers, 
-                proxies=proxies, 
                 timeout=self.timeout, 
                 stream=True
             )
-            response.raise_for_status()
-            
-            # 检查内容类型
-            content_type = response.headers.get('content-type', '').lower()
-            if not content_type.startswith('image/'):
-                logger.warning(f"URL返回的不是图片类型: {content_type}")
-                return None
+            # 使用with确保提前返回时连接也能归还连接池
+            with response:
+                response.raise_for_status()
             
-            # 检查文件大小
-            content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > self.max_file_size:
-                logger.warning(f"图片文件过大: {content_length} bytes")
-                return None
+                # 检查内容类型
+                content_type = response.headers.get('content-type', '').lower()
+                if not content_type.startswith('image/'):
+                    logger.warning(f"URL返回的不是图片类型: {content_type}")
+                    return None
             
-            # 保存图片
-            with open(local_path, 'wb') as f:
-                downloaded_size = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        
-                        # 检查下载大小限制
-                        if downloaded_size > self.max_file_size:
-                            logger.warning("图片下载过程中超过大小限制")
-                            local_path.unlink()  # 删除部分下载的文件
-                            return None
+                # 检查文件大小
+                content_length = response.headers.get('content-length')
+                if content_length and int(content_length) > self.max_file_size:
+                    logger.warning(f"图片文件过大: {content_length} bytes")
+                    return None
             
-            logger.info(f"图片下载成功: {local_path} ({downloaded_size} bytes)")
-            return str(local_path)
+                # 保存图片（边下载边计算内容哈希）
+                local_path = self.store.put(
+                    image_url,
+                    response.iter_content(chunk_size=8192),
+                    suffix=self._guess_suffix(image_url, content_type),
+                    max_size=self.max_file_size,
+                )
+                if local_path:
+                    logger.info(f"图片下载成功: {local_path}")
+                return local_path
             
         except requests.exceptions.RequestException as e:
             logger.error(f"下载图片失败 {image_url}: {e}")
@@ -211,7 +218,42 @@ class ImageDownloader:
         except Exception as e:
             logger.error(f"保存图片失败 {image_url}: {e}")
             return None
-    
+
+    def _guess_suffix(self, url: str, content_type: str) -> str:
+        """根据URL扩展名或Content-Type确定文件扩展名"""
+        suffix = Path(urlparse(url).path).suffix.lower()
+        if suffix in self.supported_formats:
+            return suffix
+        subtype = content_type.split(';')[0].split('/')[-1].strip()
+        suffix = f".{subtype}"
+        return suffix if suffix in self.supported_formats else '.jpg'
+
+    def materialize_item_image(self, item) -> bool:
+        """
+        按需下载文章图片：依次尝试候选URL，下载并校验成功后写入本地路径
+        
+        Args:
+            item: RSS条目
+            
+        Returns:
+            文章是否有可用的本地图片
+        """
+        if item.has_local_image():
+            if Path(item.local_image_path).exists():
+                return True
+            # 本地文件已被清理，重新下载
+            item.image_downloaded = False
+
+        for image_url in item.image_candidates or ([item.image_url] if item.image_url else []):
+            local_path = self.download_image(image_url)
+            if local_path:
+                item.set_image_info(image_url, local_path)
+                logger.info(f"文章图片下载成功: {local_path}")
+                return True
+            logger.warning(f"文章图片下载失败: {image_url}")
+
+        return False
+
     def _is_valid_image_url(self, url: str) -> bool:
         """检查是否是有效的图片URL"""
         if not url:
@@ -236,31 +278,9 @@ class ImageDownloader:
         except Exception:
             return False
     
-    def _generate_filename(self, url: str) -> str:
-        """根据URL生成文件名"""
-        try:
-            parsed = urlparse(url)
-            filename = os.path.basename(parsed.path)
-            
-            # 如果没有文件名或扩展名，生成一个
-            if not filename or '.' not in filename:
-                # 使用URL的hash作为文件名
-                url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()[:12]
-                filename = f"image_{url_hash}.jpg"
-            
-            # 清理文件名
-            filename = re.sub(r'[^\w\-_\.]', '_', filename)
-            
-            return filename
-            
-        except Exception:
-            # 生成随机文件名
-            url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()[:12]
-            return f"image_{url_hash}.jpg"
-    
     def cleanup_old_images(self, days: int = 30) -> int:
         """
-        清理旧图片
+        清理旧图片（按索引中的最近访问时间，无需扫描目录）
         
         Args:
             days: 保留天数
@@ -268,26 +288,7 @@ class ImageDownloader:
         Returns:
             删除的文件数量
         """
-        import time
-        
-        if not self.download_dir.exists():
-            return 0
-        
-        current_time = time.time()
-        cutoff_time = current_time - (days * 24 * 60 * 60)
-        deleted_count = 0
-        
-        for file_path in self.download_dir.iterdir():
-            if file_path.is_file():
-                file_mtime = file_path.stat().st_mtime
-                if file_mtime < cutoff_time:
-                    try:
-                        file_path.unlink()
-                        deleted_count += 1
-                        logger.debug(f"删除旧图片: {file_path}")
-                    except Exception as e:
-                        logger.error(f"删除文件失败 {file_path}: {e}")
-        
+        deleted_count = self.store.cleanup(days)
         if deleted_count > 0:
             logger.info(f"清理了 {deleted_count} 个旧图片文件")
         
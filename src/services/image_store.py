@@ -0,0 +1,265 @@
+"""
+内容寻址图片存储模块
+图片按内容SHA-256存放，多个URL指向同一份文件；SQLite索引记录URL映射、
+文件大小和最近访问时间，超出总容量时按LRU淘汰，清理无需扫描目录
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs (last_access);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_urls_digest ON urls (digest);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ImageStore:
+    """内容寻址的图片存储（总容量受限，LRU淘汰）"""
+
+    def __init__(self, store_dir: str = "images", max_bytes: int = None):
+        """
+        初始化图片存储
+
+        Args:
+            store_dir: 存储目录
+            max_bytes: 总容量上限（字节），默认使用IMAGE_CACHE_MAX_MB配置
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else Config.IMAGE_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.store_dir / "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        if not self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            self._import_legacy_files()
+
+    def _blob_path(self, digest: str, suffix: str) -> Path:
+        return self.store_dir / digest[:2] / f"{digest}{suffix}"
+
+    def lookup(self, url: str) -> Optional[str]:
+        """
+        按源URL查找已缓存的图片并刷新访问时间
+
+        Returns:
+            本地文件路径，未缓存或文件已丢失时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT b.digest, b.path FROM urls u JOIN blobs b ON b.digest = u.digest WHERE u.url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            digest, path = row
+            if not Path(path).exists():
+                self._forget(digest)
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            self._conn.commit()
+        return path
+
+    def put(self, url: str, chunks: Iterable[bytes], suffix: str = ".jpg",
+            max_size: int = None) -> Optional[str]:
+        """
+        写入图片内容：边写边计算SHA-256，相同内容只保存一份
+
+        Args:
+            url: 源URL
+            chunks: 图片内容分块
+            suffix: 文件扩展名
+            max_size: 单个文件大小上限，超出时放弃写入
+
+        Returns:
+            本地文件路径，超出大小限制时返回None
+        """
+        tmp_path = self.store_dir / f".tmp-{os.getpid()}-{threading.get_ident()}"
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        logger.warning("图片下载过程中超过大小限制")
+                        return None
+                    sha256.update(chunk)
+                    f.write(chunk)
+            return self._commit_blob(url, sha256.hexdigest(), tmp_path, size, suffix)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _commit_blob(self, url: str, digest: str, tmp_path: Path, size: int, suffix: str) -> str:
+        """登记内容哈希对应的文件（已存在则复用），记录URL映射后按容量淘汰"""
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row is not None and Path(row[0]).exists():
+                path = row[0]
+                logger.debug(f"图片内容已存在，复用: {path}")
+            else:
+                blob_path = self._blob_path(digest, suffix)
+                blob_path.parent.mkdir(exist_ok=True)
+                os.replace(tmp_path, blob_path)
+                path = str(blob_path)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, path, size, last_access) VALUES (?, ?, ?, ?)",
+                (digest, path, size, time.time()),
+            )
+            self._conn.execute("INSERT OR REPLACE INTO urls (url, digest) VALUES (?, ?)", (url, digest))
+            self._conn.commit()
+            self._evict(keep=digest)
+        return path
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _evict(self, keep: str = None):
+        """总容量超出上限时，按最近访问时间从旧到新淘汰"""
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            excess = self.total_bytes() - self.max_bytes
+            if excess <= 0:
+                return
+            evicted = 0
+            for digest, size in self._conn.execute(
+                "SELECT digest, size FROM blobs ORDER BY last_access"
+            ).fetchall():
+                if excess <= 0:
+                    break
+                if digest == keep:
+                    continue
+                self._forget(digest)
+                excess -= size
+                evicted += 1
+            self._conn.commit()
+        if evicted:
+            logger.info(f"图片缓存超出容量上限，淘汰了 {evicted} 个最久未使用的图片")
+
+    def _forget(self, digest: str):
+        """删除图片文件及其索引记录（不提交事务）"""
+        row = self._conn.execute("SELECT path FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            try:
+                Path(row[0]).unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"删除图片失败 {row[0]}: {e}")
+        self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        self._conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+
+    def cleanup(self, days: int) -> int:
+        """
+        删除超过指定天数未访问的图片（按索引查询，不扫描目录）
+
+        Returns:
+            删除的文件数量
+        """
+        cutoff = time.time() - days * 24 * 60 * 60
+        with self._lock:
+            digests = [
+                row[0] for row in self._conn.execute(
+                    "SELECT digest FROM blobs WHERE last_access < ?", (cutoff,)
+                ).fetchall()
+            ]
+            for digest in digests:
+                self._forget(digest)
+            self._conn.commit()
+        return len(digests)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取存储统计"""
+        with self._lock:
+            files, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        return {"files": files, "urls": urls, "total_bytes": total, "max_bytes": self.max_bytes}
+
+    def _import_legacy_files(self):
+        """把旧版按 {title_hash}_{文件名} 存放的图片一次性并入内容寻址存储"""
+        imported = 0
+        for file_path in self.store_dir.iterdir():
+            if not file_path.is_file() or file_path.name.startswith(("index.db", ".tmp-")):
+                continue
+            try:
+                digest = file_digest(file_path)
+                blob_path = self._blob_path(digest, file_path.suffix or ".jpg")
+                blob_path.parent.mkdir(exist_ok=True)
+                last_access = file_path.stat().st_mtime
+                size = file_path.stat().st_size
+                if blob_path.exists():
+                    file_path.unlink()
+                else:
+                    os.replace(file_path, blob_path)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, path, size, last_access) VALUES (?, ?, ?, ?)",
+                    (digest, str(blob_path), size, last_access),
+                )
+                imported += 1
+            except OSError as e:
+                logger.error(f"导入旧图片失败 {file_path}: {e}")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(time.time()),)
+        )
+        self._conn.commit()
+        if imported:
+            logger.info(f"已将 {imported} 个旧图片并入内容寻址存储")
+        self._evict()
+
+    def close(self):
+        with _shared_stores_lock:
+            if _shared_stores.get(str(self.store_dir.resolve())) is self:
+                del _shared_stores[str(self.store_dir.resolve())]
+        with self._lock:
+            self._conn.close()
+
+
+_shared_stores: Dict[str, ImageStore] = {}
+_shared_stores_lock = threading.Lock()
+
+
+def get_image_store(store_dir: str = "images") -> ImageStore:
+    """获取进程内共享的图片存储（同一目录只打开一个索引，图片下载器和转码器共用）"""
+    key = str(Path(store_dir).resolve())
+    with _shared_stores_lock:
+        if key not in _shared_stores:
+            _shared_stores[key] = ImageStore(store_dir)
+        return _shared_stores[key]
+
+
+def file_digest(path) -> str:
+    """文件内容的SHA-256（分块读取）"""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,152 @@
+"""
+LLM响应缓存模块
+按 (模型, 系统角色, 提示词, max_tokens, temperature, 发送源) 的哈希持久化模型输出，
+发送失败重试或进程重启后相同的请求直接复用结果；支持过期时间和按LRU淘汰的容量上限
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+
+def make_cache_key(model: str, system_role: str, prompt: str, max_tokens: int,
+                   temperature: float, sender_type: str = None) -> str:
+    """请求参数的SHA-256，作为缓存键"""
+    payload = json.dumps(
+        [model, system_role, prompt, max_tokens, temperature, sender_type or ""],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """磁盘持久化的LLM响应缓存"""
+
+    def __init__(self, db_path: str = "cache/llm_responses.db", ttl_seconds: int = None,
+                 max_bytes: int = None):
+        """
+        初始化响应缓存
+
+        Args:
+            db_path: 缓存数据库路径
+            ttl_seconds: 缓存有效期（秒），默认使用LLM_CACHE_TTL_HOURS配置，0表示不过期
+            max_bytes: 缓存内容总大小上限（字节），默认使用LLM_CACHE_MAX_MB配置，0表示不限
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.LLM_CACHE_TTL_HOURS * 3600
+        self.max_bytes = max_bytes if max_bytes is not None else Config.LLM_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """查找缓存的响应，过期记录视为未命中并删除"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, content: str, model: str = ""):
+        """保存响应并按容量淘汰最久未使用的记录"""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now, now),
+            )
+            self._evict(keep=key)
+            self._conn.commit()
+
+    def _evict(self, keep: str):
+        """总大小超出上限时按最近访问时间从旧到新删除（调用方持有锁）"""
+        if self.max_bytes <= 0:
+            return
+        excess = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if excess <= 0:
+                break
+            if key == keep:
+                continue
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            excess -= size
+            evicted += 1
+        if evicted:
+            logger.info(f"LLM响应缓存超出容量上限，淘汰了 {evicted} 条最久未使用的记录")
+
+    def cleanup(self) -> int:
+        """
+        删除过期记录
+
+        Returns:
+            删除的记录数
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取缓存统计"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "total_bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
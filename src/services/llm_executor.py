@@ -0,0 +1,258 @@
+"""
+LLM并发执行模块
+线程池并发执行模型请求，用令牌桶同时限制每分钟请求数和每分钟token数；
+按response.usage校正token消耗，收到429时按Retry-After暂停所有请求后重试
+"""
+import atexit
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+import openai
+
+from ..core.config import Config
+from ..core.utils import setup_logger, shutdown_executor
+
+logger = setup_logger(__name__)
+
+# 可重试的网络/服务端错误（429单独处理）
+_RETRYABLE_ERRORS = (openai.APIConnectionError, openai.InternalServerError)
+
+
+class TokenBucket:
+    """令牌桶：按固定速率补充，容量为一分钟的额度"""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        """
+        Args:
+            rate_per_minute: 每分钟补充的令牌数，0表示不限
+            capacity: 桶容量，默认等于每分钟额度
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1, timeout: float = None) -> bool:
+        """
+        取出令牌，不足时阻塞等待
+
+        Args:
+            amount: 令牌数（超过容量时按容量计）
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            是否取到令牌
+        """
+        if self.rate <= 0:
+            return True
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return True
+                wait = (amount - self._tokens) / self.rate
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def adjust(self, delta: float):
+        """校正令牌数：正数退还多扣的令牌，负数补扣（允许透支，之后的请求等待补足）"""
+        if self.rate <= 0 or not delta:
+            return
+        with self._cond:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + delta)
+            self._cond.notify_all()
+
+    @property
+    def available(self) -> float:
+        with self._cond:
+            self._refill()
+            return self._tokens
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """从429响应的Retry-After（秒数或HTTP日期）/retry-after-ms头读取等待时间"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMExecutor:
+    """带速率限制的LLM请求执行器"""
+
+    def __init__(self, max_workers: int = None, requests_per_minute: int = None,
+                 tokens_per_minute: int = None, max_retries: int = None):
+        """
+        初始化执行器
+
+        Args:
+            max_workers: 并发请求数，默认使用LLM_MAX_CONCURRENCY配置
+            requests_per_minute: 每分钟请求数上限，默认使用LLM_REQUESTS_PER_MINUTE配置，0表示不限
+            tokens_per_minute: 每分钟token数上限，默认使用LLM_TOKENS_PER_MINUTE配置，0表示不限
+            max_retries: 429和网络错误的最大重试次数，默认使用LLM_MAX_RETRIES配置
+        """
+        self.max_workers = max(1, max_workers or Config.LLM_MAX_CONCURRENCY)
+        self.request_bucket = TokenBucket(
+            Config.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        )
+        self.token_bucket = TokenBucket(
+            Config.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        )
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm")
+            return self._pool
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """在线程池中执行（fn内部的请求应通过call发出以遵守速率限制）"""
+        return self._get_pool().submit(fn, *args, **kwargs)
+
+    def map(self, fn: Callable, items: Iterable) -> List:
+        """并发执行并按输入顺序返回结果（不要在线程池内部调用）"""
+        return list(self._get_pool().map(fn, items))
+
+    def _pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _wait_if_paused(self):
+        while True:
+            with self._lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def call(self, request: Callable, estimated_tokens: int = 0):
+        """
+        在速率限制下执行一次请求
+
+        Args:
+            request: 发出请求并返回响应的函数
+            estimated_tokens: 预估token数（输入+max_tokens），请求前从token桶扣除，完成后按usage校正
+
+        Returns:
+            请求的响应
+        """
+        for attempt in range(self.max_retries + 1):
+            self._wait_if_paused()
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(estimated_tokens)
+            try:
+                response = request()
+            except openai.RateLimitError as e:
+                self.token_bucket.adjust(estimated_tokens)
+                delay = retry_after_seconds(e)
+                delay = 2 ** attempt if delay is None else delay
+                with self._lock:
+                    self.stats["rate_limited"] += 1
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"LLM请求被限流(429)，{delay:.1f}秒后重试 (尝试 {attempt + 1}/{self.max_retries + 1})")
+                # 限流针对整个账号，暂停所有并发请求
+                self._pause(delay)
+                self._count_retry()
+                continue
+            except _RETRYABLE_ERRORS as e:
+                self.token_bucket.adjust(estimated_tokens)
+                if attempt >= self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"LLM请求失败，{delay}秒后重试 (尝试 {attempt + 1}/{self.max_retries + 1}): {e}")
+                time.sleep(delay)
+                self._count_retry()
+                continue
+
+            self._account(response, estimated_tokens)
+            return response
+
+    def _count_retry(self):
+        with self._lock:
+            self.stats["retries"] += 1
+
+    def _account(self, response, estimated_tokens: int):
+        """按实际用量校正token桶并累计统计"""
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        with self._lock:
+            self.stats["requests"] += 1
+            if isinstance(prompt_tokens, int) and isinstance(completion_tokens, int):
+                self.stats["prompt_tokens"] += prompt_tokens
+                self.stats["completion_tokens"] += completion_tokens
+        if isinstance(prompt_tokens, int) and isinstance(completion_tokens, int):
+            self.token_bucket.adjust(estimated_tokens - prompt_tokens - completion_tokens)
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["max_workers"] = self.max_workers
+        stats["available_requests"] = round(self.request_bucket.available, 1)
+        stats["available_tokens"] = round(self.token_bucket.available)
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        shutdown_executor(pool)
+
+
+_shared_executor: Optional[LLMExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> LLMExecutor:
+    """获取进程内共享的LLM执行器（速率限制按API账号计，需全局共享）"""
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = LLMExecutor()
+            atexit.register(_shared_executor.shutdown)
+        return _shared_executor
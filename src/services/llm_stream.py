@@ -0,0 +1,178 @@
+"""
+LLM流式输出模块
+逐块读取模型输出，记录首token延迟（TTFT）和生成速度；输出尚未结束时检查结构，
+明显异常（缺少必需的段落标记、不是中文、同一行反复重复）时立即中止，不必等待完整响应
+"""
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, Optional
+
+import numpy as np
+
+from ..core.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+# 各发送源输出中必须出现的标记及其最晚出现位置（字符数）
+REQUIRED_MARKERS = {
+    "wechat_official": (("[TITLE]", 200), ("[CONTENT]", 500)),
+}
+# 检查中文比例所需的最少字符数，及中文字符的最低比例
+_LANGUAGE_CHECK_CHARS = 200
+_MIN_CJK_RATIO = 0.1
+# 同一行连续重复的次数上限
+_MAX_REPEATED_LINES = 4
+
+
+class MalformedOutputError(Exception):
+    """流式输出结构异常，已中止请求"""
+
+    def __init__(self, reason: str, ttft: Optional[float] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.ttft = ttft
+
+
+class StreamValidator:
+    """边接收边检查输出结构"""
+
+    def __init__(self, sender_type: str = None):
+        self.markers = REQUIRED_MARKERS.get(sender_type, ())
+        self._language_checked = False
+
+    def check(self, text: str) -> Optional[str]:
+        """
+        检查目前收到的输出
+
+        Returns:
+            异常原因，输出正常时返回None
+        """
+        for marker, deadline in self.markers:
+            if len(text) >= deadline and marker not in text[:deadline + len(marker)]:
+                return f"前{deadline}字内缺少{marker}标记"
+
+        if not self._language_checked and len(text) >= _LANGUAGE_CHECK_CHARS:
+            self._language_checked = True
+            head = text[:_LANGUAGE_CHECK_CHARS]
+            if len(_CJK_RE.findall(head)) < _MIN_CJK_RATIO * len(head):
+                return "输出不是中文"
+
+        if text.endswith("\n"):
+            lines = [line.strip() for line in text[-2000:].splitlines() if line.strip()]
+            tail = lines[-_MAX_REPEATED_LINES:]
+            if len(tail) == _MAX_REPEATED_LINES and len(set(tail)) == 1:
+                return f"同一行连续重复{_MAX_REPEATED_LINES}次"
+        return None
+
+
+class StreamResult:
+    """一次流式调用的结果"""
+
+    def __init__(self, text: str, usage=None, ttft: Optional[float] = None,
+                 tokens_per_second: Optional[float] = None, elapsed: float = 0.0):
+        self.text = text
+        self.usage = usage  # 最后一个数据块中的用量（供执行器校正token桶）
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.elapsed = elapsed
+
+
+def consume_stream(stream: Iterable, started: float, validator: StreamValidator = None,
+                   estimate_tokens=None) -> StreamResult:
+    """
+    读取流式响应
+
+    Args:
+        stream: chat.completions.create(stream=True)返回的数据块迭代器
+        started: 发出请求的时间（time.monotonic()）
+        validator: 结构检查器，为None时不检查
+        estimate_tokens: 响应中没有用量时估算输出token数的函数
+
+    Returns:
+        StreamResult
+
+    Raises:
+        MalformedOutputError: 结构检查失败（已关闭连接）
+    """
+    text = ""
+    usage = None
+    first_token_at = None
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if first_token_at is None:
+            first_token_at = time.monotonic()
+        text += delta
+        if validator is not None:
+            reason = validator.check(text)
+            if reason:
+                close = getattr(stream, "close", None)
+                if callable(close):
+                    close()
+                raise MalformedOutputError(reason, ttft=first_token_at - started)
+
+    finished = time.monotonic()
+    ttft = first_token_at - started if first_token_at is not None else None
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if not isinstance(completion_tokens, int) and estimate_tokens is not None:
+        completion_tokens = estimate_tokens(text) if text else 0
+    generation_time = finished - first_token_at if first_token_at is not None else 0
+    tokens_per_second = (
+        completion_tokens / generation_time if isinstance(completion_tokens, int) and generation_time > 0 else None
+    )
+    return StreamResult(text, usage, ttft, tokens_per_second, finished - started)
+
+
+class LatencyRecorder:
+    """按发送源记录流式调用的延迟分布（保留最近window次）"""
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._ttft: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._tokens_per_second: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "aborted": 0})
+
+    def record(self, sender_type: str, ttft: Optional[float], tokens_per_second: Optional[float] = None,
+               aborted: bool = False):
+        sender_type = sender_type or "default"
+        with self._lock:
+            self._counts[sender_type]["calls"] += 1
+            if aborted:
+                self._counts[sender_type]["aborted"] += 1
+            if ttft is not None:
+                self._ttft[sender_type].append(ttft)
+            if tokens_per_second is not None:
+                self._tokens_per_second[sender_type].append(tokens_per_second)
+
+    @staticmethod
+    def _percentiles(values, prefix: str) -> Dict[str, float]:
+        if not values:
+            return {}
+        p50, p90, p99 = np.percentile(np.fromiter(values, dtype=float), [50, 90, 99])
+        return {
+            f"{prefix}_p50": round(float(p50), 3),
+            f"{prefix}_p90": round(float(p90), 3),
+            f"{prefix}_p99": round(float(p99), 3),
+        }
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            {发送源: {calls, aborted, ttft_p50/p90/p99（秒）, tokens_per_second_p50/p90/p99}}
+        """
+        with self._lock:
+            stats = {}
+            for sender_type, counts in self._counts.items():
+                entry = dict(counts)
+                entry.update(self._percentiles(self._ttft[sender_type], "ttft"))
+                entry.update(self._percentiles(self._tokens_per_second[sender_type], "tokens_per_second"))
+                stats[sender_type] = entry
+            return stats
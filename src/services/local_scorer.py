@@ -0,0 +1,246 @@
+"""
+本地评分模型模块
+用历史模型评分蒸馏出的轻量线性模型：标题、正文和源名称经特征哈希（hashing trick）映射到固定维度的稀疏向量，
+岭回归（共轭梯度求解，纯NumPy）拟合评分；置信度按留出集误差和特征覆盖率估计，
+只有足够确定是否达到发送门槛的预测才直接采用，其余交给模型评分
+"""
+import html
+import io
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+from .rss_service import RSSItem
+
+logger = setup_logger(__name__)
+
+DEFAULT_FEATURES = 2 ** 18
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+# 正文只取开头部分，与评分提示词的输入长度一致
+_MAX_CONTENT_CHARS = 500
+
+
+def _tokens(text: str) -> List[str]:
+    """英文取单词及相邻词对，中文取单字及相邻字对"""
+    tokens = []
+    words = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if run.isascii():
+            words.append(run)
+            continue
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(words)
+    tokens.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return tokens
+
+
+def extract_features(item: RSSItem, n_features: int = DEFAULT_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把文章映射为哈希特征
+
+    Returns:
+        (特征下标, 特征值)，特征值为对数词频并做L2归一化
+    """
+    content = html.unescape(_TAG_RE.sub(" ", item.description or ""))[:_MAX_CONTENT_CHARS]
+    counts = Counter()
+    counts.update(f"t:{token}" for token in _tokens(item.title or ""))
+    counts.update(f"d:{token}" for token in _tokens(content))
+    if item.source_name:
+        counts[f"s:{item.source_name.lower()}"] += 1
+
+    features: Dict[int, float] = {}
+    for feature, count in counts.items():
+        digest = zlib.crc32(feature.encode("utf-8"))
+        index = digest % n_features
+        sign = 1.0 if digest & 0x80000000 else -1.0  # 符号哈希抵消冲突带来的偏差
+        features[index] = features.get(index, 0.0) + sign * (1.0 + math.log(count))
+    if not features:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+    indices = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+    values = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+    norm = np.linalg.norm(values)
+    if norm > 0:
+        values /= norm
+    return indices, values
+
+
+class _SparseMatrix:
+    """按行存储的稀疏矩阵（CSR），只实现训练需要的两种乘法"""
+
+    def __init__(self, rows: Sequence[Tuple[np.ndarray, np.ndarray]], n_features: int):
+        self.n_features = n_features
+        self.row_lengths = np.array([len(indices) for indices, _ in rows], dtype=np.int64)
+        self.indices = np.concatenate([indices for indices, _ in rows]) if rows else np.zeros(0, dtype=np.int64)
+        self.values = np.concatenate([values for _, values in rows]) if rows else np.zeros(0)
+        self.row_ids = np.repeat(np.arange(len(rows)), self.row_lengths)
+        self.n_rows = len(rows)
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        """X @ w"""
+        return np.bincount(self.row_ids, weights=self.values * weights[self.indices], minlength=self.n_rows)
+
+    def tdot(self, vector: np.ndarray) -> np.ndarray:
+        """X.T @ v"""
+        return np.bincount(self.indices, weights=self.values * vector[self.row_ids], minlength=self.n_features)
+
+
+def _ridge(matrix: _SparseMatrix, targets: np.ndarray, alpha: float,
+           max_iter: int = 200, tol: float = 1e-6) -> np.ndarray:
+    """共轭梯度法求解 (X.T X + alpha I) w = X.T y"""
+    weights = np.zeros(matrix.n_features)
+    residual = matrix.tdot(targets)
+    direction = residual.copy()
+    residual_norm = residual @ residual
+    threshold = tol * tol * max(residual_norm, 1e-12)
+    for _ in range(max_iter):
+        if residual_norm <= threshold:
+            break
+        projected = matrix.tdot(matrix.dot(direction)) + alpha * direction
+        step = residual_norm / (direction @ projected)
+        weights += step * direction
+        residual -= step * projected
+        new_norm = residual @ residual
+        direction = residual + (new_norm / residual_norm) * direction
+        residual_norm = new_norm
+    return weights
+
+
+class LocalScorer:
+    """本地评分模型"""
+
+    def __init__(self, weights: np.ndarray, intercept: float, rmse: float, seen: np.ndarray,
+                 trained_samples: int = 0):
+        """
+        Args:
+            weights: 各哈希特征的权重
+            intercept: 截距（训练集平均评分）
+            rmse: 留出集上的均方根误差，用于估计置信度
+            seen: 训练集中出现过的特征（布尔数组）
+            trained_samples: 训练样本数
+        """
+        self.weights = weights.astype(np.float32)
+        self.intercept = float(intercept)
+        self.rmse = max(float(rmse), 0.1)
+        self.seen = seen.astype(bool)
+        self.trained_samples = int(trained_samples)
+        self.n_features = len(self.weights)
+
+    @classmethod
+    def train(cls, items: Sequence[RSSItem], n_features: int = DEFAULT_FEATURES, alpha: float = 1.0,
+              holdout_ratio: float = 0.2, seed: int = 42) -> Tuple["LocalScorer", Dict[str, float]]:
+        """
+        用已有评分训练模型：先在留出集上评估误差，再用全部样本重新拟合
+
+        Args:
+            items: 带quality_score的文章
+            n_features: 哈希特征维度
+            alpha: L2正则系数
+            holdout_ratio: 留出集比例
+
+        Returns:
+            (模型, 留出集评估指标)
+        """
+        rows = [extract_features(item, n_features) for item in items]
+        targets = np.array([item.quality_score for item in items], dtype=np.float64)
+        if len(rows) < 2:
+            raise ValueError("训练样本不足")
+
+        order = np.random.default_rng(seed).permutation(len(rows))
+        holdout_size = min(max(1, int(len(rows) * holdout_ratio)), len(rows) - 1)
+        holdout, train = order[:holdout_size], order[holdout_size:]
+
+        probe = cls._fit([rows[i] for i in train], targets[train], n_features, alpha, 0.0)
+        holdout_matrix = _SparseMatrix([rows[i] for i in holdout], n_features)
+        predictions = holdout_matrix.dot(probe.weights.astype(np.float64)) + probe.intercept
+        errors = predictions - targets[holdout]
+        rmse = float(np.sqrt(np.mean(errors ** 2)))
+
+        model = cls._fit(rows, targets, n_features, alpha, rmse)
+        min_score = Config.MIN_QUALITY_SCORE
+        metrics = {
+            "samples": len(rows),
+            "holdout": int(holdout_size),
+            "rmse": rmse,
+            "mae": float(np.mean(np.abs(errors))),
+            # 是否达到发送门槛的判断与模型评分一致的比例
+            "decision_agreement": float(np.mean(
+                (np.round(predictions) >= min_score) == (targets[holdout] >= min_score)
+            )),
+        }
+        return model, metrics
+
+    @classmethod
+    def _fit(cls, rows, targets: np.ndarray, n_features: int, alpha: float, rmse: float) -> "LocalScorer":
+        matrix = _SparseMatrix(rows, n_features)
+        intercept = float(targets.mean())
+        weights = _ridge(matrix, targets - intercept, alpha)
+        seen = np.zeros(n_features, dtype=bool)
+        seen[matrix.indices] = True
+        return cls(weights, intercept, rmse, seen, trained_samples=len(rows))
+
+    def predict(self, item: RSSItem) -> Tuple[float, float]:
+        """
+        预测评分
+
+        Returns:
+            (评分, 置信度)。置信度为真实评分与预测落在发送门槛同一侧的估计概率，
+            文章特征在训练集中出现得越少，误差估计越大
+        """
+        indices, values = extract_features(item, self.n_features)
+        score = self.intercept + float(values @ self.weights[indices]) if len(indices) else self.intercept
+        score = min(10.0, max(0.0, score))
+
+        coverage = float(values[self.seen[indices]] @ values[self.seen[indices]]) if len(indices) else 0.0
+        sigma = self.rmse / max(coverage, 0.1)
+        margin = abs(score - (Config.MIN_QUALITY_SCORE - 0.5))
+        confidence = 0.5 * (1.0 + math.erf(margin / (sigma * math.sqrt(2))))
+        return score, confidence
+
+    def save(self, path: str):
+        """保存为压缩的.npz文件（写入临时文件后替换）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            weights=self.weights,
+            seen=np.packbits(self.seen),
+            meta=np.array([self.intercept, self.rmse, self.trained_samples, self.n_features]),
+        )
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalScorer":
+        with np.load(path) as data:
+            intercept, rmse, trained_samples, n_features = data["meta"]
+            seen = np.unpackbits(data["seen"])[:int(n_features)]
+            return cls(data["weights"], intercept, rmse, seen, trained_samples=int(trained_samples))
+
+
+def load_local_scorer(path: str = None) -> Optional[LocalScorer]:
+    """加载本地评分模型，未启用或模型文件不存在时返回None"""
+    if not Config.LOCAL_SCORER_ENABLED:
+        return None
+    path = path or Config.LOCAL_SCORER_PATH
+    if not Path(path).exists():
+        return None
+    try:
+        model = LocalScorer.load(path)
+    except Exception as e:
+        logger.error(f"加载本地评分模型失败 {path}: {e}")
+        return None
+    logger.info(f"已加载本地评分模型: {path}（训练样本 {model.trained_samples}，留出集误差 {model.rmse:.2f}）")
+    return model
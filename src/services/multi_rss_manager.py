@@ -2,17 +2,28 @@
 多RSS源管理器
 支持配置和管理多个RSS源，提供统一的文章获取接口
 """
+import json
+import os
 from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Optional, Set
-from concurrent.futures import ThreadPoolExecutor
 import threading
+import weakref
 
 from ..core.config import Config
 from ..core.utils import setup_logger
+from .article_store import get_shared_cache
+from .feed_fetch_engine import AsyncFeedFetchEngine, FetchCancellation
+from .near_duplicate import NearDuplicateIndex, get_near_duplicate_index
 from .rss_service import RSSFetcher, RSSItem
+from .send_queue import SendQueue
 
 logger = setup_logger(__name__)
 
+# 已注册聚类观察者的文章存储（同一存储上的多个管理器共用同一个近似重复索引，只需一个观察者）
+_cluster_observed_caches: "weakref.WeakSet" = weakref.WeakSet()
+_cluster_observed_caches_lock = threading.Lock()
+
 
 class RSSSource:
     """RSS源配置类"""
@@ -27,6 +38,16 @@ class RSSSource:
         self.success_count = 0
         self.error_count = 0
         
+        # 条件请求状态（ETag/Last-Modified）及命中统计
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.conditional_request_count = 0  # 发送了条件请求头的次数
+        self.not_modified_count = 0  # 返回304的次数
+        
+        # 高水位线（已处理的最新条目时间和guid）
+        self.watermark_published: Optional[datetime] = None
+        self.watermark_guids: List[str] = []
+        
     def _extract_domain_name(self, url: str) -> str:
         """从URL提取域名作为名称"""
         try:
@@ -58,6 +79,42 @@ class RSSSource:
             return 1.0
         return self.success_count / total
     
+    def record_conditional_result(self, sent_conditional: bool, not_modified: bool,
+                                  etag: Optional[str], last_modified: Optional[str]):
+        """记录一次条件请求的结果并保存最新的校验信息"""
+        if sent_conditional:
+            self.conditional_request_count += 1
+            if not_modified:
+                self.not_modified_count += 1
+        self.etag = etag
+        self.last_modified = last_modified
+    
+    def record_watermark(self, published: Optional[datetime], guids: Set[str]):
+        """记录获取器推进后的高水位线"""
+        self.watermark_published = published
+        self.watermark_guids = sorted(guids)
+    
+    def get_not_modified_rate(self) -> float:
+        """获取条件请求命中率（304占比）"""
+        if self.conditional_request_count == 0:
+            return 0.0
+        return self.not_modified_count / self.conditional_request_count
+    
+    def load_state(self, state: Dict):
+        """从持久化状态恢复统计和条件请求信息"""
+        if state.get('last_fetch_time'):
+            self.last_fetch_time = datetime.fromisoformat(state['last_fetch_time'])
+        self.last_error = state.get('last_error')
+        self.success_count = state.get('success_count', 0)
+        self.error_count = state.get('error_count', 0)
+        self.etag = state.get('etag')
+        self.last_modified = state.get('last_modified')
+        self.conditional_request_count = state.get('conditional_request_count', 0)
+        self.not_modified_count = state.get('not_modified_count', 0)
+        if state.get('watermark_published'):
+            self.watermark_published = datetime.fromisoformat(state['watermark_published'])
+        self.watermark_guids = state.get('watermark_guids', [])
+    
     def to_dict(self) -> Dict:
         """转换为字典"""
         return {
@@ -69,16 +126,78 @@ class RSSSource:
             'last_error': self.last_error,
             'success_count': self.success_count,
             'error_count': self.error_count,
-            'success_rate': self.get_success_rate()
+            'success_rate': self.get_success_rate(),
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'conditional_request_count': self.conditional_request_count,
+            'not_modified_count': self.not_modified_count,
+            'not_modified_rate': self.get_not_modified_rate(),
+            'watermark_published': self.watermark_published.isoformat() if self.watermark_published else None,
+            'watermark_guids': self.watermark_guids
         }
 
 
+class RSSSourceStateStore:
+    """RSS源状态持久化（统计信息和ETag/Last-Modified），重启后可继续使用条件请求"""
+    
+    def __init__(self, state_file: str = "cache/rss_sources.json"):
+        self.state_file = Path(state_file)
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def load(self) -> Dict[str, Dict]:
+        """加载所有源的状态，按URL索引"""
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("sources", {})
+        except Exception as e:
+            logger.error(f"加载RSS源状态失败 {self.state_file}: {e}")
+            return {}
+    
+    def save(self, sources: List[RSSSource]):
+        """保存所有源的状态（先写临时文件再替换，避免写入中断导致文件损坏）"""
+        data = {
+            "sources": {source.url: source.to_dict() for source in sources},
+            "updated_at": datetime.now().isoformat(),
+        }
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with self._lock:
+            try:
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.state_file)
+            except Exception as e:
+                logger.error(f"保存RSS源状态失败 {self.state_file}: {e}")
+
+
 class MultiRSSManager:
     """多RSS源管理器"""
     
-    def __init__(self):
+    def __init__(self, cache=None):
+        """
+        初始化多RSS源管理器
+
+        Args:
+            cache: 文章存储，默认使用进程内共享的存储
+        """
         self.sources: List[RSSSource] = []
         self.fetchers: Dict[str, RSSFetcher] = {}
+        self._cache = cache if cache is not None else get_shared_cache()
+        # 近似重复索引与文章存储放在同一目录，进程内共享；每个文章存储只注册一个聚类观察者
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+        if Config.NEAR_DUPLICATE_ENABLED:
+            self.near_duplicates = get_near_duplicate_index(
+                str(Path(self._cache.cache_dir) / "near_duplicates.db")
+            )
+            with _cluster_observed_caches_lock:
+                if self._cache not in _cluster_observed_caches:
+                    _cluster_observed_caches.add(self._cache)
+                    self._cache.add_state_observer(self._on_article_state_change)
+        self.state_store = RSSSourceStateStore()
+        self._fetch_engine: Optional[AsyncFeedFetchEngine] = None
         self._load_sources()
         self._lock = threading.Lock()
     
@@ -90,19 +209,32 @@ class MultiRSSManager:
             logger.warning("没有配置RSS源")
             return
         
+        saved_states = self.state_store.load()
+        
         for i, url in enumerate(urls):
             source = RSSSource(
                 url=url,
                 priority=i + 1,  # 配置顺序决定优先级
                 enabled=True
             )
+            if url in saved_states:
+                source.load_state(saved_states[url])
             self.sources.append(source)
-            self.fetchers[url] = RSSFetcher(url)
+            self.fetchers[url] = self._create_fetcher(source)
         
         logger.info(f"加载了 {len(self.sources)} 个RSS源")
         for source in self.sources:
             logger.info(f"  - {source.name}: {source.url}")
     
+    def _create_fetcher(self, source: RSSSource) -> RSSFetcher:
+        """创建RSS获取器，并恢复源上保存的条件请求校验信息"""
+        fetcher = RSSFetcher(source.url, cache=self._cache)
+        fetcher.etag = source.etag
+        fetcher.last_modified = source.last_modified
+        fetcher.watermark_published = source.watermark_published
+        fetcher.watermark_guids = set(source.watermark_guids)
+        return fetcher
+    
     @property
     def rss_sources(self) -> List[RSSSource]:
         """获取所有RSS源列表"""
@@ -110,10 +242,12 @@ class MultiRSSManager:
     
     @property
     def cache(self):
-        """获取缓存对象（使用第一个fetcher的缓存）"""
-        if self.fetchers:
-            return next(iter(self.fetchers.values())).cache
-        return None
+        """获取所有RSS源共用的文章存储"""
+        return self._cache
+
+    def flush_cache(self):
+        """将文章存储中尚未落盘的变更写入磁盘"""
+        self._cache.flush()
     
     def add_source(self, url: str, name: str = None, priority: int = None) -> bool:
         """
@@ -137,7 +271,7 @@ class MultiRSSManager:
         
         source = RSSSource(url=url, name=name, priority=priority)
         self.sources.append(source)
-        self.fetchers[url] = RSSFetcher(url)
+        self.fetchers[url] = self._create_fetcher(source)
         
         logger.info(f"添加RSS源: {source.name} ({url})")
         return True
@@ -185,13 +319,16 @@ class MultiRSSManager:
         """获取启用的RSS源"""
         return [source for source in self.sources if source.enabled]
     
-    def fetch_from_source(self, source: RSSSource, since_minutes: int = None) -> List[RSSItem]:
+    def fetch_from_source(self, source: RSSSource, since_minutes: int = None,
+                          timeout: float = 30, cancellation: FetchCancellation = None) -> List[RSSItem]:
         """
         从单个RSS源获取文章
         
         Args:
             source: RSS源
             since_minutes: 获取多少分钟内的文章
+            timeout: HTTP请求超时（秒）
+            cancellation: 抓取引擎的取消标记，超时取消后不再写入缓存和源统计
             
         Returns:
             文章列表
@@ -201,7 +338,18 @@ class MultiRSSManager:
         
         try:
             fetcher = self.fetchers[source.url]
-            items = fetcher.fetch_latest_items(since_minutes=since_minutes, enable_dedup=True)
+            sent_conditional = bool(fetcher.etag or fetcher.last_modified)
+            items = fetcher.fetch_latest_items(
+                since_minutes=since_minutes, enable_dedup=True, timeout=timeout, cancellation=cancellation
+            )
+            # 超时已由引擎记为错误，不再记录成功
+            if cancellation is not None and not cancellation.commit():
+                return []
+            source.record_conditional_result(
+                sent_conditional, fetcher.last_not_modified,
+                fetcher.etag, fetcher.last_modified
+            )
+            source.record_watermark(fetcher.watermark_published, fetcher.watermark_guids)
             
             # 给文章添加源信息
             for item in items:
@@ -209,22 +357,27 @@ class MultiRSSManager:
                 item.source_url = source.url
             
             source.mark_success()
-            logger.info(f"从 {source.name} 获取到 {len(items)} 篇文章")
+            if fetcher.last_not_modified:
+                logger.info(f"{source.name} 内容未更新 (304命中率: {source.get_not_modified_rate():.0%})")
+            else:
+                logger.info(f"从 {source.name} 获取到 {len(items)} 篇文章")
             return items
             
         except Exception as e:
+            if cancellation is not None and not cancellation.commit():
+                return []
             error_msg = str(e)
             source.mark_error(error_msg)
             logger.error(f"从 {source.name} 获取文章失败: {error_msg}")
             return []
     
-    def fetch_latest_items(self, since_minutes: int = None, max_workers: int = 3) -> List[RSSItem]:
+    def fetch_latest_items(self, since_minutes: int = None, max_workers: int = None) -> List[RSSItem]:
         """
         从所有启用的RSS源并发获取最新文章
         
         Args:
             since_minutes: 获取多少分钟内的文章
-            max_workers: 最大并发工作线程数
+            max_workers: 最大并发抓取数，默认使用FEED_FETCH_CONCURRENCY配置
             
         Returns:
             去重后的文章列表，按时间倒序排列
@@ -237,28 +390,29 @@ class MultiRSSManager:
         
         logger.info(f"开始从 {len(enabled_sources)} 个RSS源获取文章")
         
+        engine = self._get_fetch_engine(max_workers)
+        results = engine.fetch_all(
+            enabled_sources,
+            lambda source, timeout, cancellation: self.fetch_from_source(
+                source, since_minutes, timeout, cancellation
+            ),
+            on_error=lambda source, error: source.mark_error(error),
+        )
+        
         all_items = []
+        for _, items in results:
+            all_items.extend(items)
         
-        # 使用线程池并发获取
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有获取任务
-            future_to_source = {
-                executor.submit(self.fetch_from_source, source, since_minutes): source 
-                for source in enabled_sources
-            }
-            
-            # 收集结果
-            for future in future_to_source:
-                source = future_to_source[future]
-                try:
-                    items = future.result(timeout=60)  # 60秒超时
-                    all_items.extend(items)
-                except Exception as e:
-                    logger.error(f"从 {source.name} 获取文章超时或失败: {e}")
-                    source.mark_error(str(e))
+        # 保存源状态（ETag/Last-Modified及统计），重启后继续使用条件请求
+        self.state_store.save(self.sources)
+        self._cache.flush()
+        not_modified = sum(1 for source in enabled_sources if self.fetchers[source.url].last_not_modified)
+        logger.info(f"条件请求: {not_modified}/{len(enabled_sources)} 个源返回304未更新")
         
         # 去重处理
         unique_items = self._deduplicate_items(all_items)
+        if self.near_duplicates is not None:
+            self._assign_clusters(unique_items)
         
         # 按发布时间倒序排列
         unique_items.sort(key=lambda x: x.published, reverse=True)
@@ -267,6 +421,69 @@ class MultiRSSManager:
         
         return unique_items
     
+    def _get_fetch_engine(self, max_workers: int = None) -> AsyncFeedFetchEngine:
+        """获取抓取引擎（按并发数复用）"""
+        concurrency = max_workers or Config.FEED_FETCH_CONCURRENCY
+        if self._fetch_engine is None or self._fetch_engine.max_concurrency != concurrency:
+            if self._fetch_engine is not None:
+                self._fetch_engine.shutdown()
+            self._fetch_engine = AsyncFeedFetchEngine(max_concurrency=concurrency)
+        return self._fetch_engine
+    
+    def _assign_clusters(self, items: List[RSSItem]):
+        """为新文章分配近似重复聚类；同类文章已发送的直接排除，避免再评分和总结"""
+        self.near_duplicates.cleanup()
+        joined = self.near_duplicates.assign_clusters(items)
+        for item in items:
+            if item.article_key in joined:
+                sent_key = self.near_duplicates.get_sent_article(item.cluster_id)
+                if sent_key:
+                    item.exclude_from_sending(f"近似重复：同类文章已发送 ({sent_key})")
+            # 持久化来源信息和聚类ID
+            self._cache.update_item_sent_status(item)
+
+    def _on_article_state_change(self, item: RSSItem):
+        """
+        文章可发送时只保留同一聚类中最早的可发送文章（通常是聚类代表）；
+        文章发送成功后，排除同一聚类中尚未发送的其他文章
+        """
+        if not item.cluster_id:
+            return
+        if SendQueue.is_eligible(item):
+            self._keep_cluster_representative(item)
+            return
+        if not item.send_success:
+            return
+        if self.near_duplicates.get_sent_article(item.cluster_id):
+            return
+        self.near_duplicates.mark_cluster_sent(item.cluster_id, item.article_key)
+
+        excluded = 0
+        for article_key in self.near_duplicates.get_cluster_members(item.cluster_id):
+            if article_key == item.article_key:
+                continue
+            sibling = self._cache.get_item(article_key)
+            if sibling and not (sibling.sent_status or sibling.send_success or sibling.excluded_from_sending):
+                sibling.exclude_from_sending(f"近似重复：同类文章已发送 ({item.article_key})")
+                excluded += 1
+        if excluded:
+            logger.info(f"🔗 已排除 {excluded} 篇与已发送文章近似重复的文章")
+
+    def _keep_cluster_representative(self, item: RSSItem):
+        """
+        同一聚类只保留一篇可发送的文章：聚类代表（首篇）可发送时保留代表，
+        否则保留最早加入聚类的可发送文章，后加入的排除出发送队列。
+        其余文章沿用代表的评分（见ScoringWorker），评分相同，不再逐篇比较评分；
+        本观察者先于发送队列注册，被排除的文章不会先入队再移除
+        """
+        for article_key in self.near_duplicates.get_cluster_members(item.cluster_id):
+            if article_key == item.article_key:
+                return
+            member = self._cache.get_item(article_key)
+            if member is not None and SendQueue.is_eligible(member):
+                item.exclude_from_sending(f"近似重复：同类文章待发送 ({article_key})")
+                return
+
     def _deduplicate_items(self, items: List[RSSItem]) -> List[RSSItem]:
         """
         文章去重
@@ -282,9 +499,9 @@ class MultiRSSManager:
         unique_items = []
         
         for item in items:
-            # 基于标题和链接去重
+            # 基于标题和规范化链接去重
             title_key = item.title.lower().strip()
-            link_key = item.link.lower().strip()
+            link_key = item.canonical_link
             
             if title_key not in seen_titles and link_key not in seen_links:
                 seen_titles.add(title_key)
@@ -0,0 +1,341 @@
+"""
+近似重复检测模块
+对清洗后的标题+摘要计算64位SimHash签名（NumPy批量向量化），
+用LSH分段桶表（每段至少16位，多探针查找）查找候选，汉明距离不超过阈值的文章归入同一聚类
+"""
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SIGNATURE_BITS = 64
+# LSH每段的最少位数：每段至少2^16个桶，积压文章分散在足够多的桶中
+MIN_BAND_BITS = 16
+_MAX_SQL_PARAMS = 900
+_SHINGLE_SIZE = 3
+_PRIME = np.uint64(1099511628211)
+_BIT_SHIFTS = np.arange(SIGNATURE_BITS, dtype=np.uint64)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    article_key TEXT PRIMARY KEY,
+    signature INTEGER NOT NULL,
+    cluster_id TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_signatures_cluster ON signatures (cluster_id);
+CREATE INDEX IF NOT EXISTS idx_signatures_created_at ON signatures (created_at);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    article_key TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, article_key)
+);
+CREATE TABLE IF NOT EXISTS sent_clusters (
+    cluster_id TEXT PRIMARY KEY,
+    article_key TEXT NOT NULL,
+    sent_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def clean_text(title: str, description: str) -> str:
+    """去除HTML标签、统一大小写和空白"""
+    text = f"{title or ''} {_TAG_RE.sub(' ', description or '')}"
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64混合，让相邻的n-gram哈希在64位上均匀分布"""
+    z = values + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def compute_signatures(texts: Sequence[str]) -> List[int]:
+    """
+    批量计算SimHash签名
+
+    所有文本的字符3-gram在一次向量运算中完成哈希和按位投票
+
+    Args:
+        texts: 已清洗的文本列表
+
+    Returns:
+        每个文本的64位签名
+    """
+    if not texts:
+        return []
+
+    code_arrays = []
+    for text in texts:
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype="<u4").astype(np.uint64)
+        if len(codes) < _SHINGLE_SIZE:
+            codes = np.concatenate([codes, np.zeros(_SHINGLE_SIZE - len(codes), dtype=np.uint64)])
+        code_arrays.append(codes)
+
+    lengths = np.array([len(codes) for codes in code_arrays])
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    gram_counts = lengths - _SHINGLE_SIZE + 1
+    all_codes = np.concatenate(code_arrays)
+
+    # 每个n-gram的起始位置（不跨越文本边界）
+    gram_starts = np.concatenate([
+        np.arange(offset, offset + count) for offset, count in zip(offsets, gram_counts)
+    ])
+    with np.errstate(over="ignore"):
+        hashes = np.zeros(len(gram_starts), dtype=np.uint64)
+        for i in range(_SHINGLE_SIZE):
+            hashes = hashes * _PRIME + all_codes[gram_starts + i]
+        hashes = _mix64(hashes)
+
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int32)
+    doc_starts = np.concatenate([[0], np.cumsum(gram_counts)[:-1]])
+    votes = np.add.reduceat(bits, doc_starts, axis=0)
+    signature_bits = (votes * 2 > gram_counts[:, None]).astype(np.uint64)
+    signatures = (signature_bits << _BIT_SHIFTS).sum(axis=1, dtype=np.uint64)
+    return [int(signature) for signature in signatures]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _to_signed(value: int) -> int:
+    """SQLite INTEGER为有符号64位"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """
+    近似重复索引
+
+    签名分成 b = min(最大汉明距离k+1, 64/16) 段，每段至少16位。由抽屉原理，距离不超过k的
+    两个签名至少有一段相差不超过 k//b 位，查找时对每段探测该半径内的所有桶（默认相似度0.9时
+    k=6，分4段各探测17个桶）。每个桶平均只有 积压文章数/2^16 篇文章，
+    在签名保留窗口内常见的积压规模（数万篇以内）下，每次查找只需比较少量候选
+    """
+
+    def __init__(self, db_path: str, similarity: float = None, window_days: int = None):
+        """
+        初始化索引
+
+        Args:
+            db_path: 持久化数据库路径（与文章存储放在同一目录）
+            similarity: 相似度阈值（0-1），换算为允许的最大汉明距离
+            window_days: 签名保留天数
+        """
+        similarity = Config.NEAR_DUPLICATE_SIMILARITY if similarity is None else similarity
+        self.max_distance = max(0, int((1 - similarity) * SIGNATURE_BITS))
+        self.window_days = window_days or Config.NEAR_DUPLICATE_WINDOW_DAYS
+        band_count = min(self.max_distance + 1, SIGNATURE_BITS // MIN_BAND_BITS)
+        self.probe_radius = self.max_distance // band_count
+        self.bands = [
+            (int(band[0]), len(band))
+            for band in np.array_split(np.arange(SIGNATURE_BITS), band_count)
+        ]
+        # 每种段宽在探测半径内的翻转掩码（含0，即原桶）
+        self._probe_masks = {
+            width: [
+                sum(1 << bit for bit in flipped)
+                for radius in range(self.probe_radius + 1)
+                for flipped in combinations(range(width), radius)
+            ]
+            for width in {width for _, width in self.bands}
+        }
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._rebuild_buckets_if_needed()
+
+    def _rebuild_buckets_if_needed(self):
+        """分段方式（由相似度阈值决定）变化时按已保存的签名重建桶表"""
+        layout = json.dumps(self.bands)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'band_layout'").fetchone()
+            if row and row[0] == layout:
+                return
+            self._conn.execute("DELETE FROM lsh_buckets")
+            rows = self._conn.execute("SELECT article_key, signature FROM signatures").fetchall()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets VALUES (?, ?, ?)",
+                [
+                    (band, bucket, article_key)
+                    for article_key, signature in rows
+                    for band, bucket in self._band_keys(_to_unsigned(signature))
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('band_layout', ?)", (layout,)
+            )
+            self._conn.commit()
+        if rows:
+            logger.info(f"LSH分段方式已变化，按 {len(rows)} 个签名重建桶表")
+
+    def _band_keys(self, signature: int) -> List[tuple]:
+        return [
+            (band, _to_signed((signature >> start) & ((1 << width) - 1)))
+            for band, (start, width) in enumerate(self.bands)
+        ]
+
+    def _candidates(self, signature: int) -> List[tuple]:
+        """探测各段半径内的桶，返回候选 (article_key, 签名, cluster_id)"""
+        candidates = {}
+        for band, (start, width) in enumerate(self.bands):
+            key = (signature >> start) & ((1 << width) - 1)
+            buckets = [_to_signed(key ^ mask) for mask in self._probe_masks[width]]
+            # 分块查询，避免超过SQLite的参数个数上限
+            for i in range(0, len(buckets), _MAX_SQL_PARAMS):
+                chunk = buckets[i:i + _MAX_SQL_PARAMS]
+                rows = self._conn.execute(
+                    f"""
+                    SELECT s.article_key, s.signature, s.cluster_id
+                    FROM lsh_buckets b JOIN signatures s ON s.article_key = b.article_key
+                    WHERE b.band = ? AND b.bucket IN ({', '.join('?' for _ in chunk)})
+                    """,
+                    [band] + chunk,
+                ).fetchall()
+                for row in rows:
+                    candidates[row[0]] = row
+        return list(candidates.values())
+
+    def _find_nearest(self, signature: int) -> Optional[tuple]:
+        """在候选中查找距离最近的已有签名，返回(article_key, cluster_id)"""
+        rows = self._candidates(signature)
+
+        best = None
+        best_distance = self.max_distance + 1
+        for article_key, stored, cluster_id in rows:
+            distance = hamming_distance(signature, _to_unsigned(stored))
+            if distance < best_distance:
+                best, best_distance = (article_key, cluster_id), distance
+        return best
+
+    def _add_signature(self, article_key: str, signature: int, cluster_id: str, created_at: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?)",
+            (article_key, _to_signed(signature), cluster_id, created_at),
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO lsh_buckets VALUES (?, ?, ?)",
+            [(band, bucket, article_key) for band, bucket in self._band_keys(signature)],
+        )
+
+    def assign_clusters(self, items: List) -> Dict[str, str]:
+        """
+        为一批文章计算签名并分配聚类
+
+        Args:
+            items: RSSItem列表
+
+        Returns:
+            article_key -> cluster_id，只包含加入了已有聚类的文章
+        """
+        pending = [item for item in items if not item.cluster_id]
+        if not pending:
+            return {}
+
+        signatures = compute_signatures([clean_text(item.title, item.description) for item in pending])
+        joined = {}
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            for item, signature in zip(pending, signatures):
+                article_key = item.article_key
+                nearest = self._find_nearest(signature)
+                cluster_id = nearest[1] if nearest else article_key
+                self._add_signature(article_key, signature, cluster_id, now)
+                item.cluster_id = cluster_id
+                if nearest:
+                    joined[article_key] = cluster_id
+            self._conn.commit()
+
+        if joined:
+            logger.info(f"🔗 发现 {len(joined)} 篇近似重复文章，已归入已有聚类")
+        return joined
+
+    def get_cluster_members(self, cluster_id: str) -> List[str]:
+        """获取聚类内所有文章的article_key（按加入聚类的先后，首个为聚类代表）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT article_key FROM signatures WHERE cluster_id = ? ORDER BY created_at, rowid",
+                (cluster_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def mark_cluster_sent(self, cluster_id: str, article_key: str):
+        """记录聚类已有文章发送"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO sent_clusters VALUES (?, ?, ?)",
+                (cluster_id, article_key, datetime.now().isoformat()),
+            )
+            self._conn.commit()
+
+    def get_sent_article(self, cluster_id: str) -> Optional[str]:
+        """获取聚类中已发送文章的article_key"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT article_key FROM sent_clusters WHERE cluster_id = ?", (cluster_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def cleanup(self):
+        """清理超出保留期的签名和桶"""
+        cutoff = (datetime.now() - timedelta(days=self.window_days)).isoformat()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM lsh_buckets WHERE article_key IN "
+                "(SELECT article_key FROM signatures WHERE created_at < ?)",
+                (cutoff,),
+            )
+            self._conn.execute("DELETE FROM signatures WHERE created_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM sent_clusters WHERE sent_at < ?", (cutoff,))
+            self._conn.commit()
+
+    def close(self):
+        with _shared_indexes_lock:
+            if _shared_indexes.get(str(self.db_path.resolve())) is self:
+                del _shared_indexes[str(self.db_path.resolve())]
+        with self._lock:
+            self._conn.close()
+
+
+_shared_indexes: Dict[str, NearDuplicateIndex] = {}
+_shared_indexes_lock = threading.Lock()
+
+
+def get_near_duplicate_index(db_path: str) -> NearDuplicateIndex:
+    """获取进程内共享的近似重复索引（同一数据库只打开一个连接，所有管理器共用）"""
+    key = str(Path(db_path).resolve())
+    with _shared_indexes_lock:
+        if key not in _shared_indexes:
+            _shared_indexes[key] = NearDuplicateIndex(db_path)
+        return _shared_indexes[key]
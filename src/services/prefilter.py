@@ -0,0 +1,259 @@
+"""
+评分预过滤模块
+在调用模型评分前用规则判断明显的低质量/高质量文章：标题和正文长度下限、
+按源配置的关键词允许/拒绝列表（全部编译进一个Aho-Corasick自动机，单次扫描匹配），
+以及可选的本地模型；判断明确的文章直接给分，不再调用模型，
+拿不准的（拒绝关键词只出现在正文开头、正文过短）交给模型评分，不直接排除
+"""
+import html
+import json
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+from .rss_service import RSSItem
+
+logger = setup_logger(__name__)
+
+# 全局规则的作用范围
+ALL_SOURCES = "*"
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick多模式匹配自动机（不区分大小写）"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        """
+        Args:
+            patterns: (关键词, 标签) 序列，同一关键词可带多个标签
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, object]]] = [[]]  # 状态 -> [(关键词长度, 标签)]
+        self.size = 0
+        for keyword, tag in patterns:
+            keyword = keyword.strip().lower()
+            if keyword:
+                self._add(keyword, tag)
+                self.size += 1
+        self._build()
+
+    def _add(self, keyword: str, tag: object):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(keyword), tag))
+
+    def _build(self):
+        """按BFS计算失败指针，并把失败链上的输出合并到各状态"""
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                if state:
+                    fail = self._fail[state]
+                    while fail and char not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Set[Tuple[str, object]]:
+        """
+        扫描文本，返回命中的 (关键词, 标签) 集合
+
+        英文关键词要求两侧不是字母或数字（整词匹配），中文等关键词按子串匹配
+        """
+        return {(keyword, tag) for _, keyword, tag in self.find(text)}
+
+    def find(self, text: str) -> Iterator[Tuple[int, str, object]]:
+        """扫描文本，逐个返回命中的 (起始位置, 关键词, 标签)，匹配规则同search"""
+        text = text.lower()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, tag in self._output[state]:
+                start = end - length + 1
+                keyword = text[start:end + 1]
+                if _is_word_char(keyword[0]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(keyword[-1]) and end + 1 < len(text) and _is_word_char(text[end + 1]):
+                    continue
+                yield start, keyword, tag
+
+
+def _split_keywords(value: str) -> List[str]:
+    return [keyword.strip() for keyword in re.split(r"[,，;；]", value or "") if keyword.strip()]
+
+
+class PreFilter:
+    """模型评分前的预过滤"""
+
+    def __init__(self, rules: Dict = None, model=None):
+        """
+        初始化预过滤
+
+        Args:
+            rules: 关键词规则 {"*": {"allow": [...], "deny": [...]}, "源名称或URL": {...}}，
+                   默认读取PREFILTER_ALLOW/DENY_KEYWORDS配置和PREFILTER_RULES_FILE文件
+            model: 可选的本地模型，需提供predict(item) -> (评分, 置信度)
+        """
+        self.rules = rules if rules is not None else self.load_rules()
+        self.model = model
+        self.min_title_length = Config.PREFILTER_MIN_TITLE_LENGTH
+        self.min_content_length = Config.PREFILTER_MIN_CONTENT_LENGTH
+        self.deny_scan_chars = Config.PREFILTER_DENY_SCAN_CHARS
+        self.allow_score = Config.PREFILTER_ALLOW_SCORE
+        self.model_confidence = Config.PREFILTER_MODEL_CONFIDENCE
+        self.automaton = KeywordAutomaton(
+            (keyword, (scope, kind))
+            for scope, lists in self.rules.items()
+            for kind in ("allow", "deny")
+            for keyword in lists.get(kind, [])
+        )
+        self.stats: Dict[str, int] = {
+            "checked": 0,
+            "rejected": 0,
+            "accepted": 0,
+            "llm_calls_saved": 0,
+            "rule_escalated": 0,  # 规则拿不准、交给模型评分的文章数
+            "model_decided": 0,  # 本地模型置信度足够、直接采用的文章数
+            "model_escalated": 0,  # 本地模型不确定、交给模型评分的文章数
+        }
+
+    @staticmethod
+    def load_rules(rules_file: str = None) -> Dict:
+        """合并环境变量中的全局关键词和规则文件中的按源规则"""
+        rules = {
+            ALL_SOURCES: {
+                "allow": _split_keywords(Config.PREFILTER_ALLOW_KEYWORDS),
+                "deny": _split_keywords(Config.PREFILTER_DENY_KEYWORDS),
+            }
+        }
+        path = Path(rules_file or Config.PREFILTER_RULES_FILE)
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for scope, lists in json.load(f).items():
+                        entry = rules.setdefault(scope, {"allow": [], "deny": []})
+                        entry.setdefault("allow", []).extend(lists.get("allow", []))
+                        entry.setdefault("deny", []).extend(lists.get("deny", []))
+                logger.info(f"已加载预过滤规则文件: {path}")
+            except Exception as e:
+                logger.error(f"加载预过滤规则文件失败 {path}: {e}")
+        return rules
+
+    @staticmethod
+    def _clean_text(text: str) -> str:
+        return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", text or ""))).strip()
+
+    def evaluate(self, item: RSSItem) -> Optional[Tuple[int, str]]:
+        """
+        判断单篇文章
+
+        Returns:
+            (评分, 原因)，无法明确判断、需要模型评分时返回None
+        """
+        decision = self._decide(item)
+        return decision[:2] if decision else None
+
+    def _decide(self, item: RSSItem) -> Optional[Tuple[int, str, str]]:
+        """返回 (评分, 原因, 评分来源)"""
+        title = (item.title or "").strip()
+        if len(title) < self.min_title_length:
+            return 0, f"标题过短（{len(title)}字）", "rule"
+
+        content = self._clean_text(item.description)
+        matched = {"allow": [], "deny": [], "disclosure": []}
+        if self.automaton.size:
+            scopes = {ALL_SOURCES, item.source_name, item.source_url}
+            # 拒绝关键词只看标题和正文开头的声明部分（"sponsored by NASA"之类出现在正文中间的不算）
+            disclosure_end = len(title) + 1 + self.deny_scan_chars
+            for start, keyword, (scope, kind) in sorted(self.automaton.find(f"{title}\n{content}")):
+                if scope not in scopes:
+                    continue
+                if kind == "deny":
+                    if start < len(title):
+                        matched["deny"].append(keyword)
+                    elif start < disclosure_end:
+                        matched["disclosure"].append(keyword)
+                else:
+                    matched["allow"].append(keyword)
+        if matched["deny"]:
+            return 0, f"标题命中拒绝关键词: {', '.join(dict.fromkeys(matched['deny']))}", "rule"
+        if matched["disclosure"]:
+            logger.debug(f"正文开头命中拒绝关键词，交给模型评分: {item.title[:30]}...")
+            self.stats["rule_escalated"] += 1
+            return None
+        if matched["allow"]:
+            return self.allow_score, f"命中允许关键词: {', '.join(dict.fromkeys(matched['allow']))}", "rule"
+
+        if len(content) < self.min_content_length:
+            # 正文过短（如只有一两句的中文摘要）不足以判断质量，交给模型评分
+            self.stats["rule_escalated"] += 1
+            return None
+
+        if self.model is not None:
+            try:
+                score, confidence = self.model.predict(item)
+            except Exception as e:
+                logger.warning(f"本地模型预测失败: {e}")
+                return None
+            if confidence >= self.model_confidence:
+                return int(round(score)), f"本地模型评分（置信度 {confidence:.2f}）", "local_model"
+            self.stats["model_escalated"] += 1
+        return None
+
+    def apply(self, items: List[RSSItem]) -> List[RSSItem]:
+        """
+        对文章执行预过滤，判断明确的直接写入评分
+
+        Returns:
+            仍需模型评分的文章
+        """
+        remaining = []
+        for item in items:
+            self.stats["checked"] += 1
+            decision = self._decide(item)
+            if decision is None:
+                remaining.append(item)
+                continue
+            score, reason, source = decision
+            self.stats["llm_calls_saved"] += 1
+            if source == "local_model":
+                self.stats["model_decided"] += 1
+            logger.debug(f"预过滤: {item.title[:30]}... -> {score}/10 ({reason})")
+            item.set_quality_score(score, source=source, exclusion_reason=f"预过滤: {reason}")
+            if item.meets_quality_requirement():
+                self.stats["accepted"] += 1
+            else:
+                self.stats["rejected"] += 1
+
+        skipped = len(items) - len(remaining)
+        if skipped:
+            logger.info(
+                f"🧹 预过滤判定 {skipped}/{len(items)} 篇，节省 {skipped} 次模型评分调用"
+                f"（累计 {self.stats['llm_calls_saved']} 次）"
+            )
+        return remaining
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -1,22 +1,38 @@
 """
 RSS获取和管理模块
 """
+import atexit
+import bisect
 import hashlib
 import json
 import os
+import threading
+import weakref
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, Iterator, List, Optional, Set
 
 import feedparser
 import requests
 
 from ..core.config import Config
+from ..core.http_client import HttpClient, get_http_client
+from ..core.url_utils import canonicalize_url
 from ..core.utils import setup_logger
+from .dedup_filter import dedup_keys, link_key, open_dedup_filter
 from .image_service import ImageDownloader
 
 logger = setup_logger(__name__)
 
+# 尚未关闭的JSON缓存，进程退出时统一保存（弱引用，不阻止回收）
+_open_caches: "weakref.WeakSet" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_caches():
+    for cache in list(_open_caches):
+        cache.flush()
+
 
 class RSSItem:
     """RSS条目数据类"""
@@ -24,6 +40,7 @@ class RSSItem:
     def __init__(self, title: str, link: str, description: str, published: datetime):
         self.title = title
         self.link = link
+        self.canonical_link = canonicalize_url(link)  # 规范化链接（去除跟踪参数、AMP等变体）
         self.description = description
         self.published = published
         self.title_hash = self._generate_title_hash(title)
@@ -32,6 +49,8 @@ class RSSItem:
         self.sent_time: Optional[datetime] = None  # 发送时间
         self.quality_score: Optional[int] = None  # AI质量评分（0-10分）
         self.scored_time: Optional[datetime] = None  # 评分时间
+        self.score_source: Optional[str] = None  # 评分来源：llm（模型评分）、heuristic（模型调用失败时的规则降级评分）、rule（预过滤规则）、local_model（本地模型）、cluster（沿用近似重复聚类代表的评分）
+        self.analysis: Optional[dict] = None  # 模型综合分析结果 {score, category, tags, language}
         
         # 质量控制状态 - 简化设计，主要基于quality_score
         self.excluded_from_sending: bool = False  # 是否被排除出发送队列
@@ -45,12 +64,33 @@ class RSSItem:
         
         # 图片相关属性
         self.image_url: Optional[str] = None  # 原始图片URL
+        self.image_candidates: List[str] = []  # 入库时记录的候选图片URL（发送前才下载）
         self.local_image_path: Optional[str] = None  # 本地图片路径
         self.image_downloaded: bool = False  # 图片是否已下载
         
         # RSS源信息
         self.source_name: Optional[str] = None  # RSS源名称
         self.source_url: Optional[str] = None   # RSS源URL
+        self.guid: Optional[str] = None  # 源中的条目唯一标识
+        self.cluster_id: Optional[str] = None  # 近似重复聚类ID（聚类首篇文章的article_key）
+
+        # 状态变更回调（由文章存储注册，用于维护状态索引）
+        self._state_listeners: List[Callable[["RSSItem"], None]] = []
+
+    def add_state_listener(self, listener: Callable[["RSSItem"], None]) -> None:
+        """注册状态变更回调，发送、评分或排除状态变化时调用"""
+        if listener not in self._state_listeners:
+            self._state_listeners.append(listener)
+
+    def _notify_state_change(self) -> None:
+        """通知已注册的回调文章状态已变化"""
+        for listener in list(self._state_listeners):
+            listener(self)
+
+    @property
+    def article_key(self) -> str:
+        """文章在存储中的唯一键"""
+        return f"{self.date_key}:{self.title_hash}"
 
     def _generate_title_hash(self, title: str) -> str:
         """生成标题的唯一标识符"""
@@ -64,6 +104,7 @@ class RSSItem:
         self.sent_time = datetime.now()
         self.send_success = True
         self.send_error = None
+        self._notify_state_change()
 
     def mark_send_failed(self, error_message: str) -> None:
         """标记发送失败"""
@@ -74,11 +115,13 @@ class RSSItem:
         # 如果尝试次数过多，标记为已处理避免重复尝试
         if self.send_attempts >= 3:
             self.sent_status = True  # 标记为已处理，但不是成功发送
+        self._notify_state_change()
 
     def mark_send_attempt(self) -> None:
         """记录发送尝试"""
         self.send_attempts += 1
         self.last_attempt_time = datetime.now()
+        self._notify_state_change()
 
     def should_retry_send(self) -> bool:
         """判断是否应该重试发送"""
@@ -91,10 +134,11 @@ class RSSItem:
             return False
         return True
 
-    def set_quality_score(self, score: int) -> None:
-        """设置质量评分"""
+    def set_quality_score(self, score: int, source: str = "llm", exclusion_reason: str = None) -> None:
+        """设置质量评分（低于要求时同时排除，只通知一次状态变更）"""
         self.quality_score = max(0, min(10, score))  # 确保分数在0-10范围内
         self.scored_time = datetime.now()
+        self.score_source = source
         
         logger.debug(f"🎯 文章评分设置: {self.title[:30]}... -> {self.quality_score}/10")
         
@@ -102,14 +146,19 @@ class RSSItem:
         from ..core.config import Config
         min_score = getattr(Config, 'MIN_QUALITY_SCORE', 7)
         if self.quality_score < min_score:
-            reason = f"质量评分 {self.quality_score} 低于要求 {min_score}"
+            reason = exclusion_reason or f"质量评分 {self.quality_score} 低于要求 {min_score}"
             logger.warning(f"🚫 文章被自动排除: {self.title[:30]}... 原因: {reason}")
-            self.exclude_from_sending(reason)
+            self._set_excluded(reason)
         else:
             logger.debug(f"✅ 文章通过质量检查: {self.title[:30]}... 分数: {self.quality_score}/{min_score}")
+        self._notify_state_change()
 
     def exclude_from_sending(self, reason: str) -> None:
         """将文章排除出发送队列"""
+        self._set_excluded(reason)
+        self._notify_state_change()
+
+    def _set_excluded(self, reason: str) -> None:
         self.excluded_from_sending = True
         self.exclusion_reason = reason
         logger.info(f"❌ 文章已排除出发送队列: {self.title[:50]}... 原因: {reason}")
@@ -181,6 +230,12 @@ class RSSItem:
         """检查是否有本地图片"""
         return self.local_image_path is not None and self.image_downloaded
 
+    def set_image_candidates(self, candidates: List[str]) -> None:
+        """记录候选图片URL，首个候选作为图片URL"""
+        self.image_candidates = list(candidates)
+        if self.image_candidates:
+            self.image_url = self.image_candidates[0]
+
     def __str__(self):
         return f"{self.title} - {self.link}"
 
@@ -197,6 +252,8 @@ class RSSItem:
             "sent_time": self.sent_time.isoformat() if self.sent_time else None,
             "quality_score": self.quality_score,
             "scored_time": self.scored_time.isoformat() if self.scored_time else None,
+            "score_source": self.score_source,
+            "analysis": self.analysis,
             # 质量控制状态字段 - 简化
             "excluded_from_sending": self.excluded_from_sending,
             "exclusion_reason": self.exclusion_reason,
@@ -207,10 +264,13 @@ class RSSItem:
             "send_success": self.send_success,
             # 图片和源信息
             "image_url": self.image_url,
+            "image_candidates": self.image_candidates,
             "local_image_path": self.local_image_path,
             "image_downloaded": self.image_downloaded,
             "source_name": self.source_name,
             "source_url": self.source_url,
+            "guid": self.guid,
+            "cluster_id": self.cluster_id,
         }
 
     @classmethod
@@ -228,6 +288,8 @@ class RSSItem:
         item.quality_score = data.get("quality_score")
         if data.get("scored_time"):
             item.scored_time = datetime.fromisoformat(data["scored_time"])
+        item.score_source = data.get("score_source")
+        item.analysis = data.get("analysis")
         
         # 恢复质量控制状态 - 简化
         item.excluded_from_sending = data.get("excluded_from_sending", False)
@@ -242,28 +304,93 @@ class RSSItem:
         
         # 恢复图片信息
         item.image_url = data.get("image_url")
+        item.image_candidates = data.get("image_candidates") or ([item.image_url] if item.image_url else [])
         item.local_image_path = data.get("local_image_path")
         item.image_downloaded = data.get("image_downloaded", False)
         
         # 恢复源信息
         item.source_name = data.get("source_name")
         item.source_url = data.get("source_url")
+        item.guid = data.get("guid")
+        item.cluster_id = data.get("cluster_id")
         
         return item
 
 
+class _StateIndex:
+    """按发布时间倒序排列的文章集合，增删使用二分查找，查询无需重新排序"""
+
+    def __init__(self):
+        self._keys: List[tuple] = []  # 有序键: (-发布时间戳, date_key, title_hash)
+        self._entries: Dict[tuple, tuple] = {}  # (date_key, title_hash) -> (有序键, RSSItem)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, item: RSSItem):
+        ident = (item.date_key, item.title_hash)
+        entry = self._entries.get(ident)
+        if entry is not None:
+            if entry[1] is item:
+                return
+            self.discard(entry[1])
+        key = (-item.published.timestamp(), item.date_key, item.title_hash)
+        bisect.insort(self._keys, key)
+        self._entries[ident] = (key, item)
+
+    def discard(self, item: RSSItem):
+        entry = self._entries.pop((item.date_key, item.title_hash), None)
+        if entry is not None:
+            del self._keys[bisect.bisect_left(self._keys, entry[0])]
+
+    def clear(self):
+        self._keys.clear()
+        self._entries.clear()
+
+    def items(self) -> List[RSSItem]:
+        return [self._entries[(key[1], key[2])][1] for key in self._keys]
+
+
 class RSSCache:
     """RSS缓存管理器"""
 
-    def __init__(self, cache_dir: str = "cache"):
+    def __init__(self, cache_dir: str = "cache", write_behind: bool = None):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.daily_cache: Dict[str, Set[str]] = {}  # date -> set of title_hashes
         self.article_details: Dict[
             str, Dict[str, RSSItem]
         ] = {}  # date -> hash -> RSSItem
+        # 延迟写入：状态变更只标记日期为脏，按间隔或变更数量批量落盘
+        self.write_behind = Config.CACHE_WRITE_BEHIND if write_behind is None else write_behind
+        self.flush_interval = Config.CACHE_FLUSH_INTERVAL_SECONDS
+        self.max_dirty = Config.CACHE_MAX_DIRTY
+        self._dirty_dates: Set[str] = set()
+        self._dirty_changes = 0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        # 按状态维护的有序索引，随文章状态变更增量更新
+        self._unsent_index = _StateIndex()
+        self._unscored_index = _StateIndex()
+        self._excluded_index = _StateIndex()
+        self._dedup_keys: Set[str] = set()  # 已加载文章的去重键（标题/guid/链接），用于确认过滤器命中
+        # 去重窗口内全部去重键的追加日志（每行"日期\t键"），日期缓存文件被清理后仍可确认过滤器命中
+        self._window_keys_file = self.cache_dir / "dedup_keys.tsv"
+        self._window_keys: Optional[Set[str]] = None  # 去重键日志内容，首次需要确认时读取
+        self._pending_window_keys: List[str] = []  # 尚未追加到日志的行
+        self._state_observers: List[Callable[[RSSItem], None]] = []
         self._load_cache()
 
+        # 跨天去重过滤器（JSON后端只加载最近两天，过滤器命中后再用已加载文章和去重键日志确认）
+        self.dedup_filter = open_dedup_filter(self.cache_dir)
+        if self.dedup_filter is not None:
+            if not self._window_keys_file.exists():
+                self._migrate_window_keys()
+            if self.dedup_filter.is_new:
+                for key in self._read_window_keys():
+                    self.dedup_filter.add(key)
+        _open_caches.add(self)
+
     def _get_cache_file(self, date_key: str) -> Path:
         """获取缓存文件路径"""
         return self.cache_dir / f"rss_{date_key}.json"
@@ -288,6 +415,7 @@ class RSSCache:
                         for item_data in data.get("articles", []):
                             item = RSSItem.from_dict(item_data)
                             self.article_details[date][item.title_hash] = item
+                            self._track_item(item)
 
                         logger.debug(f"加载缓存 {date}: {len(self.daily_cache[date])} 条记录")
                 except Exception as e:
@@ -298,149 +426,384 @@ class RSSCache:
                 self.daily_cache[date] = set()
                 self.article_details[date] = {}
 
-    def _save_cache(self, date_key: str):
-        """保存缓存数据"""
-        if date_key not in self.daily_cache:
+    def _save_cache(self, date_key: str) -> bool:
+        """保存缓存数据，返回是否成功（日期已不在缓存中视为成功）"""
+        with self._lock:
+            if date_key not in self.daily_cache:
+                return True
+
+            cache_file = self._get_cache_file(date_key)
+            try:
+                # 收集文章详细信息
+                articles = []
+                if date_key in self.article_details:
+                    for item in self.article_details[date_key].values():
+                        articles.append(item.to_dict())
+
+                data = {
+                    "date": date_key,
+                    "title_hashes": list(self.daily_cache[date_key]),
+                    "articles": articles,
+                    "updated_at": datetime.now().isoformat(),
+                }
+
+                # 先写临时文件再替换，避免进程中断留下半截的缓存文件
+                tmp_file = cache_file.with_suffix(".json.tmp")
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, cache_file)
+
+                logger.debug(f"保存缓存 {date_key}: {len(self.daily_cache[date_key])} 条记录")
+                return True
+            except Exception as e:
+                logger.error(f"保存缓存文件失败 {cache_file}: {e}")
+                return False
+
+    def _track_item(self, item: RSSItem):
+        """登记文章：加入状态索引并监听其状态变更"""
+        item.add_state_listener(self._on_item_state_change)
+        self._dedup_keys.update(dedup_keys(item))
+        self._reindex_item(item)
+
+    def _reindex_item(self, item: RSSItem):
+        """根据文章当前状态更新各状态索引"""
+        with self._lock:
+            memberships = (
+                (self._unsent_index,
+                 not (item.sent_status or item.send_success)
+                 and not item.excluded_from_sending
+                 and item.meets_quality_requirement()),
+                (self._unscored_index, not item.has_quality_score()),
+                (self._excluded_index, item.excluded_from_sending),
+            )
+            for index, is_member in memberships:
+                if is_member:
+                    index.add(item)
+                else:
+                    index.discard(item)
+
+    def _unindex_item(self, item: RSSItem):
+        """从所有状态索引中移除文章"""
+        with self._lock:
+            for index in (self._unsent_index, self._unscored_index, self._excluded_index):
+                index.discard(item)
+
+    def _on_item_state_change(self, item: RSSItem):
+        """文章发送、评分或排除状态变化时更新索引并标记待保存"""
+        with self._lock:
+            if self.article_details.get(item.date_key, {}).get(item.title_hash) is not item:
+                return
+            self._reindex_item(item)
+            self._mark_dirty(item.date_key)
+        self._notify_observers(item)
+
+    def add_state_observer(self, observer: Callable[[RSSItem], None]):
+        """注册存储级状态观察者，文章入库或状态变化时调用（如发送队列）"""
+        if observer not in self._state_observers:
+            self._state_observers.append(observer)
+
+    def _notify_observers(self, item: RSSItem):
+        for observer in list(self._state_observers):
+            observer(item)
+
+    def _mark_dirty(self, date_key: str):
+        """标记日期缓存需要保存（非延迟写入模式下立即保存）"""
+        if not self.write_behind:
+            if not self._save_cache(date_key):
+                # 保存失败的日期留待下次flush重试
+                with self._lock:
+                    self._dirty_dates.add(date_key)
             return
 
-        cache_file = self._get_cache_file(date_key)
+        with self._lock:
+            self._dirty_dates.add(date_key)
+            self._dirty_changes += 1
+            if self._dirty_changes >= self.max_dirty:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """将所有脏日期的缓存写入磁盘"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            dirty_dates = sorted(self._dirty_dates)
+            self._dirty_changes = 0
+            # 只有保存成功的日期才清除脏标记，失败的留待下次flush重试
+            saved = [date_key for date_key in dirty_dates if self._save_cache(date_key)]
+            self._dirty_dates.difference_update(saved)
+
+        if saved:
+            logger.debug(f"批量保存缓存: {', '.join(saved)}")
+        if len(saved) < len(dirty_dates):
+            logger.warning(f"{len(dirty_dates) - len(saved)} 个日期的缓存保存失败，将在下次保存时重试")
+        if self.dedup_filter is not None:
+            self._append_window_keys()
+            self.dedup_filter.save()
+
+    def close(self):
+        """保存缓存，不再在进程退出时保存"""
+        self.flush()
+        _open_caches.discard(self)
+
+    def get_dedup_stats(self) -> Dict[str, object]:
+        """获取跨天去重过滤器统计"""
+        return self.dedup_filter.get_stats() if self.dedup_filter is not None else {}
+
+    def _migrate_window_keys(self):
+        """去重键日志不存在时，用现有的日期缓存文件生成一次"""
+        lines = []
+        for cache_file in sorted(self.cache_dir.glob("rss_*.json")):
+            date_key = cache_file.stem.replace("rss_", "")
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for item_data in data.get("articles", []):
+                    lines.extend(f"{date_key}\t{key}\n" for key in dedup_keys(RSSItem.from_dict(item_data)))
+            except Exception as e:
+                logger.error(f"读取缓存文件去重键失败 {cache_file}: {e}")
+        self._rewrite_window_keys(lines)
+        if lines:
+            logger.info(f"已从缓存文件生成 {len(lines)} 个去重键: {self._window_keys_file}")
+
+    def _rewrite_window_keys(self, lines: List[str]) -> bool:
+        """整体重写去重键日志（临时文件+替换）"""
+        tmp_file = self._window_keys_file.with_suffix(".tsv.tmp")
         try:
-            # 收集文章详细信息
-            articles = []
-            if date_key in self.article_details:
-                for item in self.article_details[date_key].values():
-                    articles.append(item.to_dict())
-
-            data = {
-                "date": date_key,
-                "title_hashes": list(self.daily_cache[date_key]),
-                "articles": articles,
-                "updated_at": datetime.now().isoformat(),
-            }
-
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(tmp_file, self._window_keys_file)
+            return True
+        except Exception as e:
+            logger.error(f"保存去重键日志失败 {self._window_keys_file}: {e}")
+            return False
 
-            logger.debug(f"保存缓存 {date_key}: {len(self.daily_cache[date_key])} 条记录")
+    def _read_window_keys(self) -> Iterator[str]:
+        """逐个读取去重键日志中的键"""
+        try:
+            with open(self._window_keys_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    _, _, key = line.rstrip("\n").partition("\t")
+                    if key:
+                        yield key
+        except FileNotFoundError:
+            return
         except Exception as e:
-            logger.error(f"保存缓存文件失败 {cache_file}: {e}")
+            logger.error(f"读取去重键日志失败 {self._window_keys_file}: {e}")
+
+    def _record_window_keys(self, item: RSSItem):
+        """登记新文章的去重键，随下次保存追加到日志"""
+        date_key = datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            self._pending_window_keys.extend(f"{date_key}\t{key}\n" for key in dedup_keys(item))
+
+    def _append_window_keys(self):
+        """把待写入的去重键追加到日志，失败的留待下次保存重试"""
+        with self._lock:
+            if not self._pending_window_keys:
+                return
+            try:
+                with open(self._window_keys_file, "a", encoding="utf-8") as f:
+                    f.writelines(self._pending_window_keys)
+            except Exception as e:
+                logger.error(f"追加去重键日志失败 {self._window_keys_file}: {e}")
+                return
+            if self._window_keys is not None:
+                self._window_keys.update(line.rstrip("\n").partition("\t")[2]
+                                         for line in self._pending_window_keys)
+            self._pending_window_keys = []
+
+    def _prune_window_keys(self, window_days: int):
+        """删除去重键日志中超出去重窗口的键（日志按日期追加，最早一行未过期时无需重写）"""
+        cutoff = (datetime.now() - timedelta(days=window_days)).strftime("%Y-%m-%d")
+        with self._lock:
+            self._append_window_keys()
+            try:
+                with open(self._window_keys_file, "r", encoding="utf-8") as f:
+                    first = f.readline()
+                    if not first or first[:10] >= cutoff:
+                        return
+                    kept = [line for line in f if line[:10] >= cutoff]
+            except FileNotFoundError:
+                return
+            except Exception as e:
+                logger.error(f"读取去重键日志失败 {self._window_keys_file}: {e}")
+                return
+            if self._rewrite_window_keys(kept):
+                self._window_keys = None
+                logger.info(f"去重键日志已清理 {cutoff} 之前的记录，保留 {len(kept)} 个")
+
+    def _confirm_filter_hits(self, keys: List[str]) -> bool:
+        """过滤器命中后用已加载文章和去重键日志确认，排除布隆过滤器误判"""
+        with self._lock:
+            confirmed = any(key in self._dedup_keys for key in keys)
+            if not confirmed:
+                if self._window_keys is None:
+                    self._window_keys = set(self._read_window_keys())
+                    logger.debug(f"已读取 {len(self._window_keys)} 个历史去重键")
+                confirmed = any(key in self._window_keys for key in keys)
+        self.dedup_filter.record_confirmation(confirmed)
+        return confirmed
+
+    def is_known_link(self, canonical_link: str) -> bool:
+        """检查规范化链接是否已入库（在构造RSSItem之前调用）"""
+        if not canonical_link:
+            return False
+        key = link_key(canonical_link)
+        if key in self._dedup_keys:
+            return True
+        if self.dedup_filter is None or not self.dedup_filter.might_contain(key):
+            return False
+        return self._confirm_filter_hits([key])
 
     def is_duplicate(self, item: RSSItem) -> bool:
-        """检查文章是否重复"""
-        return item.title_hash in self.daily_cache.get(item.date_key, set())
+        """检查文章是否重复（同一天的相同标题，或去重窗口内标题/guid/链接相同）"""
+        if item.title_hash in self.daily_cache.get(item.date_key, set()):
+            return True
+        if self.dedup_filter is None:
+            return False
+        hits = [key for key in dedup_keys(item) if self.dedup_filter.might_contain(key)]
+        return bool(hits) and self._confirm_filter_hits(hits)
 
     def add_item(self, item: RSSItem):
         """添加文章到缓存"""
-        if item.date_key not in self.daily_cache:
-            self.daily_cache[item.date_key] = set()
-            self.article_details[item.date_key] = {}
-
-        self.daily_cache[item.date_key].add(item.title_hash)
-        self.article_details[item.date_key][item.title_hash] = item
-        self._save_cache(item.date_key)
+        with self._lock:
+            if item.date_key not in self.daily_cache:
+                self.daily_cache[item.date_key] = set()
+                self.article_details[item.date_key] = {}
+
+            self.daily_cache[item.date_key].add(item.title_hash)
+            self.article_details[item.date_key][item.title_hash] = item
+            self._track_item(item)
+            self._mark_dirty(item.date_key)
+        if self.dedup_filter is not None:
+            self._record_window_keys(item)
+            for key in dedup_keys(item):
+                self.dedup_filter.add(key)
+            if not self.write_behind:
+                self._append_window_keys()
+        self._notify_observers(item)
 
     def update_item_sent_status(self, item: RSSItem):
         """更新文章发送状态"""
-        if (
-            item.date_key in self.article_details
-            and item.title_hash in self.article_details[item.date_key]
-        ):
-            self.article_details[item.date_key][
-                item.title_hash
-            ].sent_status = item.sent_status
-            self.article_details[item.date_key][
-                item.title_hash
-            ].sent_time = item.sent_time
-            self._save_cache(item.date_key)
+        with self._lock:
+            if (
+                item.date_key in self.article_details
+                and item.title_hash in self.article_details[item.date_key]
+            ):
+                self.article_details[item.date_key][
+                    item.title_hash
+                ].sent_status = item.sent_status
+                self.article_details[item.date_key][
+                    item.title_hash
+                ].sent_time = item.sent_time
+                self._reindex_item(self.article_details[item.date_key][item.title_hash])
+                self._mark_dirty(item.date_key)
+
+    def get_send_candidates(self) -> List[RSSItem]:
+        """获取未发送、未排除且未判定为不合格的文章（不检查重试间隔，按发布时间倒序）"""
+        with self._lock:
+            return self._unsent_index.items()
 
     def get_unsent_items(self, date_key: str = None) -> List[RSSItem]:
-        """获取未发送且可发送的文章"""
-        sendable_items = []
-        total_items = 0
-        debug_stats = {
-            'sent_status': 0,
-            'excluded': 0,
-            'quality_failed': 0,
-            'retry_failed': 0,
-            'sendable': 0
-        }
+        """获取未发送且可发送的文章（按发布时间倒序）"""
+        with self._lock:
+            candidates = self._unsent_index.items()
+            excluded_count = len(self._excluded_index)
 
         if date_key:
-            # 获取指定日期的可发送文章
-            if date_key in self.article_details:
-                for item in self.article_details[date_key].values():
-                    total_items += 1
-                    if item.sent_status or item.send_success:
-                        debug_stats['sent_status'] += 1
-                    elif item.excluded_from_sending:
-                        debug_stats['excluded'] += 1
-                        logger.debug(f"文章被排除: {item.title[:30]}... 原因: {item.exclusion_reason}")
-                    elif item.has_quality_score() and not item.meets_quality_requirement():
-                        debug_stats['quality_failed'] += 1
-                        logger.info(f"❌ 文章质量不达标已排除: {item.title[:30]}... 分数: {item.quality_score} (需要≥{Config.MIN_QUALITY_SCORE})")
-                    elif not item.should_retry_send():
-                        debug_stats['retry_failed'] += 1
-                        logger.debug(f"文章重试次数过多: {item.title[:30]}... 尝试: {item.send_attempts}")
-                    else:
-                        debug_stats['sendable'] += 1
-                        sendable_items.append(item)
-        else:
-            # 获取所有日期的可发送文章
-            for date_articles in self.article_details.values():
-                for item in date_articles.values():
-                    total_items += 1
-                    if item.sent_status or item.send_success:
-                        debug_stats['sent_status'] += 1
-                    elif item.excluded_from_sending:
-                        debug_stats['excluded'] += 1
-                        logger.debug(f"文章被排除: {item.title[:30]}... 原因: {item.exclusion_reason}")
-                    elif item.has_quality_score() and not item.meets_quality_requirement():
-                        debug_stats['quality_failed'] += 1
-                        logger.info(f"❌ 文章质量不达标已排除: {item.title[:30]}... 分数: {item.quality_score} (需要≥{Config.MIN_QUALITY_SCORE})")
-                    elif not item.should_retry_send():
-                        debug_stats['retry_failed'] += 1
-                        logger.debug(f"文章重试次数过多: {item.title[:30]}... 尝试: {item.send_attempts}")
-                    else:
-                        debug_stats['sendable'] += 1
-                        sendable_items.append(item)
-
-        logger.info(f"📊 文章状态统计 - 总计: {total_items}, 可发送: {debug_stats['sendable']}, "
-                   f"已发送: {debug_stats['sent_status']}, 被排除: {debug_stats['excluded']}, "
-                   f"质量不达标(已排除): {debug_stats['quality_failed']}, 重试失败: {debug_stats['retry_failed']}")
-
-        # 补充说明：质量不达标的文章会被自动排除出发送队列
-        if debug_stats['quality_failed'] > 0:
-            logger.info(f"ℹ️ 说明：{debug_stats['quality_failed']}篇质量不达标文章已被自动排除，不会进入发送队列")
-
-        # 按发布时间排序（最新的在前）
-        sendable_items.sort(key=lambda x: x.published, reverse=True)
+            candidates = [item for item in candidates if item.date_key == date_key]
+
+        # 重试间隔依赖当前时间，只在候选集合上判断
+        sendable_items = []
+        retry_failed = 0
+        for item in candidates:
+            if item.should_retry_send():
+                sendable_items.append(item)
+            else:
+                retry_failed += 1
+                logger.debug(f"文章重试限制: {item.title[:30]}... 尝试: {item.send_attempts}")
+
+        logger.info(f"📊 文章状态统计 - 候选: {len(candidates)}, 可发送: {len(sendable_items)}, "
+                   f"被排除: {excluded_count}, 重试限制: {retry_failed}")
         return sendable_items
 
     def get_items_needing_quality_check(self) -> List[RSSItem]:
-        """获取需要质量检查的文章"""
-        items_to_check = []
-        
-        for date_articles in self.article_details.values():
-            for item in date_articles.values():
-                if item.needs_quality_check():
-                    items_to_check.append(item)
-        
-        # 按发布时间排序（最新的在前）
-        items_to_check.sort(key=lambda x: x.published, reverse=True)
-        return items_to_check
+        """获取需要质量检查的文章（按发布时间倒序）"""
+        if not getattr(Config, 'ENABLE_QUALITY_CHECK', True):
+            return []
+        with self._lock:
+            return self._unscored_index.items()
 
     def get_excluded_items(self) -> List[RSSItem]:
-        """获取被排除出发送队列的文章"""
-        excluded_items = []
-        
-        for date_articles in self.article_details.values():
-            for item in date_articles.values():
-                if item.excluded_from_sending:
-                    excluded_items.append(item)
-        
-        # 按发布时间排序（最新的在前）
-        excluded_items.sort(key=lambda x: x.published, reverse=True)
-        return excluded_items
+        """获取被排除出发送队列的文章（按发布时间倒序）"""
+        with self._lock:
+            return self._excluded_index.items()
+
+    def get_item(self, article_key: str) -> Optional[RSSItem]:
+        """按article_key获取已加载的文章"""
+        date_key, _, title_hash = article_key.partition(":")
+        with self._lock:
+            return self.article_details.get(date_key, {}).get(title_hash)
+
+    def iter_items(self) -> Iterator[RSSItem]:
+        """遍历缓存中的所有文章"""
+        with self._lock:
+            items = [item for date_articles in self.article_details.values()
+                     for item in date_articles.values()]
+        yield from items
+
+    def remove_item(self, item: RSSItem):
+        """从缓存中删除文章"""
+        with self._lock:
+            date_articles = self.article_details.get(item.date_key)
+            if not date_articles or item.title_hash not in date_articles:
+                return
+            self._unindex_item(date_articles.pop(item.title_hash))
+            self.daily_cache[item.date_key].discard(item.title_hash)
+            if date_articles:
+                self._mark_dirty(item.date_key)
+            else:
+                self.clear(item.date_key)
+
+    def get_daily_stats(self) -> Dict[str, int]:
+        """获取每天的文章数量"""
+        with self._lock:
+            return {date_key: len(title_hashes) for date_key, title_hashes in self.daily_cache.items()}
+
+    def clear(self, date_key: str = None):
+        """清理指定日期的缓存，或清理全部缓存及去重记录"""
+        with self._lock:
+            if date_key:
+                self._dirty_dates.discard(date_key)
+                self._drop_date(date_key)
+                cache_file = self._get_cache_file(date_key)
+                if cache_file.exists():
+                    cache_file.unlink()
+            else:
+                self._dirty_dates.clear()
+                self.daily_cache.clear()
+                self.article_details.clear()
+                for index in (self._unsent_index, self._unscored_index, self._excluded_index):
+                    index.clear()
+                self._dedup_keys.clear()
+                if self.dedup_filter is not None:
+                    self.dedup_filter.clear()
+                    self._pending_window_keys = []
+                    if self._rewrite_window_keys([]):
+                        self._window_keys = set()
+                for cache_file in self.cache_dir.glob("rss_*.json"):
+                    cache_file.unlink()
+
+    def _drop_date(self, date_key: str):
+        """从内存和状态索引中移除某一天的文章"""
+        self.daily_cache.pop(date_key, None)
+        for item in self.article_details.pop(date_key, {}).values():
+            self._unindex_item(item)
 
     def cleanup_old_cache(self, keep_days: int = 7):
         """清理旧的缓存文件"""
@@ -457,26 +820,48 @@ class RSSCache:
                     logger.info(f"删除旧缓存文件: {cache_file}")
 
                     # 从内存中移除
-                    if date_str in self.daily_cache:
-                        del self.daily_cache[date_str]
+                    with self._lock:
+                        self._drop_date(date_str)
 
             except Exception as e:
                 logger.error(f"清理缓存文件失败 {cache_file}: {e}")
 
+        # 尚未落盘的过期日期不再写入
+        cutoff_key = cutoff_date.strftime("%Y-%m-%d")
+        with self._lock:
+            self._dirty_dates = {d for d in self._dirty_dates if d >= cutoff_key}
+
+        # 去重键按去重窗口保留，比文章缓存文件保留得更久
+        if self.dedup_filter is not None:
+            self._prune_window_keys(self.dedup_filter.window_days)
+
 
 class RSSFetcher:
     """RSS获取器"""
 
-    def __init__(self, feed_url: str):
+    def __init__(self, feed_url: str, http_client: HttpClient = None, cache=None):
         if not feed_url:
             raise ValueError("RSS feed URL is required")
         self.feed_url = feed_url
+        self.http_client = http_client or get_http_client()
         self.last_check_time: Optional[datetime] = None
-        self.cache = RSSCache()
-        self.image_downloader = ImageDownloader()  # 初始化图片下载器
+        # 条件请求（Conditional GET）校验信息，由MultiRSSManager持久化
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.last_not_modified: bool = False  # 最近一次请求是否返回304
+        # 高水位线：已处理过的最新条目发布时间及该时间点上的guid
+        self.watermark_published: Optional[datetime] = None
+        self.watermark_guids: Set[str] = set()
+        if cache is None:
+            from .article_store import get_shared_cache
+
+            cache = get_shared_cache()
+        self.cache = cache
+        self.image_downloader = ImageDownloader(http_client=self.http_client)  # 初始化图片下载器
 
     def fetch_latest_items(
-        self, since_minutes: int = None, enable_dedup: bool = True
+        self, since_minutes: int = None, enable_dedup: bool = True, timeout: float = 30,
+        cancellation=None
     ) -> List[RSSItem]:
         """
         获取最新的RSS条目
@@ -484,6 +869,8 @@ class RSSFetcher:
         Args:
             since_minutes: 获取多少分钟内的文章，默认使用配置的文章获取时间范围
             enable_dedup: 是否启用去重功能
+            timeout: HTTP请求超时（秒）
+            cancellation: 抓取引擎的取消标记（FetchCancellation），已取消时不写入缓存、校验信息和水位线
 
         Returns:
             RSS条目列表
@@ -491,20 +878,23 @@ class RSSFetcher:
         try:
             logger.info(f"开始获取RSS数据: {self.feed_url}")
 
-            # 获取代理配置
-            proxies = Config.get_proxies()
-            if proxies:
-                logger.info(f"使用代理: {proxies}")
+            # 去重模式下才使用条件请求，禁用去重时需要完整的feed内容
+            headers = self._get_conditional_headers() if enable_dedup else {}
 
-            # 获取RSS数据
-            response = requests.get(
+            # 获取RSS数据（代理、User-Agent和连接复用由共享HTTP客户端处理）
+            self.last_not_modified = False
+            response = self.http_client.get(
                 self.feed_url, 
-                timeout=30,
-                proxies=proxies,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
+                timeout=timeout,
+                headers=headers
             )
+
+            # 304表示源内容未变化，无需下载和解析
+            if response.status_code == 304:
+                self.last_not_modified = True
+                logger.info(f"RSS源未更新(304)，跳过解析: {self.feed_url}")
+                return []
+
             response.raise_for_status()
 
             # 解析RSS
@@ -517,47 +907,93 @@ class RSSFetcher:
 
             logger.info(f"获取最近 {Config.FETCH_ARTICLES_HOURS} 小时内的文章")
 
-            items = []
+            candidates = []
             duplicate_count = 0
+            watermark_skipped = 0
+
+            # 按时间倒序排列的源，遇到水位线或时间窗口之前的条目即可停止遍历
+            date_ordered = self._is_date_ordered(feed.entries)
+            newest_published = self.watermark_published
+            newest_guids = set(self.watermark_guids)
 
             for entry in feed.entries:
                 try:
                     # 解析发布时间
-                    if hasattr(entry, "published_parsed") and entry.published_parsed:
-                        published = datetime(*entry.published_parsed[:6])
-                    elif hasattr(entry, "updated_parsed") and entry.updated_parsed:
-                        published = datetime(*entry.updated_parsed[:6])
-                    else:
-                        published = datetime.now()
+                    published_parsed = self._get_entry_time_tuple(entry)
+                    published = datetime(*published_parsed[:6]) if published_parsed else datetime.now()
+                    guid = self._get_entry_guid(entry)
+
+                    # 水位线检查：在构造RSSItem和处理图片之前跳过已处理过的条目
+                    if enable_dedup and published_parsed and self._is_below_watermark(published, guid):
+                        watermark_skipped += 1
+                        if date_ordered:
+                            break
+                        continue
+
+                    if published_parsed and enable_dedup:
+                        if newest_published is None or published > newest_published:
+                            newest_published = published
+                            newest_guids = {guid}
+                        elif published == newest_published:
+                            newest_guids.add(guid)
 
                     # 只获取指定时间范围内的文章
-                    if published >= cutoff_time:
-                        item = RSSItem(
-                            title=entry.get("title", "无标题"),
-                            link=entry.get("link", ""),
-                            description=entry.get("description", ""),
-                            published=published,
-                        )
-
-                        # 尝试获取和下载图片
-                        self._process_item_image(item, entry)
-
-                        # 检查是否重复
-                        if enable_dedup and self.cache.is_duplicate(item):
-                            duplicate_count += 1
-                            logger.debug(f"跳过重复文章: {item.title}")
-                            continue
-
-                        items.append(item)
-
-                        # 添加到缓存
-                        if enable_dedup:
-                            self.cache.add_item(item)
+                    if published < cutoff_time:
+                        if date_ordered and published_parsed:
+                            break
+                        continue
+
+                    # 规范化链接已入库的转载，在构造RSSItem和处理图片之前跳过
+                    link = entry.get("link", "")
+                    if enable_dedup and self.cache.is_known_link(canonicalize_url(link)):
+                        duplicate_count += 1
+                        logger.debug(f"跳过已知链接: {link}")
+                        continue
+
+                    item = RSSItem(
+                        title=entry.get("title", "无标题"),
+                        link=link,
+                        description=entry.get("description", ""),
+                        published=published,
+                    )
+                    item.guid = guid
+
+                    # 检查是否重复
+                    if enable_dedup and self.cache.is_duplicate(item):
+                        duplicate_count += 1
+                        logger.debug(f"跳过重复文章: {item.title}")
+                        continue
+
+                    # 只记录候选图片URL，下载推迟到文章被选中发送时
+                    self._process_item_image(item, entry)
+
+                    candidates.append(item)
 
                 except Exception as e:
                     logger.error(f"解析RSS条目时出错: {e}")
                     continue
 
+            # 写入之前确认抓取未因超时被取消，取消的抓取不留下任何状态变更
+            if cancellation is not None and not cancellation.commit():
+                logger.warning(f"抓取已超时取消，丢弃 {len(candidates)} 条结果: {self.feed_url}")
+                return []
+            self._update_validators(response)
+
+            # 添加到缓存（同一feed中的重复条目在这里跳过）
+            items = []
+            for item in candidates:
+                if enable_dedup:
+                    if self.cache.is_duplicate(item):
+                        duplicate_count += 1
+                        continue
+                    self.cache.add_item(item)
+                items.append(item)
+
+            # 推进水位线
+            if enable_dedup and newest_published is not None:
+                self.watermark_published = newest_published
+                self.watermark_guids = newest_guids
+
             # 清理旧缓存
             if enable_dedup:
                 self.cache.cleanup_old_cache()
@@ -565,6 +1001,8 @@ class RSSFetcher:
             logger.info(f"成功获取 {len(items)} 条最新文章")
             if duplicate_count > 0:
                 logger.info(f"跳过 {duplicate_count} 条重复文章")
+            if watermark_skipped > 0:
+                logger.info(f"水位线以下跳过 {watermark_skipped} 条已处理条目")
 
             return items
 
@@ -575,10 +1013,63 @@ class RSSFetcher:
             logger.error(f"RSS解析失败: {e}")
             return []
 
+    @staticmethod
+    def _get_entry_time_tuple(entry):
+        """获取条目的发布时间（struct_time），没有时返回None"""
+        if hasattr(entry, "published_parsed") and entry.published_parsed:
+            return entry.published_parsed
+        if hasattr(entry, "updated_parsed") and entry.updated_parsed:
+            return entry.updated_parsed
+        return None
+
+    @staticmethod
+    def _get_entry_guid(entry) -> str:
+        """获取条目的唯一标识（guid/id，缺失时使用链接）"""
+        return entry.get("id") or entry.get("link") or entry.get("title", "")
+
+    def _is_date_ordered(self, entries) -> bool:
+        """判断源条目是否按发布时间倒序排列（仅比较时间元组，开销很小）"""
+        previous = None
+        for entry in entries:
+            current = self._get_entry_time_tuple(entry)
+            if current is None:
+                return False
+            current = tuple(current[:6])
+            if previous is not None and current > previous:
+                return False
+            previous = current
+        return True
+
+    def _is_below_watermark(self, published: datetime, guid: str) -> bool:
+        """判断条目是否在水位线及以下（已处理过）"""
+        if self.watermark_published is None:
+            return False
+        if published < self.watermark_published:
+            return True
+        return published == self.watermark_published and guid in self.watermark_guids
+
+    def _get_conditional_headers(self) -> Dict[str, str]:
+        """根据上次响应的ETag/Last-Modified构建条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def _update_validators(self, response) -> None:
+        """从响应头中记录ETag/Last-Modified，供下次条件请求使用"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if isinstance(etag, str):
+            self.etag = etag
+        if isinstance(last_modified, str):
+            self.last_modified = last_modified
+
     def get_feed_info(self) -> Dict[str, str]:
         """获取RSS源信息"""
         try:
-            response = requests.get(self.feed_url, timeout=30)
+            response = self.http_client.get(self.feed_url, timeout=30)
             response.raise_for_status()
             feed = feedparser.parse(response.content)
 
@@ -594,10 +1085,12 @@ class RSSFetcher:
 
     def get_cache_status(self) -> Dict[str, any]:
         """获取缓存状态"""
-        status = {"cache_dir": str(self.cache.cache_dir), "daily_stats": {}}
-
-        for date_key, title_hashes in self.cache.daily_cache.items():
-            status["daily_stats"][date_key] = len(title_hashes)
+        status = {
+            "cache_dir": str(self.cache.cache_dir),
+            "backend": type(self.cache).__name__,
+            "daily_stats": self.cache.get_daily_stats(),
+            "dedup": self.cache.get_dedup_stats(),
+        }
 
         # 统计缓存文件
         cache_files = list(self.cache.cache_dir.glob("rss_*.json"))
@@ -608,58 +1101,31 @@ class RSSFetcher:
 
     def clear_cache(self, date_key: str = None):
         """清理缓存"""
+        self.cache.clear(date_key)
         if date_key:
-            # 清理指定日期的缓存
-            if date_key in self.cache.daily_cache:
-                del self.cache.daily_cache[date_key]
-
-            cache_file = self.cache._get_cache_file(date_key)
-            if cache_file.exists():
-                cache_file.unlink()
-                logger.info(f"清理缓存: {date_key}")
+            logger.info(f"清理缓存: {date_key}")
         else:
-            # 清理所有缓存
-            self.cache.daily_cache.clear()
-            for cache_file in self.cache.cache_dir.glob("rss_*.json"):
-                cache_file.unlink()
             logger.info("清理所有缓存")
     
     def _process_item_image(self, item: RSSItem, entry) -> None:
         """
-        处理文章图片
-        
+        记录文章的候选图片URL（不下载，获取周期内没有图片I/O）
+
         Args:
             item: RSS条目
             entry: feedparser条目对象
         """
         try:
-            # 提取图片URL
-            image_url = self.image_downloader.extract_image_from_rss_entry(entry)
-            
-            if image_url:
-                logger.info(f"发现文章图片: {item.title[:30]}... -> {image_url}")
-                
-                # 设置图片URL
-                item.set_image_info(image_url)
-                
-                # 下载图片
-                local_path = self.image_downloader.download_image(
-                    image_url, 
-                    filename=f"{item.title_hash}_{os.path.basename(image_url.split('?')[0])}"
-                )
-                
-                if local_path:
-                    # 更新本地路径
-                    item.set_image_info(image_url, local_path)
-                    logger.info(f"文章图片下载成功: {local_path}")
-                else:
-                    logger.warning(f"文章图片下载失败: {image_url}")
+            candidates = self.image_downloader.extract_image_candidates(entry)
+            if candidates:
+                item.set_image_candidates(candidates)
+                logger.debug(f"记录文章候选图片: {item.title[:30]}... -> {candidates[0]}")
             else:
                 logger.debug(f"文章无图片: {item.title[:30]}...")
-                
+
         except Exception as e:
-            logger.error(f"处理文章图片失败 {item.title[:30]}...: {e}")
-    
+            logger.error(f"提取文章图片失败 {item.title[:30]}...: {e}")
+
     def cleanup_old_images(self, days: int = 30) -> int:
         """
         清理旧图片
@@ -8,6 +8,7 @@ from datetime import datetime
 import schedule
 
 from ..core.config import Config
+from ..core.http_client import get_http_client
 from ..core.utils import setup_logger
 from .send_service import SendManager
 from .multi_rss_manager import MultiRSSManager
@@ -21,7 +22,7 @@ class NewsScheduler:
     def __init__(self):
         # 使用多RSS管理器
         self.multi_rss_manager = MultiRSSManager()
-        self.send_manager = SendManager()
+        self.send_manager = SendManager(multi_rss_manager=self.multi_rss_manager)
         self.is_running = False
         self._thread = None
 
@@ -39,7 +40,9 @@ class NewsScheduler:
                 logger.info("没有新的文章")
                 return 0
 
-            logger.info(f"发现 {len(items)} 篇新文章，已加入发送队列")
+            # 交给后台评分，评分达标后进入发送队列
+            queued = self.send_manager.scoring_worker.enqueue(items)
+            logger.info(f"发现 {len(items)} 篇新文章，{queued} 篇已加入评分队列")
             return len(items)
 
         except Exception as e:
@@ -140,6 +143,9 @@ class NewsScheduler:
             logger.info(f"每批最多发送: {Config.MAX_ARTICLES_PER_BATCH} 篇文章")
             logger.info(f"发送间隔: {Config.SEND_INTERVAL_MINUTES} 分钟")
 
+            # 启动后台评分（先恢复存储中尚未评分的文章）
+            self.send_manager.scoring_worker.start()
+
             # 立即执行一次检查
             logger.info("执行首次检查...")
             self.run_cycle()
@@ -163,6 +169,8 @@ class NewsScheduler:
 
         self.is_running = False
         schedule.clear()
+        self.send_manager.scoring_worker.stop()
+        self.multi_rss_manager.flush_cache()
         logger.info("调度器已停止")
 
     def _run_schedule(self):
@@ -185,6 +193,7 @@ class NewsScheduler:
             "jobs_count": len(schedule.jobs),
             "current_time": datetime.now().isoformat(),
             "send_status": send_status,
+            "http_connections": get_http_client().get_connection_stats(),
         }
 
     def setup_schedule(self):
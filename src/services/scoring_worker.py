@@ -0,0 +1,271 @@
+"""
+后台评分模块
+抓取到的新文章经有界队列交给后台线程批量评分，评分结果逐批写回文章存储（即评分进度检查点），
+并通过存储观察者进入发送队列；发送路径只读取已有评分，不再调用模型排序。
+近似重复聚类中只有代表文章（聚类首篇）调用模型评分，其余文章沿用代表的评分
+"""
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+from .local_scorer import load_local_scorer
+from .prefilter import PreFilter
+from .rss_service import RSSItem
+
+logger = setup_logger(__name__)
+
+
+class ScoringWorker:
+    """后台评分工作线程"""
+
+    def __init__(self, cache, summarizer, queue_size: int = None, batch_size: int = None,
+                 prefilter: PreFilter = None):
+        """
+        初始化评分工作线程
+
+        Args:
+            cache: 文章存储（评分结果写回此处）
+            summarizer: 提供score_articles的AI总结器
+            queue_size: 待评分队列容量，默认使用SCORING_QUEUE_SIZE配置
+            batch_size: 每轮最多评分的文章数，默认使用SCORING_WORKER_BATCH_SIZE配置
+            prefilter: 模型评分前的预过滤，默认按PREFILTER_ENABLED配置创建，并接入已训练的本地评分模型
+        """
+        self.cache = cache
+        self.summarizer = summarizer
+        if prefilter is None and Config.PREFILTER_ENABLED:
+            prefilter = PreFilter(model=load_local_scorer())
+        self.prefilter = prefilter
+        self.batch_size = max(1, batch_size or Config.SCORING_WORKER_BATCH_SIZE)
+        self._queue: "queue.Queue[RSSItem]" = queue.Queue(maxsize=queue_size or Config.SCORING_QUEUE_SIZE)
+        self._queued: Set[str] = set()  # 已在队列中的article_key，避免重复入队
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 队列满时丢弃、评分或保存失败、等待聚类代表的文章仍在存储的未评分索引中，下一轮重新读取
+        self._backlog_pending = True
+        self.rescan_interval = Config.SCORING_RESCAN_INTERVAL_SECONDS
+        self.stats: Dict[str, int] = {
+            "enqueued": 0, "scored": 0, "failed": 0, "dropped": 0,
+            "inherited": 0,  # 沿用聚类代表评分、未调用模型的文章数
+            "deferred": 0,  # 聚类代表尚未评分、推迟评分的文章数
+        }
+
+    @staticmethod
+    def needs_scoring(item: RSSItem) -> bool:
+        return not (
+            item.has_quality_score()
+            or item.sent_status
+            or item.send_success
+            or item.excluded_from_sending
+        )
+
+    def enqueue(self, items: Iterable[RSSItem]) -> int:
+        """
+        把新文章加入待评分队列（不阻塞；队列已满的文章留待空闲时从存储补读）
+
+        Returns:
+            实际入队的文章数
+        """
+        added = 0
+        for item in items:
+            if not self.needs_scoring(item):
+                continue
+            key = item.article_key
+            with self._lock:
+                if key in self._queued:
+                    continue
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    self.stats["dropped"] += 1
+                    self._backlog_pending = True
+                    continue
+                self._queued.add(key)
+                self.stats["enqueued"] += 1
+            added += 1
+        return added
+
+    def _refill_from_store(self) -> int:
+        """从存储读取未评分文章（启动时恢复上次的进度，或补回队列满时丢弃的文章）"""
+        with self._lock:
+            if not self._backlog_pending:
+                return 0
+            self._backlog_pending = False
+        added = self.enqueue(self.cache.get_items_needing_quality_check())
+        if added:
+            logger.info(f"📥 从存储恢复 {added} 篇待评分文章")
+        return added
+
+    def _take_batch(self, timeout: float) -> List[RSSItem]:
+        """取出一批文章：等待第一篇，之后不等待地取到批大小为止"""
+        try:
+            batch = [self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def score_pending(self, timeout: float = 0) -> int:
+        """
+        评分一批待评分文章
+
+        Args:
+            timeout: 队列为空时等待新文章的时间（秒）
+
+        Returns:
+            本轮评分的文章数
+        """
+        self._refill_from_store()
+        batch = self._take_batch(timeout)
+        if not batch:
+            return 0
+        with self._lock:
+            for item in batch:
+                self._queued.discard(item.article_key)
+
+        # 排队期间可能已被评分、发送或排除
+        batch = [item for item in batch if self.needs_scoring(item)]
+        if not batch:
+            return 0
+
+        # 预过滤判定明确的文章直接给分，不调用模型
+        to_score = self.prefilter.apply(batch) if self.prefilter is not None else batch
+        pending_ids = {id(item) for item in to_score}
+        scored = self._save_scores([item for item in batch if id(item) not in pending_ids])
+        to_score, followers = self._split_cluster_followers(to_score)
+
+        if to_score:
+            logger.info(f"🎯 后台评分 {len(to_score)} 篇文章（队列剩余 {self._queue.qsize()}）")
+            try:
+                sources: List[str] = []
+                scores = self.summarizer.score_articles(to_score, sources)
+            except Exception as e:
+                logger.error(f"💥 后台评分失败: {e}")
+                with self._lock:
+                    self.stats["failed"] += len(to_score)
+                    self._backlog_pending = True  # 文章仍未评分，稍后从存储重试
+                return scored
+
+            for index, (article, score) in enumerate(zip(to_score, scores)):
+                # 模型调用失败时的规则降级评分标记为heuristic，不作为本地模型的训练标签
+                source = sources[index] if index < len(sources) else "llm"
+                try:
+                    article.set_quality_score(score, source=source)
+                except Exception as e:
+                    logger.error(f"💥 保存文章评分失败: {article.title[:50]}... - {e}")
+                    self._schedule_refill()
+            scored += self._save_scores(to_score)
+
+        scored += self._inherit_cluster_scores(followers)
+        with self._lock:
+            self.stats["scored"] += scored
+        logger.info(f"📈 后台评分完成 {scored} 篇")
+        return scored
+
+    def _split_cluster_followers(self, items: List[RSSItem]) -> Tuple[List[RSSItem], List[Tuple[RSSItem, RSSItem]]]:
+        """
+        分出近似重复聚类中的非代表文章
+
+        Returns:
+            (需要模型评分的文章, [(非代表文章, 聚类代表)])；代表已不在存储中、
+            或已发送/排除且没有评分时，该文章自己调用模型评分
+        """
+        to_score, followers = [], []
+        for item in items:
+            if item.cluster_id and item.cluster_id != item.article_key:
+                representative = self.cache.get_item(item.cluster_id)
+                if representative is not None and (
+                    representative.has_quality_score() or self.needs_scoring(representative)
+                ):
+                    followers.append((item, representative))
+                    continue
+            to_score.append(item)
+        return to_score, followers
+
+    def _inherit_cluster_scores(self, followers: List[Tuple[RSSItem, RSSItem]]) -> int:
+        """非代表文章沿用代表的评分；代表尚未评分的推迟到代表评分之后"""
+        inherited = []
+        deferred = 0
+        for item, representative in followers:
+            if representative.has_quality_score():
+                try:
+                    item.set_quality_score(representative.quality_score, source="cluster")
+                    inherited.append(item)
+                except Exception as e:
+                    logger.error(f"💥 保存文章评分失败: {item.title[:50]}... - {e}")
+                    self._schedule_refill()
+            else:
+                deferred += 1
+                self.enqueue([representative])
+        if deferred:
+            with self._lock:
+                self.stats["deferred"] += deferred
+                self._backlog_pending = True  # 代表评分后从存储重新读取
+        if inherited:
+            logger.info(f"🔗 {len(inherited)} 篇近似重复文章沿用聚类代表的评分，未调用模型")
+            with self._lock:
+                self.stats["inherited"] += len(inherited)
+        return self._save_scores(inherited)
+
+    def _save_scores(self, items: List[RSSItem]) -> int:
+        """落盘评分（即检查点，重启后不再重复评分）；评分已由存储的状态监听写回，这里只需flush"""
+        if items:
+            self.cache.flush()
+        return len(items)
+
+    def start(self):
+        """启动后台评分线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="scoring-worker", daemon=True)
+        self._thread.start()
+        logger.info("后台评分线程已启动")
+
+    def _schedule_refill(self):
+        """下一轮从存储重新读取未评分文章"""
+        with self._lock:
+            self._backlog_pending = True
+
+    def _run(self):
+        last_rescan = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                if not self.score_pending(timeout=1.0) and self._queue.empty():
+                    # 空闲时按较长间隔补查存储中遗漏的未评分文章（如未经enqueue直接入库的文章）
+                    if time.monotonic() - last_rescan >= self.rescan_interval:
+                        last_rescan = time.monotonic()
+                        self._schedule_refill()
+            except Exception as e:
+                logger.error(f"后台评分线程错误: {e}")
+                self._stop_event.wait(timeout=5)
+
+    def stop(self, timeout: float = 5):
+        """停止后台评分线程（当前批次完成后退出）"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["queued"] = self._queue.qsize()
+        if self.prefilter is not None:
+            stats["prefilter"] = self.prefilter.get_stats()
+        stats["running"] = self.is_running
+        return stats
@@ -0,0 +1,136 @@
+"""
+发送优先级队列模块
+按质量评分和新鲜度对合格文章排序，文章评分后入队，发送或排除后惰性失效；
+已从存储删除（清理、删除、清空）或移出活跃时间窗口的文章在出堆时丢弃
+"""
+import heapq
+import itertools
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from ..core.config import Config
+from ..core.utils import setup_logger
+from .rss_service import RSSItem
+
+logger = setup_logger(__name__)
+
+
+class SendQueue:
+    """
+    基于堆的发送优先级队列
+
+    文章优先级为 评分 × 0.5^(文章年龄 / 半衰期)。取对数后为
+    ln(评分) + λ·发布时间戳 - λ·当前时间，其中 λ = ln2 / 半衰期，
+    当前时间对所有文章相同，因此入队时计算的键不会随时间变化，堆无需重建。
+    """
+
+    def __init__(self, cache=None, half_life_hours: float = None):
+        """
+        初始化发送队列
+
+        Args:
+            cache: 文章存储，提供后会注册状态观察者并从存储重建队列
+            half_life_hours: 新鲜度半衰期（小时），0表示只按评分排序
+        """
+        if half_life_hours is None:
+            half_life_hours = Config.SEND_PRIORITY_HALF_LIFE_HOURS
+        self.half_life_hours = half_life_hours
+        self.decay_rate = math.log(2) / (half_life_hours * 3600) if half_life_hours > 0 else 0.0
+
+        self._heap: List[list] = []  # [-优先级, 序号, RSSItem, 是否有效]
+        self._entries: Dict[Tuple[str, str], list] = {}  # (date_key, title_hash) -> 堆条目
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.cache = cache
+
+        if cache is not None:
+            cache.add_state_observer(self.on_item_state_change)
+            self.rebuild(cache.get_send_candidates())
+
+    @staticmethod
+    def is_eligible(item: RSSItem) -> bool:
+        """文章是否应在队列中：已评分、达标、未发送且未排除"""
+        return (
+            item.has_quality_score()
+            and item.meets_quality_requirement()
+            and not (item.sent_status or item.send_success)
+            and not item.excluded_from_sending
+        )
+
+    def is_current(self, item: RSSItem) -> bool:
+        """文章是否仍归存储所有且处于活跃时间窗口（今天和昨天）内；未关联存储时不检查"""
+        if self.cache is None:
+            return True
+        active_since = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        return item.date_key >= active_since and self.cache.get_item(item.article_key) is item
+
+    def priority(self, item: RSSItem) -> float:
+        """计算文章的优先级键（越大越优先）"""
+        return math.log(max(item.quality_score, 1)) + self.decay_rate * item.published.timestamp()
+
+    def push(self, item: RSSItem):
+        """加入或更新文章；不合格的文章会使已有条目失效"""
+        ident = (item.date_key, item.title_hash)
+        with self._lock:
+            if not self.is_eligible(item):
+                self._invalidate(ident)
+                return
+
+            priority = self.priority(item)
+            existing = self._entries.get(ident)
+            if existing is not None and existing[2] is item and existing[0] == -priority:
+                return
+            self._invalidate(ident)
+            entry = [-priority, next(self._counter), item, True]
+            self._entries[ident] = entry
+            heapq.heappush(self._heap, entry)
+
+    def _invalidate(self, ident: Tuple[str, str]):
+        """标记条目失效，等出堆时丢弃"""
+        entry = self._entries.pop(ident, None)
+        if entry is not None:
+            entry[3] = False
+
+    def on_item_state_change(self, item: RSSItem):
+        """存储观察者回调：评分后入队，发送或排除后失效"""
+        self.push(item)
+
+    def rebuild(self, items: List[RSSItem]):
+        """根据存储中的候选文章重建队列"""
+        with self._lock:
+            self._heap = []
+            self._entries = {}
+        for item in items:
+            self.push(item)
+        logger.info(f"发送队列已重建: {len(self)} 篇合格文章")
+
+    def peek(self) -> Optional[RSSItem]:
+        """
+        获取当前优先级最高且可以发送的文章（不出队）
+
+        发送成功、被排除或已不在存储中的条目会自动失效；处于重试等待期的文章暂时跳过，保留在队列中
+        """
+        with self._lock:
+            waiting = []
+            best = None
+            while self._heap:
+                entry = self._heap[0]
+                item = entry[2]
+                if not entry[3] or not self.is_eligible(item) or not self.is_current(item):
+                    heapq.heappop(self._heap)
+                    if entry[3]:
+                        self._entries.pop((item.date_key, item.title_hash), None)
+                    continue
+                if not item.should_retry_send():
+                    waiting.append(heapq.heappop(self._heap))
+                    continue
+                best = item
+                break
+            for entry in waiting:
+                heapq.heappush(self._heap, entry)
+            return best
+
+    def __len__(self) -> int:
+        return len(self._entries)
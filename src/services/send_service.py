@@ -9,7 +9,11 @@ from ..core.config import Config
 from ..core.utils import setup_logger
 from ..integrations.send_service_manager import SendServiceManager
 from .ai_service import Summarizer
+from .image_processor import get_image_processor
+from .image_service import ImageDownloader
 from .multi_rss_manager import MultiRSSManager, RSSItem
+from .scoring_worker import ScoringWorker
+from .send_queue import SendQueue
 
 logger = setup_logger(__name__)
 
@@ -17,11 +21,15 @@ logger = setup_logger(__name__)
 class SendManager:
     """发送管理器 - 控制文章发送策略"""
 
-    def __init__(self):
-        # 使用多RSS管理器替代单一RSS获取器
-        self.multi_rss_manager = MultiRSSManager()
+    def __init__(self, multi_rss_manager: MultiRSSManager = None):
+        # 使用多RSS管理器替代单一RSS获取器，调度器会传入自己的管理器以共用同一份源状态和文章存储
+        self.multi_rss_manager = multi_rss_manager or MultiRSSManager()
+        self.send_queue = SendQueue(self.multi_rss_manager.cache)
         self.summarizer = Summarizer()
+        # 后台评分：新文章评分后通过存储观察者进入发送队列
+        self.scoring_worker = ScoringWorker(self.multi_rss_manager.cache, self.summarizer)
         self.send_service_manager = SendServiceManager()
+        self.image_downloader = ImageDownloader()  # 文章确定发送时才下载图片
         self.last_send_time: Optional[datetime] = None
 
         # 检查是否有启用的发送器
@@ -114,63 +122,43 @@ class SendManager:
         return False
 
     def select_articles_to_send(self, max_count: int = None) -> List[RSSItem]:
-        """选择要发送的文章（添加质量评分筛选，只发送高质量文章）"""
+        """选择要发送的文章（从优先级队列取评分和新鲜度综合最高的一篇，只读取后台已算好的评分）"""
         logger.info("🔍 开始选择文章发送...")
-        
-        # 获取未发送的文章
-        unsent_items = self.multi_rss_manager.cache.get_unsent_items()
 
-        if not unsent_items:
-            logger.warning("⚠️ 没有待发送的文章")
-            return []
-
-        logger.info(f"📝 获取到 {len(unsent_items)} 篇待评分文章")
-        
-        # 对文章进行质量评分筛选
-        logger.info(f"🎯 开始对 {len(unsent_items)} 篇文章进行质量评分...")
-        qualified_articles = []
-
-        for article in unsent_items:
-            try:
-                # 检查是否已有评分，避免重复评分
-                if article.quality_score is None:
-                    logger.info(f"📊 为文章评分: {article.title[:50]}...")
-                    score = self.summarizer.score_article(article)
-                    article.set_quality_score(score)
-                    # 更新缓存中的评分信息
-                    self.multi_rss_manager.cache.update_item_sent_status(article)
-                    logger.info(f"📈 评分完成: {article.title[:30]}... -> {score}/10")
-                else:
-                    score = article.quality_score
-                    logger.info(f"📋 使用已有评分: {article.title[:50]}... (评分: {score}/10)")
-
-                # 只选择评分达到要求的文章
-                if score >= Config.MIN_QUALITY_SCORE:
-                    qualified_articles.append((article, score))
-                    logger.info(f"✅ 文章通过质量检查: {article.title[:50]}... (评分: {score}/10)")
-                else:
-                    logger.info(
-                        f"❌ 文章未达到质量要求: {article.title[:50]}... (评分: {score}/10, 需要: {Config.MIN_QUALITY_SCORE}/10)"
-                    )
+        pending_scoring = len(self.scoring_worker)
+        if pending_scoring:
+            logger.info(f"⏳ 还有 {pending_scoring} 篇文章等待后台评分")
 
-            except Exception as e:
-                logger.error(f"💥 文章评分失败: {article.title[:50]}... - {e}")
-                continue
-
-        if not qualified_articles:
-            logger.warning(f"⚠️ 没有文章达到最低质量要求（{Config.MIN_QUALITY_SCORE}/10分）")
+        best_article = self.send_queue.peek()
+        if not best_article:
+            logger.warning(f"⚠️ 没有可发送的合格文章（最低质量要求 {Config.MIN_QUALITY_SCORE}/10分）")
             return []
 
-        # 按评分排序，选择质量最高的文章
-        qualified_articles.sort(key=lambda x: x[1], reverse=True)
-
-        # 一次只选择一篇质量最高的文章
-        best_article, best_score = qualified_articles[0]
-        selected = [best_article]
+        logger.info(
+            f"🎖️ 选择优先级最高的文章准备发送: {best_article.title[:50]}... "
+            f"(评分: {best_article.quality_score}/10)"
+        )
+        logger.info(f"📊 发送队列中的合格文章: {len(self.send_queue)}")
+        return [best_article]
+
+    def _prepare_article_image(self, article: RSSItem):
+        """下载即将发送的文章的图片并写回存储"""
+        if not article.has_image():
+            return
+        try:
+            if self.image_downloader.materialize_item_image(article):
+                # 提前提交封面转码，与AI总结并行
+                get_image_processor().submit(article.local_image_path, "thumb")
+            self.multi_rss_manager.cache.update_item_sent_status(article)
+        except Exception as e:
+            logger.error(f"准备文章图片失败 {article.title[:30]}...: {e}")
 
-        logger.info(f"🎖️ 选择最高质量文章准备发送: {best_article.title[:50]}... (评分: {best_score}/10)")
-        logger.info(f"📊 质量合格文章总数: {len(qualified_articles)}, 待检查总数: {len(unsent_items)}")
-        return selected
+    @staticmethod
+    def _sender_type(sender_name: str) -> str:
+        """根据发送器选择相应的内容类型"""
+        if sender_name in ("wechat_official", "xiaohongshu"):
+            return sender_name
+        return "wechat"  # wechat 或其他
 
     def send_single_article(self, article: RSSItem) -> bool:
         """发送单篇文章（使用专门的AI总结）"""
@@ -185,34 +173,32 @@ class SendManager:
         try:
             # 记录发送尝试
             article.mark_send_attempt()
-            self.multi_rss_manager.cache.update_item_sent_status(article)
             
             # 获取已启用的发送器
             enabled_senders = self.send_service_manager.get_enabled_senders()
             if not enabled_senders:
                 error_msg = "没有启用的发送器"
                 article.mark_send_failed(error_msg)
-                self.multi_rss_manager.cache.update_item_sent_status(article)
                 logger.warning(f"没有启用的发送器，跳过发送: {article.title}")
                 return False
+
+            self._prepare_article_image(article)
+
+            # 各发送器的内容并发生成
+            summary_futures = {}
+            for sender_name in enabled_senders:
+                sender_type = self._sender_type(sender_name)
+                logger.info(f"为发送器 {sender_name} 生成内容 (类型: {sender_type})")
+                summary_futures[sender_name] = self.summarizer.executor.submit(
+                    self.summarizer.summarize_single_item, article, sender_type
+                )
             
-            # 为每个发送器生成对应的内容并发送
+            # 依次发送各发送器的内容
             send_results = {}
             
             for sender_name in enabled_senders:
                 try:
-                    # 根据发送器类型选择相应的sender_type
-                    if sender_name == "wechat_official":
-                        sender_type = "wechat_official"
-                    elif sender_name == "xiaohongshu":
-                        sender_type = "xiaohongshu"
-                    else:  # wechat 或其他
-                        sender_type = "wechat"
-                    
-                    logger.info(f"为发送器 {sender_name} 生成内容 (类型: {sender_type})")
-                    
-                    # 为该发送器生成专门的内容
-                    summary = self.summarizer.summarize_single_item(article, sender_type)
+                    summary = summary_futures[sender_name].result()
                     
                     if not summary:
                         logger.warning(f"发送器 {sender_name} 的AI总结失败")
@@ -240,7 +226,6 @@ class SendManager:
             if success:
                 # 标记文章为已发送
                 article.mark_as_sent()
-                self.multi_rss_manager.cache.update_item_sent_status(article)
 
                 self.last_send_time = datetime.now()
 
@@ -256,7 +241,6 @@ class SendManager:
                 failed_senders = [k for k, v in send_results.items() if not v] if send_results else ["all"]
                 error_msg = f"发送器失败: {', '.join(failed_senders)}"
                 article.mark_send_failed(error_msg)
-                self.multi_rss_manager.cache.update_item_sent_status(article)
                 logger.error(f"微信发送失败: {article.title} - {error_msg}")
                 return False
 
@@ -264,7 +248,6 @@ class SendManager:
             # 记录发送异常
             error_msg = f"发送异常: {str(e)}"
             article.mark_send_failed(error_msg)
-            self.multi_rss_manager.cache.update_item_sent_status(article)
             logger.error(f"发送文章时出错: {e}")
             return False
 
@@ -315,7 +298,6 @@ class SendManager:
             # 记录所有文章的发送尝试
             for article in articles:
                 article.mark_send_attempt()
-                self.multi_rss_manager.cache.update_item_sent_status(article)
             
             # 获取已启用的发送器
             enabled_senders = self.send_service_manager.get_enabled_senders()
@@ -323,23 +305,18 @@ class SendManager:
                 error_msg = "没有启用的发送器"
                 for article in articles:
                     article.mark_send_failed(error_msg)
-                    self.multi_rss_manager.cache.update_item_sent_status(article)
                 logger.warning("没有启用的发送器，跳过发送")
                 return False
+
+            for article in articles:
+                self._prepare_article_image(article)
             
             # 为每个发送器生成对应的内容并发送
             send_results = {}
             
             for sender_name in enabled_senders:
                 try:
-                    # 根据发送器类型选择相应的sender_type
-                    if sender_name == "wechat_official":
-                        sender_type = "wechat_official"
-                    elif sender_name == "xiaohongshu":
-                        sender_type = "xiaohongshu"
-                    else:  # wechat 或其他
-                        sender_type = "wechat"
-                    
+                    sender_type = self._sender_type(sender_name)
                     logger.info(f"为发送器 {sender_name} 生成批量内容 (类型: {sender_type})")
                     
                     # 为该发送器生成专门的内容
@@ -370,7 +347,6 @@ class SendManager:
                 # 标记文章为已发送
                 for article in articles:
                     article.mark_as_sent()
-                    self.multi_rss_manager.cache.update_item_sent_status(article)
 
                 self.last_send_time = datetime.now()
 
@@ -388,7 +364,6 @@ class SendManager:
                 error_msg = f"批量发送失败: {', '.join(failed_senders)}"
                 for article in articles:
                     article.mark_send_failed(error_msg)
-                    self.multi_rss_manager.cache.update_item_sent_status(article)
                 logger.error(f"微信批量发送失败 - {error_msg}")
                 return False
 
@@ -397,7 +372,6 @@ class SendManager:
             error_msg = f"批量发送异常: {str(e)}"
             for article in articles:
                 article.mark_send_failed(error_msg)
-                self.multi_rss_manager.cache.update_item_sent_status(article)
             logger.error(f"批量发送文章时出错: {e}")
             return False
 
@@ -407,6 +381,9 @@ class SendManager:
 
         return {
             "unsent_articles_count": unsent_count,
+            "send_queue_size": len(self.send_queue),
+            "scoring": self.scoring_worker.get_stats(),
+            "llm_latency": self.summarizer.get_latency_stats(),
             "last_send_time": self.last_send_time.isoformat()
             if self.last_send_time
             else None,
@@ -0,0 +1,60 @@
+"""
+文章综合分析测试
+"""
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from src.core.config import Config
+from src.services.ai_service import Summarizer
+from src.services.rss_service import RSSItem
+
+
+def _completion(text):
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=text))]
+    response.usage = None
+    return response
+
+
+class TestArticleAnalysis:
+
+    def setup_method(self):
+        with patch.object(Config, "OPENAI_API_KEY", "test-key"), \
+             patch.object(Config, "LLM_CACHE_ENABLED", False), \
+             patch("src.services.ai_service.OpenAI"):
+            self.summarizer = Summarizer()
+        self.create = self.summarizer.client.chat.completions.create
+        self.item = RSSItem(
+            "OpenAI releases a new model", "https://example.com/a",
+            "<p>The model is available through the API.</p>", datetime(2024, 1, 1)
+        )
+
+    def test_one_call_serves_score_category_and_tags(self):
+        self.create.return_value = _completion(
+            '```json\n{"score": 8, "category": "科技", "tags": ["人工智能", "大模型"], "language": "EN"}\n```'
+        )
+
+        assert self.summarizer.score_article(self.item) == 8
+        assert self.summarizer.classify_article(self.item) == "科技"
+        assert self.summarizer.generate_tags(self.item) == "人工智能, 大模型"
+        assert self.item.analysis["language"] == "en"
+        assert self.create.call_count == 1
+
+    def test_analysis_is_persisted_with_item(self):
+        self.create.return_value = _completion('{"score": 6, "category": "开发", "tags": ["Python"], "language": "zh"}')
+        self.summarizer.analyze_article(self.item)
+
+        restored = RSSItem.from_dict(self.item.to_dict())
+        assert self.summarizer.classify_article(restored) == "开发"
+        assert self.create.call_count == 1
+
+    def test_invalid_fields_are_normalized(self):
+        analysis = Summarizer._parse_analysis('{"score": "12", "category": "Sports", "tags": "a，b、c, d, e"}')
+        assert analysis == {"score": 10, "category": "其他", "tags": ["a", "b", "c", "d"], "language": "unknown"}
+
+    def test_unparseable_response_falls_back_without_caching(self):
+        self.create.return_value = _completion("无法分析")
+
+        assert self.summarizer.score_article(self.item) == self.summarizer._simple_score_article(self.item)
+        assert self.summarizer.classify_article(self.item) == "Other"
+        assert self.item.analysis is None
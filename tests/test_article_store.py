@@ -0,0 +1,204 @@
+"""
+SQLite文章存储测试
+"""
+
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.services.article_store import SQLiteRSSCache
+from src.services.rss_service import RSSItem
+
+
+class TestSQLiteRSSCache:
+    """SQLite文章存储测试"""
+
+    def setup_method(self) -> None:
+        """测试前设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = SQLiteRSSCache(cache_dir=self.temp_dir)
+
+    def teardown_method(self) -> None:
+        """测试后清理"""
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_wal_mode_enabled(self) -> None:
+        """测试数据库使用WAL模式"""
+        mode = self.cache._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+
+    def test_add_and_check_duplicate(self) -> None:
+        """测试添加和检查重复"""
+        item = RSSItem("测试标题", "https://test.com", "描述", datetime.now())
+
+        assert not self.cache.is_duplicate(item)
+        self.cache.add_item(item)
+        assert self.cache.is_duplicate(item)
+
+    def test_cross_day_duplicate_by_guid(self) -> None:
+        """测试标题改动但guid相同的跨天文章算重复"""
+        today = datetime.now()
+        item1 = RSSItem("测试标题", "https://test.com/a", "描述", today)
+        item1.guid = "guid-1"
+        item2 = RSSItem("测试标题（更新）", "https://test.com/b", "描述", today - timedelta(days=3))
+        item2.guid = "guid-1"
+        item3 = RSSItem("另一篇文章", "https://test.com/c", "描述", today - timedelta(days=3))
+
+        self.cache.add_item(item1)
+        assert self.cache.is_duplicate(item2)
+        assert not self.cache.is_duplicate(item3)
+
+    def test_known_link_checked_against_exact_store(self) -> None:
+        """测试规范化链接索引：变体链接命中，过滤器误判被否决"""
+        item = RSSItem("测试标题", "https://test.com/a/?utm_campaign=x", "描述", datetime.now())
+        self.cache.add_item(item)
+
+        assert self.cache.is_known_link("https://test.com/a")
+        assert not self.cache.is_known_link("https://test.com/b")
+
+    def test_filter_false_positive_is_rejected_by_exact_store(self) -> None:
+        """测试过滤器误判会被精确存储否决并计入统计"""
+        item = RSSItem("从未入库", "https://test.com/x", "描述", datetime.now())
+        self.cache.dedup_filter.add(f"title:{item.title_hash}")
+
+        assert not self.cache.is_duplicate(item)
+        stats = self.cache.get_dedup_stats()
+        assert stats["false_positives"] == 1
+        assert stats["observed_false_positive_rate"] == 1.0
+
+    def test_unsent_items_follow_state_updates(self) -> None:
+        """测试未发送查询随发送状态和评分更新"""
+        now = datetime.now()
+        older = RSSItem("较早文章", "https://test.com/1", "描述", now - timedelta(hours=2))
+        newer = RSSItem("较新文章", "https://test.com/2", "描述", now - timedelta(hours=1))
+        low = RSSItem("低分文章", "https://test.com/3", "描述", now)
+        for item in (older, newer, low):
+            self.cache.add_item(item)
+
+        low.set_quality_score(1)
+        self.cache.update_item_sent_status(low)
+
+        unsent = self.cache.get_unsent_items()
+        assert [item.title for item in unsent] == ["较新文章", "较早文章"]
+
+        newer.mark_as_sent()
+        self.cache.update_item_sent_status(newer)
+        assert [item.title for item in self.cache.get_unsent_items()] == ["较早文章"]
+
+    def test_state_change_persists_without_explicit_update(self) -> None:
+        """测试文章状态变化自动写回存储"""
+        item = RSSItem("测试标题", "https://test.com", "描述", datetime.now())
+        self.cache.add_item(item)
+
+        self.cache.get_unsent_items()[0].mark_as_sent()
+
+        assert self.cache.get_unsent_items() == []
+
+    def test_quality_check_and_excluded_queries(self) -> None:
+        """测试质量检查和排除查询"""
+        scored = RSSItem("已评分", "https://test.com/1", "描述", datetime.now())
+        unscored = RSSItem("未评分", "https://test.com/2", "描述", datetime.now())
+        self.cache.add_item(scored)
+        self.cache.add_item(unscored)
+
+        scored.set_quality_score(9)
+        scored.exclude_from_sending("测试排除")
+        self.cache.update_item_sent_status(scored)
+
+        assert [item.title for item in self.cache.get_items_needing_quality_check()] == ["未评分"]
+        excluded = self.cache.get_excluded_items()
+        assert len(excluded) == 1
+        assert excluded[0].exclusion_reason == "测试排除"
+
+    def test_low_score_written_once(self) -> None:
+        """测试低分评分和随之的排除只写入和通知一次"""
+        item = RSSItem("低分文章", "https://test.com/low", "描述", datetime.now())
+        self.cache.add_item(item)
+        notified = []
+        self.cache.add_state_observer(notified.append)
+
+        with patch.object(self.cache, "update_item_sent_status", wraps=self.cache.update_item_sent_status) as mock_update:
+            item.set_quality_score(2, exclusion_reason="预过滤: 测试")
+        assert mock_update.call_count == 1
+        assert notified == [item]
+        assert self.cache.get_excluded_items()[0].exclusion_reason == "预过滤: 测试"
+
+    def test_cleanup_old_cache(self) -> None:
+        """测试清理过期文章"""
+        old_item = RSSItem("旧文章", "https://test.com/old", "描述", datetime.now() - timedelta(days=10))
+        new_item = RSSItem("新文章", "https://test.com/new", "描述", datetime.now())
+        self.cache.add_item(old_item)
+        self.cache.add_item(new_item)
+
+        self.cache.cleanup_old_cache(keep_days=7)
+
+        assert self.cache.get_daily_stats() == {new_item.date_key: 1}
+        # 去重键按去重窗口保留，清理文章后仍能识别重复
+        assert self.cache.is_duplicate(old_item)
+
+
+class TestJSONMigration:
+    """JSON缓存迁移测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_migrates_existing_json_once(self) -> None:
+        """测试首次打开时导入已有JSON缓存"""
+        item = RSSItem("历史文章", "https://test.com", "描述", datetime.now())
+        item.mark_as_sent()
+        date_key = item.date_key
+        with open(f"{self.temp_dir}/rss_{date_key}.json", "w", encoding="utf-8") as f:
+            json.dump({"date": date_key, "title_hashes": [item.title_hash],
+                       "articles": [item.to_dict()]}, f, ensure_ascii=False)
+
+        cache = SQLiteRSSCache(cache_dir=self.temp_dir)
+        assert cache.is_duplicate(item)
+        assert cache.get_unsent_items() == []
+        assert cache.get_daily_stats() == {date_key: 1}
+        cache.clear()
+        cache.close()
+
+        # 迁移只执行一次
+        reopened = SQLiteRSSCache(cache_dir=self.temp_dir)
+        assert not reopened.is_duplicate(item)
+        reopened.close()
+
+
+class TestSharedStore:
+    """进程内共享文章存储测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SQLiteRSSCache(cache_dir=self.temp_dir)
+
+    def teardown_method(self) -> None:
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_managers_and_fetchers_share_one_store(self) -> None:
+        """测试所有获取器和发送管理器共用同一个存储"""
+        from unittest.mock import patch
+
+        from src.services.multi_rss_manager import MultiRSSManager, RSSSourceStateStore
+        from src.services.send_service import SendManager
+
+        urls = ["https://a.example.com/feed", "https://b.example.com/feed"]
+        with patch("src.services.multi_rss_manager.Config.get_rss_feed_urls", return_value=urls), \
+                patch("src.services.multi_rss_manager.RSSSourceStateStore",
+                      return_value=RSSSourceStateStore(f"{self.temp_dir}/rss_sources.json")), \
+                patch("src.services.multi_rss_manager.get_shared_cache", return_value=self.store), \
+                patch("src.services.send_service.Summarizer"), \
+                patch("src.services.send_service.SendServiceManager"):
+            manager = MultiRSSManager()
+            send_manager = SendManager(multi_rss_manager=manager)
+
+        assert len(manager.fetchers) == 2
+        assert all(fetcher.cache is self.store for fetcher in manager.fetchers.values())
+        assert send_manager.multi_rss_manager.cache is self.store
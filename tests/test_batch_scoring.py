@@ -0,0 +1,125 @@
+"""
+批量文章评分测试
+"""
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from src.core.config import Config
+from src.services.ai_service import Summarizer
+from src.services.rss_service import RSSItem
+
+
+def _completion(text, prompt_tokens=0, completion_tokens=0):
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=text))]
+    response.usage = Mock(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    return response
+
+
+def _analysis(score):
+    return _completion(f'{{"score": {score}, "category": "科技", "tags": ["测试"], "language": "zh"}}')
+
+
+def _items(count):
+    return [
+        RSSItem(f"测试文章{i}", f"https://example.com/{i}", f"<p>文章内容{i}</p>", datetime(2024, 1, 1))
+        for i in range(count)
+    ]
+
+
+class TestBatchScoring:
+
+    def setup_method(self):
+        with patch.object(Config, "OPENAI_API_KEY", "test-key"), \
+             patch.object(Config, "LLM_CACHE_ENABLED", False), \
+             patch("src.services.ai_service.OpenAI"):
+            self.summarizer = Summarizer()
+        self.create = self.summarizer.client.chat.completions.create
+
+    def test_one_call_scores_whole_batch(self):
+        self.create.return_value = _completion(
+            '```json\n[{"id": 1, "score": 8}, {"id": 2, "score": 3}, {"id": 3, "score": 12}]\n```',
+            prompt_tokens=270, completion_tokens=30,
+        )
+
+        assert self.summarizer.score_articles(_items(3)) == [8, 3, 10]
+        assert self.create.call_count == 1
+        stats = self.summarizer.last_scoring_stats
+        assert stats["articles"] == 3
+        assert stats["fallback_articles"] == 0
+        assert stats["tokens_per_article"] == 100
+
+    def test_batch_result_populates_analysis(self):
+        items = _items(2)
+        self.create.return_value = _completion(
+            '[{"id": 1, "score": 8, "category": "开发", "tags": ["Python", "性能"], "language": "EN"},'
+            ' {"id": 2, "score": 4, "category": "Sports", "tags": "体育"}]'
+        )
+
+        assert self.summarizer.score_articles(items) == [8, 4]
+        assert items[0].analysis == {"score": 8, "category": "开发", "tags": ["Python", "性能"], "language": "en"}
+        assert self.summarizer.classify_article(items[1]) == "其他"
+        assert self.summarizer.generate_tags(items[1]) == "体育"
+        assert self.create.call_count == 1
+
+    def test_analyzed_items_are_not_rescored(self):
+        items = _items(2)
+        items[0].analysis = {"score": 9, "category": "科技", "tags": [], "language": "zh"}
+        self.create.return_value = _completion('[{"id": 1, "score": 6, "category": "科技", "tags": [], "language": "zh"}]')
+
+        assert self.summarizer.score_articles(items) == [9, 6]
+        assert "测试文章1" in self.create.call_args.kwargs["messages"][-1]["content"]
+        assert "测试文章0" not in self.create.call_args.kwargs["messages"][-1]["content"]
+
+    def test_missing_items_fall_back_to_single_scoring(self):
+        self.create.side_effect = [
+            _completion('[{"id": 1, "score": 7}, {"id": 3, "score": "bad"}]'),
+            _analysis(6),
+            _analysis(6),
+        ]
+
+        items = _items(3)
+        assert self.summarizer.score_articles(items) == [7, 6, 6]
+        assert items[1].analysis["category"] == "科技"
+        assert self.create.call_count == 3
+        assert self.summarizer.last_scoring_stats["fallback_articles"] == 2
+
+    def test_unparseable_batch_falls_back(self):
+        self.create.side_effect = [_completion("无法评分"), _analysis(5), _analysis(5)]
+
+        sources = []
+        assert self.summarizer.score_articles(_items(2), sources) == [5, 5]
+        assert sources == ["llm", "llm"]
+
+    def test_heuristic_fallback_scores_are_reported(self):
+        items = _items(2)
+        self.create.side_effect = [
+            _completion('[{"id": 1, "score": 8}]'),
+            _completion("无法分析"),
+        ]
+
+        sources = []
+        scores = self.summarizer.score_articles(items, sources)
+        assert scores == [8, self.summarizer._simple_score_article(items[1])]
+        assert sources == ["llm", "heuristic"]
+        assert self.summarizer.last_scoring_stats["heuristic_articles"] == 1
+
+    def test_batches_split_by_item_limit(self):
+        self.create.side_effect = [
+            _completion('[{"id": 1, "score": 1}, {"id": 2, "score": 2}]'),
+            _completion('[{"id": 1, "score": 3}, {"id": 2, "score": 4}]'),
+            _completion('[{"id": 1, "score": 5}]'),
+        ]
+
+        with patch.object(Config, "SCORING_BATCH_MAX_ITEMS", 2):
+            assert self.summarizer.score_articles(_items(5)) == [1, 2, 3, 4, 5]
+        assert self.create.call_count == 3
+
+    def test_batches_split_by_token_budget(self):
+        items = _items(4)
+        for item in items:
+            item.description = "内容" * 200  # 每篇约400个token
+
+        with patch.object(Config, "SCORING_BATCH_TOKEN_BUDGET", 1200):
+            batches = self.summarizer._plan_scoring_batches(items)
+        assert [len(batch) for batch in batches] == [2, 2]
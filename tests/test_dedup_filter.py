@@ -0,0 +1,81 @@
+"""
+跨天去重过滤器测试
+"""
+
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.services.dedup_filter import RotatingBloomFilter
+
+
+class TestRotatingBloomFilter:
+    """轮转布隆过滤器测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = str(Path(self.temp_dir) / "dedup.bloom")
+
+    def teardown_method(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def _filter(self) -> RotatingBloomFilter:
+        return RotatingBloomFilter(self.path, window_days=90, slices=6,
+                                   items_per_day=100, false_positive_rate=0.001)
+
+    def test_no_false_negatives(self) -> None:
+        """测试加入的键一定能查到"""
+        bloom = self._filter()
+        keys = [f"title:{i}" for i in range(2000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(bloom.might_contain(key) for key in keys)
+
+    def test_false_positive_rate_within_target(self) -> None:
+        """测试容量内的误判率接近目标"""
+        bloom = self._filter()
+        for i in range(1500):
+            bloom.add(f"title:{i}")
+
+        false_hits = sum(bloom.might_contain(f"other:{i}") for i in range(20000))
+        assert false_hits / 20000 < 0.01
+        assert bloom.get_stats()["estimated_false_positive_rate"] < 0.01
+
+    def test_persist_and_reload(self) -> None:
+        """测试保存后重新加载"""
+        bloom = self._filter()
+        bloom.add("guid:abc")
+        bloom.save()
+
+        reloaded = self._filter()
+        assert not reloaded.is_new
+        assert reloaded.might_contain("guid:abc")
+        assert not reloaded.might_contain("guid:def")
+
+    def test_parameter_change_rebuilds(self) -> None:
+        """测试参数变化后丢弃旧文件"""
+        bloom = self._filter()
+        bloom.add("guid:abc")
+        bloom.save()
+
+        resized = RotatingBloomFilter(self.path, window_days=90, slices=6,
+                                      items_per_day=1000, false_positive_rate=0.001)
+        assert resized.is_new
+        assert not resized.might_contain("guid:abc")
+
+    def test_keys_expire_after_window(self) -> None:
+        """测试超过去重窗口的分片被丢弃"""
+        bloom = self._filter()
+        now = time.time()
+        with patch("src.services.dedup_filter.time.time", return_value=now - 120 * 86400):
+            bloom.add("title:old")
+        with patch("src.services.dedup_filter.time.time", return_value=now - 30 * 86400):
+            bloom.add("title:recent")
+        bloom.add("title:new")
+
+        assert not bloom.might_contain("title:old")
+        assert bloom.might_contain("title:recent")
+        assert bloom.might_contain("title:new")
@@ -0,0 +1,112 @@
+"""RSS并发抓取引擎测试"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from src.services.feed_fetch_engine import AsyncFeedFetchEngine
+
+
+def _source(url: str, name: str):
+    return SimpleNamespace(url=url, name=name)
+
+
+class TestAsyncFeedFetchEngine:
+    """抓取引擎测试"""
+
+    def test_results_in_completion_order(self) -> None:
+        """测试慢源不阻塞快源的结果"""
+        engine = AsyncFeedFetchEngine(max_concurrency=4, per_host_limit=4, timeout=5)
+        sources = [_source("https://slow.example.com/feed", "slow"),
+                   _source("https://fast.example.com/feed", "fast")]
+
+        def fetch(source, timeout, cancellation):
+            time.sleep(0.3 if source.name == "slow" else 0.01)
+            return [source.name]
+
+        results = engine.fetch_all(sources, fetch)
+        assert [source.name for source, _ in results] == ["fast", "slow"]
+        engine.shutdown()
+
+    def test_per_host_limit(self) -> None:
+        """测试同一主机的并发数受限"""
+        engine = AsyncFeedFetchEngine(max_concurrency=8, per_host_limit=2, timeout=5)
+        sources = [_source(f"https://same.example.com/feed{i}", f"s{i}") for i in range(6)]
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+
+        def fetch(source, timeout, cancellation):
+            with lock:
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+            time.sleep(0.05)
+            with lock:
+                state["current"] -= 1
+            return []
+
+        engine.fetch_all(sources, fetch)
+        assert state["peak"] <= 2
+        engine.shutdown()
+
+    def test_timeout_reports_error(self) -> None:
+        """测试超时的源触发错误回调并返回空结果，超时时间传给抓取函数"""
+        engine = AsyncFeedFetchEngine(max_concurrency=2, per_host_limit=2, timeout=0.1)
+        errors = []
+        timeouts = []
+
+        committed = []
+        finished = threading.Event()
+
+        def fetch(source, timeout, cancellation):
+            timeouts.append(timeout)
+            time.sleep(0.3)
+            committed.append(cancellation.commit())
+            finished.set()
+            return ["late"]
+
+        results = engine.fetch_all(
+            [_source("https://hang.example.com/feed", "hang")],
+            fetch,
+            on_error=lambda source, error: errors.append(source.name),
+        )
+
+        assert results[0][1] == []
+        assert errors == ["hang"]
+        assert timeouts == [0.1]
+        assert finished.wait(2)
+        assert committed == [False]
+        engine.shutdown()
+
+    def test_committed_fetch_is_not_cancelled(self) -> None:
+        """测试超时前已开始写入的抓取不被取消，引擎等待写入完成并返回结果"""
+        engine = AsyncFeedFetchEngine(max_concurrency=2, per_host_limit=2, timeout=0.1)
+        errors = []
+
+        def fetch(source, timeout, cancellation):
+            assert cancellation.commit()
+            time.sleep(0.3)
+            return ["written"]
+
+        results = engine.fetch_all(
+            [_source("https://slow.example.com/feed", "slow")],
+            fetch,
+            on_error=lambda source, error: errors.append(source.name),
+        )
+
+        assert results[0][1] == ["written"]
+        assert errors == []
+        engine.shutdown()
+
+    def test_busy_host_does_not_hold_global_slots(self) -> None:
+        """测试等待繁忙主机的任务不占用全局并发名额"""
+        engine = AsyncFeedFetchEngine(max_concurrency=2, per_host_limit=1, timeout=5)
+        sources = [_source(f"https://busy.example.com/feed{i}", f"busy{i}") for i in range(3)]
+        sources.append(_source("https://other.example.com/feed", "other"))
+
+        def fetch(source, timeout, cancellation):
+            time.sleep(0.01 if source.name == "other" else 0.2)
+            return [source.name]
+
+        results = engine.fetch_all(sources, fetch)
+        assert results[0][0].name == "other"
+        engine.shutdown()
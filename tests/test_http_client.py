@@ -0,0 +1,70 @@
+"""共享HTTP客户端测试"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+from src.core import http_client
+from src.core.http_client import HttpClient, get_direct_http_client, get_http_client
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = self.headers.get("Accept-Encoding", "").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClient:
+    """HTTP客户端测试"""
+
+    def setup_method(self) -> None:
+        """启动本地keep-alive服务器"""
+        self.server = HTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/feed"
+
+    def teardown_method(self) -> None:
+        """关闭服务器"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self) -> None:
+        """测试同一主机的连续请求复用连接"""
+        client = HttpClient(proxies={})
+        for _ in range(3):
+            response = client.get(self.url, timeout=5)
+            assert response.status_code == 200
+
+        stats = client.get_connection_stats()
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 2
+        client.close()
+
+    def test_accepts_compression(self) -> None:
+        """测试请求头声明支持gzip压缩"""
+        client = HttpClient(proxies={})
+        response = client.get(self.url, timeout=5)
+        assert "gzip" in response.text
+        client.close()
+
+    def test_shared_instance(self) -> None:
+        """测试共享实例为单例"""
+        assert get_http_client() is get_http_client()
+
+    def test_direct_client_ignores_configured_proxy(self) -> None:
+        """测试微信接口使用的直连客户端不使用配置的代理"""
+        with patch.object(http_client, "_direct_client", None), \
+             patch("src.core.http_client.Config.get_proxies", return_value={"https": "http://proxy:8080"}):
+            client = get_direct_http_client()
+            assert client is get_direct_http_client()
+            assert client is not get_http_client()
+            assert client.session.proxies == {}
@@ -0,0 +1,89 @@
+"""
+图片转码测试
+"""
+
+import os
+import random
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.image_processor import MEDIA_BYTE_BUDGETS, ImageProcessor, transcode_image
+from src.services.image_store import ImageStore
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _noisy_image(path: str, width: int = 1600, height: int = 1000) -> str:
+    """生成难以压缩的大图"""
+    rng = random.Random(0)
+    image = Image.frombytes("RGB", (width, height), bytes(rng.getrandbits(8) for _ in range(width * height * 3)))
+    image.save(path, format="PNG")
+    return path
+
+
+class TestTranscode:
+    """转码与质量搜索测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_thumb_fits_budget_and_width(self) -> None:
+        """测试封面被缩放并压缩到64KB以内"""
+        source = _noisy_image(os.path.join(self.temp_dir, "big.png"))
+
+        data = transcode_image(source, max_width=460, max_bytes=MEDIA_BYTE_BUDGETS["thumb"])
+
+        assert data is not None
+        assert len(data) <= MEDIA_BYTE_BUDGETS["thumb"]
+        output = os.path.join(self.temp_dir, "out.jpg")
+        with open(output, "wb") as f:
+            f.write(data)
+        with Image.open(output) as image:
+            assert image.format == "JPEG"
+            assert image.width <= 460
+
+    def test_transparent_png_is_flattened(self) -> None:
+        """测试带透明通道的PNG转成JPEG"""
+        source = os.path.join(self.temp_dir, "alpha.png")
+        Image.new("RGBA", (200, 100), (255, 0, 0, 0)).save(source)
+
+        assert transcode_image(source, max_width=460, max_bytes=MEDIA_BYTE_BUDGETS["thumb"])
+
+
+class TestImageProcessor:
+    """转码器缓存和进程池测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = ImageStore(os.path.join(self.temp_dir, "store"), max_bytes=0)
+        self.processor = ImageProcessor(store=self.store, max_workers=1)
+
+    def teardown_method(self) -> None:
+        self.processor.shutdown()
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_small_jpeg_used_as_is(self) -> None:
+        """测试已满足限制的JPEG无需转码"""
+        source = os.path.join(self.temp_dir, "small.jpg")
+        Image.new("RGB", (100, 100), (0, 128, 255)).save(source, format="JPEG")
+
+        assert self.processor.prepare(source, "thumb") == source
+
+    def test_variant_cached_by_content(self) -> None:
+        """测试转码结果按内容哈希缓存，相同内容只转码一次"""
+        source = _noisy_image(os.path.join(self.temp_dir, "big.png"), 800, 500)
+        copy = os.path.join(self.temp_dir, "copy.png")
+        shutil.copy(source, copy)
+
+        first = self.processor.prepare(source, "thumb")
+        second = self.processor.prepare(copy, "thumb")
+
+        assert first and first == second
+        assert os.path.getsize(first) <= MEDIA_BYTE_BUDGETS["thumb"]
+        assert self.store.get_stats()["files"] == 1
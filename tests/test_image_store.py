@@ -0,0 +1,116 @@
+"""
+内容寻址图片存储测试
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from src.services.image_service import ImageDownloader
+from src.services.image_store import ImageStore, get_image_store
+
+
+class TestImageStore:
+    """图片存储测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = ImageStore(self.temp_dir, max_bytes=100)
+
+    def teardown_method(self) -> None:
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_same_content_stored_once(self) -> None:
+        """测试相同内容的不同URL只保存一份"""
+        path_a = self.store.put("https://a.com/1.jpg", [b"same", b"-bytes"])
+        path_b = self.store.put("https://b.com/2.jpg", [b"same-bytes"])
+
+        assert path_a == path_b
+        assert self.store.lookup("https://b.com/2.jpg") == path_a
+        stats = self.store.get_stats()
+        assert stats["files"] == 1
+        assert stats["urls"] == 2
+        assert stats["total_bytes"] == len(b"same-bytes")
+
+    def test_oversized_content_is_rejected(self) -> None:
+        """测试超过单文件上限的内容不写入"""
+        assert self.store.put("https://a.com/big.jpg", [b"x" * 10, b"x" * 10], max_size=15) is None
+        assert self.store.get_stats()["files"] == 0
+        assert [p.name for p in Path(self.temp_dir).iterdir() if p.name.startswith(".tmp")] == []
+
+    def test_lru_eviction_keeps_recently_used(self) -> None:
+        """测试超出容量时淘汰最久未访问的图片"""
+        old = self.store.put("https://a.com/old.jpg", [b"o" * 40])
+        used = self.store.put("https://a.com/used.jpg", [b"u" * 40])
+        self.store._conn.execute("UPDATE blobs SET last_access = last_access - 100")
+        self.store.lookup("https://a.com/used.jpg")
+
+        self.store.put("https://a.com/new.jpg", [b"n" * 40])
+
+        assert not os.path.exists(old)
+        assert self.store.lookup("https://a.com/old.jpg") is None
+        assert self.store.lookup("https://a.com/used.jpg") == used
+        assert self.store.total_bytes() == 80
+
+    def test_cleanup_by_last_access(self) -> None:
+        """测试按最近访问时间清理"""
+        path = self.store.put("https://a.com/1.jpg", [b"data"])
+        self.store._conn.execute("UPDATE blobs SET last_access = ?", (time.time() - 3 * 86400,))
+
+        assert self.store.cleanup(days=2) == 1
+        assert not os.path.exists(path)
+        assert self.store.lookup("https://a.com/1.jpg") is None
+
+    def test_legacy_files_imported_once(self) -> None:
+        """测试旧版文件名的图片首次打开时并入存储"""
+        legacy_dir = Path(self.temp_dir) / "legacy"
+        legacy_dir.mkdir()
+        (legacy_dir / "abc_photo.jpg").write_bytes(b"legacy")
+
+        store = ImageStore(str(legacy_dir), max_bytes=0)
+        assert store.get_stats()["files"] == 1
+        assert not (legacy_dir / "abc_photo.jpg").exists()
+        store.close()
+
+
+class TestImageDownloaderStore:
+    """图片下载器使用内容寻址存储测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_second_download_of_same_url_hits_cache(self) -> None:
+        """测试同一URL第二次下载直接命中缓存"""
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.headers = {"content-type": "image/png"}
+        response.iter_content.return_value = [b"png-bytes"]
+        http_client = MagicMock()
+        http_client.get.return_value = response
+
+        downloader = ImageDownloader(download_dir=self.temp_dir, http_client=http_client)
+        first = downloader.download_image("https://cdn.example.com/image")
+        second = downloader.download_image("https://cdn.example.com/image")
+
+        assert first == second
+        assert first.endswith(".png")
+        assert http_client.get.call_count == 1
+        downloader.store.close()
+
+    def test_shared_store_per_directory(self) -> None:
+        """测试同一目录的图片下载器共用一个存储，关闭后重新打开"""
+        store_dir = os.path.join(self.temp_dir, "shared")
+        shared = get_image_store(store_dir)
+
+        assert ImageDownloader(download_dir=store_dir).store is shared
+        shared.close()
+        reopened = get_image_store(store_dir)
+        assert reopened is not shared
+        reopened.close()
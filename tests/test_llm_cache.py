@@ -0,0 +1,130 @@
+"""
+LLM响应缓存测试
+"""
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from src.core.config import Config
+from src.services.ai_service import Summarizer
+from src.services.llm_cache import LLMResponseCache, make_cache_key
+from src.services.rss_service import RSSItem
+
+
+def _completion(text):
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=text))]
+    return response
+
+
+def _stream(text):
+    return [Mock(usage=None, choices=[Mock(delta=Mock(content=text))])]
+
+
+class TestLLMResponseCache:
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = str(Path(self.temp_dir) / "llm_responses.db")
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_key_covers_all_request_parameters(self):
+        base = make_cache_key("deepseek-chat", "system", "prompt", 20, 0.1, "wechat")
+        assert base == make_cache_key("deepseek-chat", "system", "prompt", 20, 0.1, "wechat")
+        assert base != make_cache_key("deepseek-chat", "system", "prompt", 20, 0.1, "wechat_official")
+        assert base != make_cache_key("deepseek-chat", "system", "prompt", 30, 0.1, "wechat")
+        assert base != make_cache_key("deepseek-chat", "system", "prompt", 20, 0.8, "wechat")
+        assert base != make_cache_key("other-model", "system", "prompt", 20, 0.1, "wechat")
+
+    def test_hit_and_miss_counters(self):
+        cache = LLMResponseCache(self.db_path, ttl_seconds=0, max_bytes=0)
+        assert cache.get("k") is None
+        cache.put("k", "8", "deepseek-chat")
+        assert cache.get("k") == "8"
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+        cache.close()
+
+    def test_persisted_across_instances(self):
+        cache = LLMResponseCache(self.db_path, ttl_seconds=0, max_bytes=0)
+        cache.put("k", "summary")
+        cache.close()
+
+        reopened = LLMResponseCache(self.db_path, ttl_seconds=0, max_bytes=0)
+        assert reopened.get("k") == "summary"
+        reopened.close()
+
+    def test_expired_entries_are_misses(self):
+        cache = LLMResponseCache(self.db_path, ttl_seconds=60, max_bytes=0)
+        cache.put("k", "summary")
+        with patch("src.services.llm_cache.time.time", return_value=time.time() + 120):
+            assert cache.get("k") is None
+        assert cache.get_stats()["entries"] == 0
+        cache.close()
+
+    def test_lru_eviction(self):
+        cache = LLMResponseCache(self.db_path, ttl_seconds=0, max_bytes=20)
+        cache.put("a", "x" * 8)
+        time.sleep(0.01)
+        cache.put("b", "y" * 8)
+        time.sleep(0.01)
+        assert cache.get("a") == "x" * 8  # a变为最近访问
+        time.sleep(0.01)
+        cache.put("c", "z" * 8)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "x" * 8
+        assert cache.get("c") == "z" * 8
+        cache.close()
+
+
+class TestSummarizerResponseCache:
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = LLMResponseCache(str(Path(self.temp_dir) / "llm_responses.db"), ttl_seconds=0, max_bytes=0)
+        with patch.object(Config, "OPENAI_API_KEY", "test-key"), \
+             patch("src.services.ai_service.OpenAI"):
+            self.summarizer = Summarizer(response_cache=self.cache)
+        self.create = self.summarizer.client.chat.completions.create
+        self.item = RSSItem(
+            title="测试文章标题", link="https://example.com/a",
+            description="<p>文章内容</p>", published=datetime(2024, 1, 1)
+        )
+
+    def teardown_method(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_repeated_scoring_uses_cache(self):
+        self.create.return_value = _completion('{"score": 8, "category": "科技", "tags": [], "language": "zh"}')
+        same_article = RSSItem(self.item.title, self.item.link, self.item.description, self.item.published)
+
+        assert self.summarizer.score_article(self.item) == 8
+        assert self.summarizer.score_article(same_article) == 8
+        assert self.create.call_count == 1
+        assert self.summarizer.get_cache_stats()["hits"] == 1
+
+    def test_summary_cached_per_sender_type(self):
+        self.create.side_effect = lambda **kwargs: _stream("总结内容") if kwargs.get("stream") else _completion("总结内容")
+
+        self.summarizer.summarize_single_item(self.item, "wechat")
+        self.summarizer.summarize_single_item(self.item, "wechat")
+        self.summarizer.summarize_single_item(self.item, "xiaohongshu")
+        assert self.create.call_count == 2
+
+    def test_failed_calls_are_not_cached(self):
+        self.create.side_effect = [
+            Exception("timeout"),
+            _completion('{"score": 8, "category": "科技", "tags": [], "language": "zh"}'),
+        ]
+
+        assert self.summarizer.classify_article(self.item) == "Other"
+        assert self.summarizer.classify_article(self.item) == "科技"
+        assert self.create.call_count == 2
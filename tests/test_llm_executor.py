@@ -0,0 +1,133 @@
+"""
+LLM并发执行和速率限制测试
+"""
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import openai
+import pytest
+
+from src.services.llm_executor import LLMExecutor, TokenBucket, retry_after_seconds
+
+
+def _rate_limit_error(headers):
+    response = Mock(status_code=429, headers=headers)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def _response(prompt_tokens, completion_tokens):
+    return Mock(usage=Mock(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens))
+
+
+class TestTokenBucket:
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 每秒补充10个
+        assert bucket.acquire(1, timeout=0)
+        assert bucket.acquire(1, timeout=0)
+        assert not bucket.acquire(1, timeout=0)
+
+        started = time.monotonic()
+        assert bucket.acquire(1)
+        assert time.monotonic() - started >= 0.05
+
+    def test_unlimited(self):
+        bucket = TokenBucket(rate_per_minute=0)
+        for _ in range(1000):
+            assert bucket.acquire(100, timeout=0)
+
+    def test_adjust_refunds_and_debits(self):
+        bucket = TokenBucket(rate_per_minute=60, capacity=100)
+        assert bucket.acquire(100, timeout=0)
+        bucket.adjust(40)
+        assert bucket.acquire(40, timeout=0)
+        bucket.adjust(-50)
+        assert bucket.available < 0
+
+
+class TestRetryAfter:
+
+    def test_seconds_header(self):
+        assert retry_after_seconds(_rate_limit_error({"retry-after": "3"})) == 3
+
+    def test_milliseconds_header(self):
+        assert retry_after_seconds(_rate_limit_error({"retry-after-ms": "250"})) == 0.25
+
+    def test_missing_header(self):
+        assert retry_after_seconds(_rate_limit_error({})) is None
+
+
+class TestLLMExecutor:
+
+    def test_retries_after_rate_limit(self):
+        executor = LLMExecutor(max_workers=2, requests_per_minute=0, tokens_per_minute=0, max_retries=2)
+        request = Mock(side_effect=[_rate_limit_error({"retry-after": "0.2"}), _response(10, 5)])
+
+        started = time.monotonic()
+        executor.call(request)
+
+        assert request.call_count == 2
+        assert time.monotonic() - started >= 0.2
+        assert executor.stats["rate_limited"] == 1
+        assert executor.stats["retries"] == 1
+
+    def test_rate_limit_raised_after_max_retries(self):
+        executor = LLMExecutor(max_workers=1, requests_per_minute=0, tokens_per_minute=0, max_retries=1)
+        request = Mock(side_effect=_rate_limit_error({"retry-after": "0"}))
+
+        with pytest.raises(openai.RateLimitError):
+            executor.call(request)
+        assert request.call_count == 2
+
+    def test_token_budget_reconciled_with_usage(self):
+        executor = LLMExecutor(max_workers=1, requests_per_minute=0, tokens_per_minute=1000, max_retries=0)
+
+        executor.call(lambda: _response(100, 20), estimated_tokens=500)
+
+        assert executor.stats["prompt_tokens"] == 100
+        assert executor.stats["completion_tokens"] == 20
+        assert executor.token_bucket.available == pytest.approx(880, abs=5)
+
+    def test_map_runs_concurrently(self):
+        executor = LLMExecutor(max_workers=4, requests_per_minute=0, tokens_per_minute=0)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work(value):
+            with lock:
+                active.append(value)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(value)
+            return value * 2
+
+        try:
+            assert executor.map(work, range(8)) == [0, 2, 4, 6, 8, 10, 12, 14]
+        finally:
+            executor.shutdown()
+        assert max(peak) > 1
+
+    def test_request_rate_enforced(self):
+        executor = LLMExecutor(max_workers=4, requests_per_minute=600, tokens_per_minute=0)
+        executor.request_bucket = TokenBucket(600, capacity=1)  # 每秒10个请求，不允许突发
+
+        started = time.monotonic()
+        try:
+            executor.map(lambda _: executor.call(lambda: _response(1, 1)), range(4))
+        finally:
+            executor.shutdown()
+        assert time.monotonic() - started >= 0.25
+
+    def test_shutdown_without_cancel_futures_on_python38(self):
+        executor = LLMExecutor(max_workers=2, requests_per_minute=0, tokens_per_minute=0)
+        executor.map(lambda value: value, range(2))
+        pool = executor._pool
+
+        with patch("src.core.utils.sys") as mock_sys, \
+             patch.object(pool, "shutdown", wraps=pool.shutdown) as mock_shutdown:
+            mock_sys.version_info = (3, 8, 18)
+            executor.shutdown()
+        mock_shutdown.assert_called_once_with(wait=False)
@@ -0,0 +1,114 @@
+"""
+流式总结测试
+"""
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.core.config import Config
+from src.services.ai_service import Summarizer
+from src.services.llm_stream import LatencyRecorder, MalformedOutputError, StreamValidator, consume_stream
+from src.services.rss_service import RSSItem
+
+WELL_FORMED = "[TITLE]\n一文看懂新模型\n\n[CONTENT]\n## 概述摘要\n新模型发布，性能大幅提升。\n"
+
+
+class _Stream:
+    """模拟流式响应，记录读取了多少数据块"""
+
+    def __init__(self, pieces, usage=None):
+        self.pieces = pieces
+        self.usage = usage
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.consumed += 1
+            yield Mock(usage=None, choices=[Mock(delta=Mock(content=piece))])
+        yield Mock(usage=self.usage, choices=[])
+
+    def close(self):
+        self.closed = True
+
+
+def _pieces(text, size=10):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStreamValidator:
+
+    def test_well_formed_output_passes(self):
+        validator = StreamValidator("wechat_official")
+        text = ""
+        for piece in _pieces(WELL_FORMED + "正文内容。" * 200):
+            text += piece
+            assert validator.check(text) is None
+
+    def test_missing_marker_detected(self):
+        assert "[TITLE]" in StreamValidator("wechat_official").check("好的，以下是文章内容。" * 30)
+
+    def test_non_chinese_output_detected(self):
+        assert StreamValidator("wechat").check("Here is the summary of the article. " * 10) == "输出不是中文"
+
+    def test_repeated_lines_detected(self):
+        assert StreamValidator("wechat").check("中文内容\n" + "重复的句子。\n" * 4) is not None
+
+
+class TestConsumeStream:
+
+    def test_records_ttft_and_throughput(self):
+        result = consume_stream(_Stream(_pieces(WELL_FORMED), usage=Mock(completion_tokens=40)), 0.0)
+        assert result.text == WELL_FORMED
+        assert result.ttft > 0
+        assert result.tokens_per_second > 0
+
+    def test_aborts_early_on_malformed_output(self):
+        stream = _Stream(_pieces("Sorry, I can not help with that request. " * 50))
+        with pytest.raises(MalformedOutputError):
+            consume_stream(stream, 0.0, StreamValidator("wechat_official"))
+        assert stream.closed
+        assert stream.consumed < len(stream.pieces)
+
+
+class TestLatencyRecorder:
+
+    def test_percentiles_per_sender_type(self):
+        recorder = LatencyRecorder()
+        for ttft in (0.1, 0.2, 0.3, 0.4):
+            recorder.record("wechat_official", ttft, 50.0)
+        recorder.record("xiaohongshu", None, aborted=True)
+
+        stats = recorder.get_stats()
+        assert stats["wechat_official"]["calls"] == 4
+        assert stats["wechat_official"]["ttft_p50"] == 0.25
+        assert stats["wechat_official"]["tokens_per_second_p90"] == 50.0
+        assert stats["xiaohongshu"] == {"calls": 1, "aborted": 1}
+
+
+class TestStreamingSummary:
+
+    def setup_method(self):
+        with patch.object(Config, "OPENAI_API_KEY", "test-key"), \
+             patch.object(Config, "LLM_CACHE_ENABLED", False), \
+             patch("src.services.ai_service.OpenAI"):
+            self.summarizer = Summarizer()
+        self.create = self.summarizer.client.chat.completions.create
+        self.item = RSSItem("New model released", "https://example.com/a", "<p>内容</p>", datetime(2024, 1, 1))
+
+    def test_malformed_stream_is_retried(self):
+        malformed = _Stream(_pieces("I am sorry, but I cannot write this article. " * 50))
+        self.create.side_effect = [malformed, _Stream(_pieces(WELL_FORMED))]
+
+        with patch.object(Config, "SUMMARY_STREAMING_ENABLED", True), \
+             patch.object(Config, "SUMMARY_STREAM_RETRIES", 1):
+            summary = self.summarizer.summarize_single_item(self.item, "wechat_official")
+
+        assert "一文看懂新模型" in summary
+        assert self.create.call_count == 2
+        assert self.create.call_args.kwargs["stream"] is True
+        assert malformed.consumed < len(malformed.pieces)
+        stats = self.summarizer.get_latency_stats()["wechat_official"]
+        assert stats["calls"] == 2 and stats["aborted"] == 1
+        assert "ttft_p50" in stats
@@ -0,0 +1,97 @@
+"""
+本地评分模型测试
+"""
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.core.config import Config
+from src.services.local_scorer import LocalScorer, extract_features
+from src.services.prefilter import PreFilter
+from src.services.rss_service import RSSItem
+
+GOOD_TOPICS = ["开源大模型发布", "推理框架性能测试", "芯片架构深度解析", "编译器优化实践"]
+BAD_TOPICS = ["明星八卦绯闻", "购物节优惠券", "星座运势预测", "娱乐圈花边新闻"]
+
+
+def _item(title: str, description: str, score: int = None) -> RSSItem:
+    item = RSSItem(title, f"https://test.com/{title}", description, datetime.now())
+    if score is not None:
+        item.quality_score = score
+    return item
+
+
+def _training_items():
+    items = []
+    for i in range(30):
+        for topic in GOOD_TOPICS:
+            items.append(_item(f"{topic}第{i}期", f"关于{topic}的技术分析，包含基准数据和源码解读。", 9))
+        for topic in BAD_TOPICS:
+            items.append(_item(f"{topic}第{i}期", f"今日{topic}汇总，点击查看更多精彩内容。", 2))
+    return items
+
+
+class TestLocalScorer:
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.model, self.metrics = LocalScorer.train(_training_items(), n_features=2 ** 14)
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_features_are_deterministic_and_normalized(self):
+        item = _item("Open Source LLM 发布", "<p>新版本发布</p>")
+        indices, values = extract_features(item, 2 ** 14)
+        again_indices, again_values = extract_features(item, 2 ** 14)
+
+        assert list(indices) == list(again_indices)
+        assert abs(float(values @ values) - 1.0) < 1e-9
+        assert list(values) == list(again_values)
+
+    def test_learns_to_separate_scores(self):
+        good_score, good_confidence = self.model.predict(
+            _item("开源大模型发布新版", "关于开源大模型发布的技术分析，包含基准数据。")
+        )
+        bad_score, bad_confidence = self.model.predict(
+            _item("明星八卦绯闻合集", "今日明星八卦绯闻汇总，点击查看更多精彩内容。")
+        )
+
+        assert good_score >= Config.MIN_QUALITY_SCORE
+        assert bad_score < Config.MIN_QUALITY_SCORE
+        assert good_confidence > 0.9 and bad_confidence > 0.9
+        assert self.metrics["decision_agreement"] == 1.0
+
+    def test_unfamiliar_articles_have_low_confidence(self):
+        _, confidence = self.model.predict(_item("Quarterly report", "Revenue grew in the last quarter."))
+        assert confidence < 0.9
+
+    def test_prediction_is_fast(self):
+        item = _item("推理框架性能测试新版", "关于推理框架性能测试的技术分析。")
+        start = time.perf_counter()
+        for _ in range(100):
+            self.model.predict(item)
+        assert (time.perf_counter() - start) / 100 < 0.001
+
+    def test_save_and_load_roundtrip(self):
+        path = Path(self.temp_dir) / "scorer.npz"
+        self.model.save(str(path))
+        loaded = LocalScorer.load(str(path))
+
+        item = _item("芯片架构深度解析续", "关于芯片架构深度解析的技术分析。")
+        assert loaded.trained_samples == self.model.trained_samples
+        assert abs(loaded.predict(item)[0] - self.model.predict(item)[0]) < 1e-4
+
+    def test_prefilter_escalates_uncertain_predictions(self):
+        prefilter = PreFilter(rules={}, model=self.model)
+        prefilter.min_content_length = 0
+        prefilter.model_confidence = 0.9
+        confident = _item("星座运势预测大全", "今日星座运势预测汇总，点击查看更多精彩内容。")
+        uncertain = _item("Quarterly report", "Revenue grew in the last quarter for the company.")
+
+        assert prefilter.apply([confident, uncertain]) == [uncertain]
+        assert confident.score_source == "local_model"
+        assert prefilter.get_stats()["model_decided"] == 1
+        assert prefilter.get_stats()["model_escalated"] == 1
@@ -0,0 +1,242 @@
+"""
+近似重复检测测试
+"""
+
+import random
+import shutil
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+
+from src.services.article_store import SQLiteRSSCache
+from src.services.near_duplicate import (
+    NearDuplicateIndex,
+    clean_text,
+    compute_signatures,
+    hamming_distance,
+)
+from src.services.rss_service import RSSItem
+from src.services.send_queue import SendQueue
+
+ORIGINAL = (
+    "OpenAI发布新一代推理模型",
+    "<p>OpenAI今天发布了新一代推理模型，在数学、编程和科学问题上的表现大幅提升，"
+    "并将在未来几周内向所有付费用户开放。</p>",
+)
+REPOST = (
+    "OpenAI发布新一代推理模型！",
+    "OpenAI今天发布了新一代推理模型，在数学、编程和科学问题上的表现大幅提升，"
+    "并将在未来几周内向所有付费用户开放！",
+)
+UNRELATED = (
+    "苹果公布第三季度财报",
+    "苹果公司公布第三季度财报，营收同比增长，服务业务创历史新高，大中华区销售额有所下滑。",
+)
+
+
+def _item(title: str, description: str, link: str) -> RSSItem:
+    return RSSItem(title, link, description, datetime.now())
+
+
+class TestSignatures:
+    """SimHash签名测试"""
+
+    def test_clean_text_strips_html_and_case(self) -> None:
+        """测试清洗去除HTML标签并统一大小写"""
+        assert clean_text("Hello  World", "<b>Foo</b>\nBar") == "hello world foo bar"
+
+    def test_batch_matches_single(self) -> None:
+        """测试批量计算与逐条计算结果一致"""
+        texts = [clean_text(*ORIGINAL), clean_text(*UNRELATED), "ab"]
+        batch = compute_signatures(texts)
+        assert batch == [compute_signatures([text])[0] for text in texts]
+
+    def test_repost_is_close_and_unrelated_is_far(self) -> None:
+        """测试转载文章签名接近，无关文章签名相距较远"""
+        original, repost, unrelated = compute_signatures(
+            [clean_text(*ORIGINAL), clean_text(*REPOST), clean_text(*UNRELATED)]
+        )
+        assert hamming_distance(original, repost) <= 6
+        assert hamming_distance(original, unrelated) > 6
+
+
+class TestNearDuplicateIndex:
+    """近似重复索引测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = NearDuplicateIndex(f"{self.temp_dir}/near_duplicates.db", similarity=0.9, window_days=7)
+
+    def teardown_method(self) -> None:
+        self.index.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_reposts_join_same_cluster(self) -> None:
+        """测试不同来源的转载归入同一聚类"""
+        original = _item(*ORIGINAL, "https://a.com/1")
+        repost = _item(*REPOST, "https://b.com/1")
+        unrelated = _item(*UNRELATED, "https://c.com/1")
+
+        joined = self.index.assign_clusters([original, unrelated])
+        assert joined == {}
+        joined = self.index.assign_clusters([repost])
+
+        assert joined == {repost.article_key: original.article_key}
+        assert repost.cluster_id == original.cluster_id
+        assert unrelated.cluster_id != original.cluster_id
+        assert sorted(self.index.get_cluster_members(original.cluster_id)) == sorted(
+            [original.article_key, repost.article_key]
+        )
+
+    def test_clusters_persist_across_reopen(self) -> None:
+        """测试聚类在重新打开索引后仍然有效"""
+        original = _item(*ORIGINAL, "https://a.com/1")
+        self.index.assign_clusters([original])
+        self.index.mark_cluster_sent(original.cluster_id, original.article_key)
+        self.index.close()
+
+        self.index = NearDuplicateIndex(f"{self.temp_dir}/near_duplicates.db", similarity=0.9, window_days=7)
+        repost = _item(*REPOST, "https://b.com/1")
+        self.index.assign_clusters([repost])
+
+        assert self.index.get_sent_article(repost.cluster_id) == original.article_key
+
+
+class TestLSHBands:
+    """LSH分段与多探针查找测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = f"{self.temp_dir}/near_duplicates.db"
+        self.index = NearDuplicateIndex(self.db_path, similarity=0.9, window_days=7)
+        self.now = datetime.now().isoformat()
+
+    def teardown_method(self) -> None:
+        self.index.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_bands_are_wide(self) -> None:
+        """测试每段至少16位，每段桶足够多"""
+        assert self.index.max_distance == 6
+        assert all(width >= 16 for _, width in self.index.bands)
+
+    def test_max_distance_spread_over_all_bands_is_found(self) -> None:
+        """测试差异分散在所有段时，距离等于阈值的签名仍能找到"""
+        signature = random.Random(1).getrandbits(64)
+        self.index._add_signature("a", signature, "a", self.now)
+        near = signature ^ sum(1 << bit for bit in (0, 1, 16, 17, 32, 48))
+
+        assert self.index._find_nearest(near) == ("a", "a")
+
+    def test_candidates_stay_few_with_large_backlog(self) -> None:
+        """测试积压较多时每次查找的候选数仍然很少"""
+        rng = random.Random(2)
+        for i in range(3000):
+            self.index._add_signature(f"k{i}", rng.getrandbits(64), f"k{i}", self.now)
+
+        counts = [len(self.index._candidates(rng.getrandbits(64))) for _ in range(50)]
+        assert sum(counts) / len(counts) < 15
+
+    def test_buckets_rebuilt_when_layout_changes(self) -> None:
+        """测试相似度阈值变化后按已保存的签名重建桶表"""
+        signature = random.Random(3).getrandbits(64)
+        self.index._add_signature("a", signature, "a", self.now)
+        self.index._conn.commit()
+        self.index.close()
+
+        self.index = NearDuplicateIndex(self.db_path, similarity=0.98, window_days=7)
+        assert self.index._find_nearest(signature ^ 1) == ("a", "a")
+
+
+class TestClusterSendExclusion:
+    """聚类与发送状态联动测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SQLiteRSSCache(cache_dir=self.temp_dir)
+
+    def teardown_method(self) -> None:
+        self.manager.near_duplicates.close()
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _manager(self):
+        from src.services.multi_rss_manager import MultiRSSManager, RSSSourceStateStore
+
+        with patch("src.services.multi_rss_manager.Config.get_rss_feed_urls", return_value=[]), \
+                patch("src.services.multi_rss_manager.Config.NEAR_DUPLICATE_ENABLED", True), \
+                patch("src.services.multi_rss_manager.RSSSourceStateStore",
+                      return_value=RSSSourceStateStore(f"{self.temp_dir}/rss_sources.json")):
+            return MultiRSSManager(cache=self.store)
+
+    def _clustered_pair(self):
+        original = _item(*ORIGINAL, "https://a.com/1")
+        repost = _item(*REPOST, "https://b.com/1")
+        for item in (original, repost):
+            self.store.add_item(item)
+        self.manager._assign_clusters([original, repost])
+        assert repost.cluster_id == original.article_key
+        return original, repost
+
+    def test_managers_share_index_and_observer(self) -> None:
+        """测试同一文章存储上的多个管理器共用近似重复索引，只注册一个观察者"""
+        self.manager = self._manager()
+        other = self._manager()
+
+        assert other.near_duplicates is self.manager.near_duplicates
+        observers = [observer for observer in self.store._state_observers
+                     if getattr(observer, "__name__", "") == "_on_article_state_change"]
+        assert len(observers) == 1
+
+    def test_sending_one_member_excludes_siblings(self) -> None:
+        """测试聚类中一篇发送后，其余文章被排除"""
+        self.manager = self._manager()
+        original = _item(*ORIGINAL, "https://a.com/1")
+        repost = _item(*REPOST, "https://b.com/1")
+        for item in (original, repost):
+            self.store.add_item(item)
+        self.manager._assign_clusters([original, repost])
+
+        original.mark_as_sent()
+
+        assert repost.excluded_from_sending
+        assert [item.title for item in self.store.get_excluded_items()] == [repost.title]
+
+    def test_late_repost_of_sent_article_is_excluded(self) -> None:
+        """测试已发送文章的后续转载在入库时直接排除"""
+        self.manager = self._manager()
+        original = _item(*ORIGINAL, "https://a.com/1")
+        self.store.add_item(original)
+        self.manager._assign_clusters([original])
+        original.mark_as_sent()
+
+        repost = _item(*REPOST, "https://b.com/1")
+        self.store.add_item(repost)
+        self.manager._assign_clusters([repost])
+
+        assert repost.excluded_from_sending
+        assert self.store.get_item(repost.article_key).cluster_id == original.cluster_id
+
+    def test_representative_kept_over_later_members(self) -> None:
+        """测试聚类代表可发送时，沿用其评分的其他文章不进入发送队列"""
+        self.manager = self._manager()
+        send_queue = SendQueue(self.store, half_life_hours=0)
+        original, repost = self._clustered_pair()
+
+        original.set_quality_score(8, source="llm")
+        repost.set_quality_score(8, source="cluster")
+
+        assert repost.exclusion_reason == f"近似重复：同类文章待发送 ({original.article_key})"
+        assert not original.excluded_from_sending
+        assert len(send_queue) == 1
+        assert send_queue.peek() is original
+
+    def test_member_kept_when_representative_not_sendable(self) -> None:
+        """测试聚类代表不可发送时保留其他文章"""
+        self.manager = self._manager()
+        original, repost = self._clustered_pair()
+        original.exclude_from_sending("手动排除")
+
+        repost.set_quality_score(8, source="llm")
+
+        assert not repost.excluded_from_sending
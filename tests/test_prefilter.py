@@ -0,0 +1,149 @@
+"""
+评分预过滤测试
+"""
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock
+
+from src.services.article_store import SQLiteRSSCache
+from src.services.prefilter import KeywordAutomaton, PreFilter
+from src.services.rss_service import RSSItem
+from src.services.scoring_worker import ScoringWorker
+
+CONTENT = "这篇文章介绍了新发布的开源推理框架，并给出了详细的性能测试数据和部署方法。"
+
+
+def _item(title: str, description: str = CONTENT, source_name: str = None) -> RSSItem:
+    item = RSSItem(title, f"https://test.com/{title}", description, datetime.now())
+    item.source_name = source_name
+    return item
+
+
+class TestKeywordAutomaton:
+
+    def test_finds_overlapping_keywords(self):
+        automaton = KeywordAutomaton([("人工智能", 1), ("智能", 2), ("智能体", 3), ("体验", 4)])
+        assert automaton.search("人工智能体") == {("人工智能", 1), ("智能", 2), ("智能体", 3)}
+
+    def test_chinese_keywords_match_as_substrings(self):
+        automaton = KeywordAutomaton([("推广", "deny"), ("开源", "allow")])
+        assert automaton.search("某公司推广其开源项目") == {("推广", "deny"), ("开源", "allow")}
+
+    def test_ascii_keywords_match_whole_words_case_insensitive(self):
+        automaton = KeywordAutomaton([("ad", "deny")])
+        assert automaton.search("New AD campaign") == {("ad", "deny")}
+        assert automaton.search("AI adoption grows") == set()
+
+
+class TestPreFilter:
+
+    def _prefilter(self, rules=None, model=None) -> PreFilter:
+        prefilter = PreFilter(rules=rules or {"*": {"deny": ["赞助内容"]}}, model=model)
+        prefilter.min_title_length = 4
+        prefilter.min_content_length = 30
+        prefilter.allow_score = 8
+        prefilter.model_confidence = 0.9
+        return prefilter
+
+    def test_rejects_short_title(self):
+        prefilter = self._prefilter()
+        assert prefilter.evaluate(_item("短"))[0] == 0
+        assert prefilter.evaluate(_item("正常长度的标题")) is None
+
+    def test_short_content_is_escalated_not_rejected(self):
+        model = Mock()
+        model.predict.return_value = (1.0, 0.99)
+        prefilter = self._prefilter(model=model)
+        summary = _item("新模型发布", "<p>某公司发布新一代开源模型。</p>")
+
+        assert prefilter.apply([summary]) == [summary]
+        assert not summary.excluded_from_sending
+        model.predict.assert_not_called()
+        assert prefilter.get_stats()["rule_escalated"] == 1
+
+    def test_deny_keyword_only_checked_in_title_and_disclosure(self):
+        prefilter = self._prefilter({"*": {"deny": ["sponsored"]}})
+        prefilter.deny_scan_chars = 40
+        disclosure = _item("New rover mission", "Sponsored post. " + CONTENT)
+        mentioned = _item("New rover mission", CONTENT * 2 + " The mission is sponsored by NASA.")
+
+        assert prefilter.evaluate(_item("Sponsored: new gadget"))[0] == 0
+        assert prefilter.apply([disclosure, mentioned]) == [disclosure, mentioned]
+        assert not disclosure.excluded_from_sending
+        assert prefilter.get_stats()["rule_escalated"] == 1
+
+    def test_deny_keyword_wins_over_allow(self):
+        prefilter = self._prefilter({"*": {"allow": ["开源"], "deny": ["赞助内容"]}})
+        score, reason = prefilter.evaluate(_item("赞助内容：某开源框架发布"))
+        assert score == 0
+        assert "赞助内容" in reason
+
+    def test_source_rules_only_apply_to_their_source(self):
+        prefilter = self._prefilter({"example.com": {"allow": ["推理框架"]}})
+        assert prefilter.evaluate(_item("框架发布公告", source_name="example.com")) == (8, "命中允许关键词: 推理框架")
+        assert prefilter.evaluate(_item("框架发布公告", source_name="other.com")) is None
+
+    def test_model_hook_used_only_when_confident(self):
+        model = Mock()
+        prefilter = self._prefilter(model=model)
+
+        model.predict.return_value = (7.6, 0.95)
+        assert prefilter.evaluate(_item("正常长度的标题"))[0] == 8
+
+        model.predict.return_value = (7.6, 0.5)
+        assert prefilter.evaluate(_item("正常长度的标题")) is None
+
+    def test_apply_returns_undecided_items_and_counts_saved_calls(self):
+        prefilter = self._prefilter()
+        rejected = _item("赞助内容：新品上市")
+        undecided = _item("正常长度的标题")
+
+        assert prefilter.apply([rejected, undecided]) == [undecided]
+        assert rejected.quality_score == 0
+        assert rejected.excluded_from_sending
+        assert rejected.exclusion_reason.startswith("预过滤: 标题命中拒绝关键词")
+        assert not undecided.has_quality_score()
+        stats = prefilter.get_stats()
+        assert (stats["checked"], stats["rejected"], stats["accepted"], stats["llm_calls_saved"]) == (2, 1, 0, 1)
+
+    def test_load_rules_merges_file_with_global_keywords(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            rules_file = Path(temp_dir) / "rules.json"
+            rules_file.write_text(json.dumps({"example.com": {"deny": ["招聘"]}}), encoding="utf-8")
+            rules = PreFilter.load_rules(str(rules_file))
+            assert rules["example.com"]["deny"] == ["招聘"]
+            assert "*" in rules
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestScoringWorkerPreFilter:
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = SQLiteRSSCache(cache_dir=self.temp_dir)
+        self.summarizer = Mock()
+        self.summarizer.score_articles.side_effect = lambda items, sources=None: [9] * len(items)
+
+    def teardown_method(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_prefiltered_items_skip_model_scoring(self):
+        items = [_item("赞助内容：新品上市"), _item("正常长度的标题")]
+        for item in items:
+            self.cache.add_item(item)
+        prefilter = PreFilter(rules={"*": {"deny": ["赞助内容"]}})
+        worker = ScoringWorker(self.cache, self.summarizer, prefilter=prefilter)
+        worker.enqueue(items)
+
+        assert worker.score_pending() == 2
+        self.summarizer.score_articles.assert_called_once()
+        assert self.summarizer.score_articles.call_args[0][0] == [items[1]]
+        assert self.cache.get_item(items[0].article_key).quality_score == 0
+        assert self.cache.get_items_needing_quality_check() == []
+        assert worker.get_stats()["prefilter"]["llm_calls_saved"] == 1
@@ -1,10 +1,12 @@
 """RSS获取器的单元测试"""
 
+import json
 import shutil
 import tempfile
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, Mock, patch
 
+from src.services import rss_service
 from src.services.rss_service import RSSCache, RSSFetcher, RSSItem
 
 
@@ -58,6 +60,7 @@ class TestRSSCache:
 
     def teardown_method(self) -> None:
         """测试后清"""
+        self.cache.flush()
         shutil.rmtree(self.temp_dir)
 
     def test_cache_initialization(self) -> None:
@@ -76,16 +79,181 @@ class TestRSSCache:
         # 再次检查，应该是重"
         assert self.cache.is_duplicate(item)
 
-    def test_different_dates_not_duplicate(self) -> None:
-        """测试不同日期的相同标题不算重"""
+    def test_republished_on_different_date_is_duplicate(self) -> None:
+        """测试不同日期重新发布的相同文章算重复（跨天去重）"""
         today = datetime.now()
         yesterday = today - timedelta(days=1)
 
         item1 = RSSItem("测试标题", "https://test.com", "描述", today)
         item2 = RSSItem("测试标题", "https://test.com", "描述", yesterday)
+        item3 = RSSItem("另一篇文章", "https://test.com/other", "描述", yesterday)
 
         self.cache.add_item(item1)
-        assert not self.cache.is_duplicate(item2)
+        assert self.cache.is_duplicate(item2)
+        assert not self.cache.is_duplicate(item3)
+
+    def test_filter_hits_are_confirmed(self) -> None:
+        """测试布隆过滤器误判不会把新文章当作重复"""
+        item = RSSItem("全新文章", "https://test.com/new", "描述", datetime.now())
+        with patch.object(self.cache.dedup_filter, "might_contain", return_value=True):
+            assert not self.cache.is_duplicate(item)
+            assert not self.cache.is_known_link(item.canonical_link)
+
+    def test_filter_hits_confirmed_from_unloaded_days(self) -> None:
+        """测试未加载日期的缓存文件中的文章仍算跨天重复"""
+        old = RSSItem("一周前的文章", "https://test.com/old", "描述", datetime.now() - timedelta(days=5))
+        self.cache.add_item(old)
+        self.cache.flush()
+        self.cache.close()
+
+        self.cache = RSSCache(cache_dir=self.temp_dir)
+        assert old.date_key not in self.cache.daily_cache
+        republished = RSSItem("一周前的文章", "https://test.com/old", "描述", datetime.now())
+        assert self.cache.is_duplicate(republished)
+        assert self.cache.is_known_link(old.canonical_link)
+
+    def test_refetch_after_day_files_cleaned_is_duplicate(self) -> None:
+        """测试日期缓存文件被清理后，30天前入库的文章重新抓取时仍算重复"""
+        old = RSSItem("一个月前的文章", "https://test.com/month", "描述", datetime.now() - timedelta(days=30))
+        self.cache.add_item(old)
+        self.cache.flush()
+        self.cache.cleanup_old_cache()
+        self.cache.close()
+        assert not list(self.cache.cache_dir.glob("rss_*.json"))
+
+        self.cache = RSSCache(cache_dir=self.temp_dir)
+        refetched = RSSItem("一个月前的文章", "https://test.com/month", "描述", datetime.now())
+        assert self.cache.is_duplicate(refetched)
+        assert self.cache.is_known_link(old.canonical_link)
+
+    def test_window_keys_pruned_after_dedup_window(self) -> None:
+        """测试超出去重窗口的去重键被清理"""
+        expired = (datetime.now() - timedelta(days=self.cache.dedup_filter.window_days + 1)).strftime("%Y-%m-%d")
+        self.cache._window_keys_file.write_text(f"{expired}\ttitle:expired\n", encoding="utf-8")
+        item = RSSItem("新文章", "https://test.com/new", "描述", datetime.now())
+        self.cache.add_item(item)
+
+        self.cache.cleanup_old_cache()
+
+        keys = set(self.cache._read_window_keys())
+        assert "title:expired" not in keys
+        assert f"title:{item.title_hash}" in keys
+
+    def test_link_variants_are_known(self) -> None:
+        """测试带跟踪参数或AMP的链接变体被识别为已知链接"""
+        item = RSSItem("测试标题", "https://www.test.com/news/1?utm_source=rss", "描述", datetime.now())
+        self.cache.add_item(item)
+
+        assert item.canonical_link == "https://test.com/news/1"
+        assert self.cache.is_known_link("https://test.com/news/1")
+        assert not self.cache.is_known_link("https://test.com/news/2")
+
+
+class TestRSSCacheWriteBehind:
+    """RSS缓存延迟写入测试"""
+
+    def setup_method(self) -> None:
+        """测试前设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = RSSCache(cache_dir=self.temp_dir, write_behind=True)
+        self.cache.flush_interval = 60
+
+    def teardown_method(self) -> None:
+        """测试后清理"""
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_changes_are_batched_until_flush(self) -> None:
+        """测试变更在刷新前只标记为脏"""
+        item = RSSItem("测试标题", "https://test.com", "描述", datetime.now())
+        cache_file = self.cache._get_cache_file(item.date_key)
+
+        with patch.object(self.cache, "_save_cache", wraps=self.cache._save_cache) as mock_save:
+            self.cache.add_item(item)
+            item.mark_as_sent()
+            self.cache.update_item_sent_status(item)
+            assert mock_save.call_count == 0
+            assert not cache_file.exists()
+
+            self.cache.flush()
+            assert mock_save.call_count == 1
+
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["articles"][0]["sent_status"] is True
+        assert not list(self.cache.cache_dir.glob("*.tmp"))
+
+    def test_max_dirty_triggers_flush(self) -> None:
+        """测试累计变更达到阈值时立即写入"""
+        self.cache.max_dirty = 3
+        with patch.object(self.cache, "_save_cache") as mock_save:
+            for i in range(3):
+                self.cache.add_item(RSSItem(f"标题{i}", "https://test.com", "描述", datetime.now()))
+            assert mock_save.call_count == 1
+            assert not self.cache._dirty_dates
+
+    def test_failed_save_stays_dirty(self) -> None:
+        """测试保存失败的日期保留脏标记，下次刷新时重试"""
+        item = RSSItem("测试标题", "https://test.com", "描述", datetime.now())
+        self.cache.add_item(item)
+
+        with patch("src.services.rss_service.os.replace", side_effect=OSError("磁盘已满")):
+            self.cache.flush()
+        assert self.cache._dirty_dates == {item.date_key}
+
+        self.cache.flush()
+        assert not self.cache._dirty_dates
+        assert self.cache._get_cache_file(item.date_key).exists()
+
+    def test_close_stops_exit_flush(self) -> None:
+        """测试关闭后不再在进程退出时保存"""
+        assert self.cache in rss_service._open_caches
+        self.cache.close()
+        assert self.cache not in rss_service._open_caches
+
+
+class TestRSSCacheStateIndex:
+    """RSS缓存状态索引测试"""
+
+    def setup_method(self) -> None:
+        """测试前设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = RSSCache(cache_dir=self.temp_dir, write_behind=True)
+        self.cache.flush_interval = 60
+        now = datetime.now()
+        self.items = [
+            RSSItem(f"文章{i}", f"https://test.com/{i}", "描述", now - timedelta(minutes=m))
+            for i, m in enumerate([30, 10, 20])
+        ]
+        for item in self.items:
+            self.cache.add_item(item)
+
+    def teardown_method(self) -> None:
+        """测试后清理"""
+        self.cache.flush()
+        shutil.rmtree(self.temp_dir)
+
+    def test_queries_are_ordered_by_published(self) -> None:
+        """测试查询结果按发布时间倒序"""
+        expected = ["文章1", "文章2", "文章0"]
+        assert [item.title for item in self.cache.get_unsent_items()] == expected
+        assert [item.title for item in self.cache.get_items_needing_quality_check()] == expected
+
+    def test_state_changes_update_indexes(self) -> None:
+        """测试文章状态变化直接更新索引"""
+        self.items[1].mark_as_sent()
+        self.items[2].set_quality_score(2)
+        self.items[0].set_quality_score(9)
+
+        assert self.cache.get_unsent_items() == [self.items[0]]
+        assert self.cache.get_items_needing_quality_check() == [self.items[1]]
+        assert self.cache.get_excluded_items() == [self.items[2]]
+        assert self.items[0].date_key in self.cache._dirty_dates
+
+    def test_remove_item_updates_indexes(self) -> None:
+        """测试删除文章后从索引中移除"""
+        self.cache.remove_item(self.items[1])
+        assert [item.title for item in self.cache.get_unsent_items()] == ["文章2", "文章0"]
 
 
 class TestRSSFetcher:
@@ -99,7 +267,7 @@ class TestRSSFetcher:
         """测试后清"""
         shutil.rmtree(self.temp_dir)
 
-    @patch("src.services.rss_service.requests.get")
+    @patch("src.core.http_client.HttpClient.get")
     @patch("src.services.rss_service.feedparser.parse")
     def test_fetch_latest_items_success(self, mock_parse: Mock, mock_get: Mock) -> None:
         """测试成功获取RSS条目"""
@@ -124,9 +292,10 @@ class TestRSSFetcher:
 
         mock_parse.return_value = mock_feed
 
-        with patch("src.services.rss_service.RSSCache") as mock_cache_class:
+        with patch("src.services.article_store.get_shared_cache") as mock_cache_class:
             mock_cache = Mock()
             mock_cache.is_duplicate.return_value = False
+            mock_cache.is_known_link.return_value = False
             mock_cache_class.return_value = mock_cache
 
             fetcher = RSSFetcher()
@@ -136,12 +305,12 @@ class TestRSSFetcher:
             assert items[0].title == "测试标题"
             assert items[0].link == "https://test.com"
 
-    @patch("src.services.rss_service.requests.get")
+    @patch("src.core.http_client.HttpClient.get")
     def test_fetch_latest_items_http_error(self, mock_get: Mock) -> None:
         """测试HTTP错误处理"""
         mock_get.side_effect = Exception("网络错误")
 
-        with patch("src.services.rss_service.RSSCache"):
+        with patch("src.services.article_store.get_shared_cache"):
             fetcher = RSSFetcher()
             items = fetcher.fetch_latest_items()
 
@@ -149,7 +318,7 @@ class TestRSSFetcher:
 
     def test_get_cache_status(self) -> None:
         """测试获取缓存状"""
-        with patch("src.services.rss_service.RSSCache") as mock_cache_class:
+        with patch("src.services.article_store.get_shared_cache") as mock_cache_class:
             mock_cache = Mock()
             mock_cache.cache_dir = self.temp_dir
             mock_cache.daily_cache = {"2025-08-23": {"hash1", "hash2"}}
@@ -162,3 +331,230 @@ class TestRSSFetcher:
             assert "daily_stats" in status
             assert status["daily_stats"]["2025-08-23"] == 2
 
+
+
+class TestConditionalGet:
+    """条件请求（ETag/Last-Modified）测试"""
+
+    def setup_method(self) -> None:
+        """测试前设置"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self) -> None:
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    @patch("src.services.rss_service.feedparser.parse")
+    @patch("src.core.http_client.HttpClient.get")
+    def test_not_modified_skips_parse(self, mock_get: Mock, mock_parse: Mock) -> None:
+        """测试304响应不触发feedparser解析"""
+        mock_response = Mock()
+        mock_response.status_code = 304
+        mock_get.return_value = mock_response
+
+        with patch("src.services.article_store.get_shared_cache"):
+            fetcher = RSSFetcher("https://example.com/feed")
+            fetcher.etag = '"abc"'
+            fetcher.last_modified = "Sat, 23 Aug 2025 12:00:00 GMT"
+            items = fetcher.fetch_latest_items()
+
+        assert items == []
+        assert fetcher.last_not_modified
+        mock_parse.assert_not_called()
+        headers = mock_get.call_args[1]["headers"]
+        assert headers["If-None-Match"] == '"abc"'
+        assert headers["If-Modified-Since"] == "Sat, 23 Aug 2025 12:00:00 GMT"
+
+    @patch("src.services.rss_service.feedparser.parse")
+    @patch("src.core.http_client.HttpClient.get")
+    def test_validators_recorded(self, mock_get: Mock, mock_parse: Mock) -> None:
+        """测试200响应记录ETag/Last-Modified"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b"<rss></rss>"
+        mock_response.headers = {"ETag": '"v2"', "Last-Modified": "Sun, 24 Aug 2025 00:00:00 GMT"}
+        mock_get.return_value = mock_response
+        mock_parse.return_value = Mock(bozo=False, entries=[])
+
+        with patch("src.services.article_store.get_shared_cache"):
+            fetcher = RSSFetcher("https://example.com/feed")
+            fetcher.fetch_latest_items()
+
+        assert fetcher.etag == '"v2"'
+        assert fetcher.last_modified == "Sun, 24 Aug 2025 00:00:00 GMT"
+        assert not fetcher.last_not_modified
+
+    def test_source_state_roundtrip(self) -> None:
+        """测试源状态持久化后可恢复"""
+        from pathlib import Path
+
+        from src.services.multi_rss_manager import RSSSource, RSSSourceStateStore
+
+        source = RSSSource("https://example.com/feed")
+        source.record_conditional_result(True, True, '"abc"', None)
+        source.record_conditional_result(True, False, '"def"', None)
+
+        store = RSSSourceStateStore(str(Path(self.temp_dir) / "rss_sources.json"))
+        store.save([source])
+
+        restored = RSSSource("https://example.com/feed")
+        restored.load_state(store.load()["https://example.com/feed"])
+        assert restored.etag == '"def"'
+        assert restored.get_not_modified_rate() == 0.5
+
+
+class TestHighWatermark:
+    """高水位线测试"""
+
+    @staticmethod
+    def _entry(guid: str, published: datetime):
+        from feedparser import FeedParserDict
+
+        return FeedParserDict(
+            id=guid,
+            title=f"标题 {guid}",
+            link=f"https://example.com/{guid}",
+            description="描述",
+            published_parsed=published.timetuple(),
+        )
+
+    @patch("src.services.rss_service.feedparser.parse")
+    @patch("src.core.http_client.HttpClient.get")
+    def test_skips_entries_below_watermark(self, mock_get: Mock, mock_parse: Mock) -> None:
+        """测试水位线以下的条目不再构造和处理"""
+        mock_get.return_value = Mock(status_code=200, content=b"", headers={})
+        now = datetime.now().replace(microsecond=0)
+        old_entries = [self._entry("b", now - timedelta(minutes=10)),
+                       self._entry("a", now - timedelta(minutes=20))]
+
+        with patch("src.services.article_store.get_shared_cache") as mock_cache_class:
+            mock_cache_class.return_value.is_duplicate.return_value = False
+            mock_cache_class.return_value.is_known_link.return_value = False
+            fetcher = RSSFetcher("https://example.com/feed")
+
+            mock_parse.return_value = Mock(bozo=False, entries=old_entries)
+            assert len(fetcher.fetch_latest_items()) == 2
+            assert fetcher.watermark_published == now - timedelta(minutes=10)
+
+            mock_parse.return_value = Mock(
+                bozo=False, entries=[self._entry("c", now)] + old_entries
+            )
+            with patch.object(fetcher, "_process_item_image") as mock_image:
+                items = fetcher.fetch_latest_items()
+
+        assert [item.guid for item in items] == ["c"]
+        assert mock_image.call_count == 1
+        assert fetcher.watermark_guids == {"c"}
+
+    @patch("src.services.rss_service.feedparser.parse")
+    @patch("src.core.http_client.HttpClient.get")
+    def test_cancelled_fetch_leaves_no_state(self, mock_get: Mock, mock_parse: Mock) -> None:
+        """测试引擎超时取消后，抓取结果不写入缓存、校验信息和水位线"""
+        from src.services.feed_fetch_engine import FetchCancellation
+
+        mock_get.return_value = Mock(status_code=200, content=b"", headers={"ETag": '"v2"'})
+        mock_parse.return_value = Mock(bozo=False, entries=[self._entry("a", datetime.now())])
+        cancellation = FetchCancellation()
+        assert cancellation.cancel()
+
+        with patch("src.services.article_store.get_shared_cache") as mock_cache_class:
+            mock_cache_class.return_value.is_duplicate.return_value = False
+            mock_cache_class.return_value.is_known_link.return_value = False
+            fetcher = RSSFetcher("https://example.com/feed")
+            items = fetcher.fetch_latest_items(cancellation=cancellation)
+
+        assert items == []
+        mock_cache_class.return_value.add_item.assert_not_called()
+        assert fetcher.etag is None
+        assert fetcher.watermark_published is None
+
+    def test_date_ordered_detection(self) -> None:
+        """测试倒序检测"""
+        now = datetime.now()
+        ordered = [self._entry("b", now), self._entry("a", now - timedelta(hours=1))]
+        unordered = list(reversed(ordered))
+
+        with patch("src.services.article_store.get_shared_cache"):
+            fetcher = RSSFetcher("https://example.com/feed")
+
+        assert fetcher._is_date_ordered(ordered)
+        assert not fetcher._is_date_ordered(unordered)
+
+    @patch("src.services.rss_service.feedparser.parse")
+    @patch("src.core.http_client.HttpClient.get")
+    def test_known_link_skipped_before_item_built(self, mock_get: Mock, mock_parse: Mock) -> None:
+        """测试规范化链接已入库的转载在构造条目和处理图片之前跳过"""
+        mock_get.return_value = Mock(status_code=200, content=b"", headers={})
+        now = datetime.now().replace(microsecond=0)
+        repost = self._entry("x", now)
+        repost["link"] = "http://m.example.com/a/amp?utm_medium=feed#top"
+
+        with patch("src.services.article_store.get_shared_cache") as mock_cache_class:
+            mock_cache_class.return_value.is_duplicate.return_value = False
+            mock_cache_class.return_value.is_known_link.side_effect = (
+                lambda link: link == "https://example.com/a"
+            )
+            fetcher = RSSFetcher("https://example.com/feed")
+            mock_parse.return_value = Mock(bozo=False, entries=[repost, self._entry("y", now)])
+            with patch.object(fetcher, "_process_item_image") as mock_image:
+                items = fetcher.fetch_latest_items()
+
+        assert [item.guid for item in items] == ["y"]
+        assert mock_image.call_count == 1
+
+
+class TestDeferredImages:
+    """图片延迟下载测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    @patch("src.services.rss_service.feedparser.parse")
+    @patch("src.core.http_client.HttpClient.get")
+    def test_fetch_records_candidates_without_download(self, mock_get: Mock, mock_parse: Mock) -> None:
+        """测试获取周期只记录候选图片URL，不下载"""
+        from feedparser import FeedParserDict
+
+        mock_get.return_value = Mock(status_code=200, content=b"", headers={})
+        entry = FeedParserDict(
+            id="a",
+            title="带图文章",
+            link="https://example.com/a",
+            description='<img src="https://cdn.example.com/a.jpg"><img src="https://cdn.example.com/b.png">',
+            published_parsed=datetime.now().timetuple(),
+        )
+        mock_parse.return_value = Mock(bozo=False, entries=[entry])
+
+        with patch("src.services.article_store.get_shared_cache") as mock_cache_class:
+            mock_cache_class.return_value.is_duplicate.return_value = False
+            mock_cache_class.return_value.is_known_link.return_value = False
+            fetcher = RSSFetcher("https://example.com/feed")
+            with patch.object(fetcher.image_downloader, "download_image") as mock_download:
+                items = fetcher.fetch_latest_items()
+
+        assert mock_download.call_count == 0
+        assert items[0].image_url == "https://cdn.example.com/a.jpg"
+        assert not items[0].has_local_image()
+        assert RSSItem.from_dict(items[0].to_dict()).image_candidates == items[0].image_candidates
+
+    def test_materialize_tries_candidates_in_order(self) -> None:
+        """测试按需下载依次尝试候选URL，成功后记录本地路径"""
+        from src.services.image_service import ImageDownloader
+
+        downloader = ImageDownloader(download_dir=self.temp_dir)
+        item = RSSItem("带图文章", "https://example.com/a", "描述", datetime.now())
+        item.set_image_candidates(["https://cdn.example.com/broken.jpg", "https://cdn.example.com/ok.jpg"])
+        local_path = f"{self.temp_dir}/ok.jpg"
+        open(local_path, "wb").close()
+
+        with patch.object(downloader, "download_image", side_effect=[None, local_path]) as mock_download:
+            assert downloader.materialize_item_image(item)
+            # 已有本地图片时不再下载
+            assert downloader.materialize_item_image(item)
+
+        assert mock_download.call_count == 2
+        assert item.image_url == "https://cdn.example.com/ok.jpg"
+        assert item.local_image_path == local_path
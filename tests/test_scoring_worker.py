@@ -0,0 +1,176 @@
+"""
+后台评分测试
+"""
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from src.services.article_store import SQLiteRSSCache
+from src.services.rss_service import RSSItem
+from src.services.scoring_worker import ScoringWorker
+from src.services.send_queue import SendQueue
+
+
+DESCRIPTION = "这是一段足够长的文章描述，用于确保文章不会被预过滤直接判定，而是交给模型评分。"
+
+
+def _item(title: str, hours_ago: float = 1) -> RSSItem:
+    return RSSItem(title, f"https://test.com/{title}", DESCRIPTION, datetime.now() - timedelta(hours=hours_ago))
+
+
+class TestScoringWorker:
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = SQLiteRSSCache(cache_dir=self.temp_dir)
+        self.summarizer = Mock()
+        self.summarizer.score_articles.side_effect = lambda items, sources=None: [9] * len(items)
+
+    def teardown_method(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _add(self, *titles):
+        items = [_item(title) for title in titles]
+        for item in items:
+            self.cache.add_item(item)
+        return items
+
+    def test_scores_are_checkpointed_in_store(self):
+        items = self._add("文章一", "文章二")
+        worker = ScoringWorker(self.cache, self.summarizer, queue_size=10, batch_size=10)
+        worker.enqueue(items)
+
+        assert worker.score_pending() == 2
+        assert self.cache.get_items_needing_quality_check() == []
+        assert self.cache.get_item(items[0].article_key).quality_score == 9
+        self.summarizer.score_articles.assert_called_once()
+
+    def test_scored_articles_enter_send_queue(self):
+        send_queue = SendQueue(self.cache, half_life_hours=0)
+        items = self._add("文章一")
+        worker = ScoringWorker(self.cache, self.summarizer)
+        worker.enqueue(items)
+        worker.score_pending()
+
+        assert send_queue.peek().title == "文章一"
+
+    def test_resumes_unscored_articles_from_store(self):
+        """重启后从存储恢复尚未评分的文章"""
+        self._add("文章一", "文章二")
+        worker = ScoringWorker(self.cache, self.summarizer, queue_size=10)
+
+        assert worker.score_pending() == 2
+
+    def test_full_queue_drops_and_refills_from_store(self):
+        items = self._add("文章一", "文章二", "文章三")
+        worker = ScoringWorker(self.cache, self.summarizer, queue_size=1, batch_size=10)
+        worker._backlog_pending = False
+
+        assert worker.enqueue(items) == 1
+        assert worker.stats["dropped"] == 2
+
+        scored = 0
+        for _ in range(5):
+            scored += worker.score_pending()
+        assert scored == 3
+        assert self.cache.get_items_needing_quality_check() == []
+
+    def test_duplicates_and_scored_items_are_skipped(self):
+        items = self._add("文章一")
+        items[0].set_quality_score(8)
+        unscored = self._add("文章二")
+        worker = ScoringWorker(self.cache, self.summarizer, queue_size=10)
+        worker._backlog_pending = False
+
+        assert worker.enqueue(items + unscored + unscored) == 1
+
+    def test_failed_batch_is_retried_later(self):
+        items = self._add("文章一")
+        self.summarizer.score_articles.side_effect = [Exception("API down"), [7]]
+        worker = ScoringWorker(self.cache, self.summarizer)
+        worker._backlog_pending = False
+        worker.enqueue(items)
+
+        assert worker.score_pending() == 0
+        assert worker.stats["failed"] == 1
+        assert worker.score_pending() == 1
+
+    def test_heuristic_scores_are_tagged(self):
+        items = self._add("文章一") + self._add("文章二")
+
+        def score_articles(batch, sources=None):
+            sources[:] = ["llm", "heuristic"]
+            return [8, 7]
+
+        self.summarizer.score_articles.side_effect = score_articles
+        worker = ScoringWorker(self.cache, self.summarizer)
+        worker._backlog_pending = False
+        worker.enqueue(items)
+
+        assert worker.score_pending() == 2
+        assert [item.score_source for item in items] == ["llm", "heuristic"]
+
+    def _add_cluster(self, *titles):
+        items = [_item(title) for title in titles]
+        for item in items:
+            item.cluster_id = items[0].article_key
+            self.cache.add_item(item)
+        return items
+
+    def test_cluster_followers_inherit_representative_score(self):
+        representative, follower = self._add_cluster("原文", "转载")
+        worker = ScoringWorker(self.cache, self.summarizer)
+        worker._backlog_pending = False
+        worker.enqueue([representative, follower])
+
+        assert worker.score_pending() == 2
+        assert self.summarizer.score_articles.call_args.args[0] == [representative]
+        assert follower.quality_score == 9
+        assert follower.score_source == "cluster"
+        assert worker.get_stats()["inherited"] == 1
+
+    def test_follower_waits_for_representative(self):
+        representative, follower = self._add_cluster("原文", "转载")
+        worker = ScoringWorker(self.cache, self.summarizer)
+        worker._backlog_pending = False
+        worker.enqueue([follower])
+
+        assert worker.score_pending() == 0
+        self.summarizer.score_articles.assert_not_called()
+        assert worker.get_stats()["deferred"] == 1
+
+        worker.score_pending()
+        worker.score_pending()
+        assert representative.score_source == "llm"
+        assert follower.score_source == "cluster"
+        assert self.summarizer.score_articles.call_count == 1
+
+    def test_background_thread_scores_new_articles(self):
+        worker = ScoringWorker(self.cache, self.summarizer)
+        worker.start()
+        try:
+            worker.enqueue(self._add("文章一"))
+            deadline = time.time() + 5
+            while self.cache.get_items_needing_quality_check() and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            worker.stop()
+        assert self.cache.get_items_needing_quality_check() == []
+        assert not worker.is_running
+
+    def test_idle_worker_does_not_rescan_store(self):
+        """空闲时不反复查询存储中的未评分文章"""
+        worker = ScoringWorker(self.cache, self.summarizer)
+        worker.rescan_interval = 3600
+        with patch.object(self.cache, "get_items_needing_quality_check",
+                          wraps=self.cache.get_items_needing_quality_check) as mock_query, \
+                patch.object(worker._stop_event, "wait", return_value=False):
+            worker.start()
+            try:
+                time.sleep(2.5)
+            finally:
+                worker.stop()
+        assert mock_query.call_count == 1
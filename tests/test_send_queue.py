@@ -0,0 +1,146 @@
+"""
+发送优先级队列测试
+"""
+
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from src.services.article_store import SQLiteRSSCache
+from src.services.rss_service import RSSCache, RSSItem
+from src.services.send_queue import SendQueue
+
+
+def _scored_item(title: str, score: int, hours_ago: float) -> RSSItem:
+    item = RSSItem(title, f"https://test.com/{title}", "描述", datetime.now() - timedelta(hours=hours_ago))
+    item.set_quality_score(score)
+    return item
+
+
+class TestSendQueue:
+    """发送队列排序与失效测试"""
+
+    def test_highest_score_first_without_decay(self) -> None:
+        """测试不衰减时按评分排序"""
+        queue = SendQueue(half_life_hours=0)
+        for item in (_scored_item("八分", 8, 1), _scored_item("十分", 10, 30), _scored_item("九分", 9, 2)):
+            queue.push(item)
+
+        assert queue.peek().title == "十分"
+        assert len(queue) == 3
+
+    def test_decay_prefers_fresh_articles(self) -> None:
+        """测试半衰期让较新的文章胜过稍高分的旧文章"""
+        queue = SendQueue(half_life_hours=6)
+        queue.push(_scored_item("旧的十分", 10, 24))
+        queue.push(_scored_item("新的八分", 8, 1))
+
+        assert queue.peek().title == "新的八分"
+
+    def test_unqualified_articles_are_not_queued(self) -> None:
+        """测试未评分或不达标的文章不入队"""
+        queue = SendQueue(half_life_hours=0)
+        queue.push(RSSItem("未评分", "https://test.com/a", "描述", datetime.now()))
+        queue.push(_scored_item("低分", 2, 1))
+
+        assert queue.peek() is None
+        assert len(queue) == 0
+
+    def test_sent_article_is_lazily_dropped(self) -> None:
+        """测试已发送的文章在取队首时被丢弃"""
+        queue = SendQueue(half_life_hours=0)
+        best = _scored_item("十分", 10, 1)
+        second = _scored_item("九分", 9, 1)
+        queue.push(best)
+        queue.push(second)
+
+        best.mark_as_sent()
+
+        assert queue.peek() is second
+        assert len(queue) == 1
+
+    def test_retry_waiting_article_is_skipped_but_kept(self) -> None:
+        """测试处于重试等待期的文章被跳过但仍保留在队列中"""
+        queue = SendQueue(half_life_hours=0)
+        best = _scored_item("十分", 10, 1)
+        second = _scored_item("九分", 9, 1)
+        queue.push(best)
+        queue.push(second)
+
+        best.mark_send_failed("网络错误")
+        assert queue.peek() is second
+
+        best.last_attempt_time = datetime.now() - timedelta(minutes=10)
+        assert queue.peek() is best
+
+
+class TestSendQueueWithStore:
+    """发送队列与文章存储联动测试"""
+
+    def setup_method(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def _check_store(self, cache) -> None:
+        queue = SendQueue(cache, half_life_hours=0)
+        item = RSSItem("待评分", "https://test.com/a", "描述", datetime.now())
+        cache.add_item(item)
+        assert queue.peek() is None
+
+        cache.get_items_needing_quality_check()[0].set_quality_score(9)
+        assert queue.peek().title == "待评分"
+
+        queue.peek().mark_as_sent()
+        assert queue.peek() is None
+
+    def test_json_store_pushes_on_score(self) -> None:
+        """测试JSON存储中评分后自动入队、发送后失效"""
+        cache = RSSCache(cache_dir=self.temp_dir, write_behind=False)
+        self._check_store(cache)
+        cache.flush()
+
+    def test_sqlite_store_pushes_on_score(self) -> None:
+        """测试SQLite存储中评分后自动入队、发送后失效"""
+        cache = SQLiteRSSCache(cache_dir=self.temp_dir)
+        self._check_store(cache)
+        cache.close()
+
+    def _check_removed_items_dropped(self, cache) -> None:
+        queue = SendQueue(cache, half_life_hours=0)
+        removed = RSSItem("已删除", "https://test.com/removed", "描述", datetime.now())
+        stale = RSSItem("已过期", "https://test.com/stale", "描述", datetime.now() - timedelta(days=3))
+        kept = RSSItem("保留", "https://test.com/kept", "描述", datetime.now())
+        for item, score in ((removed, 10), (stale, 9), (kept, 8)):
+            cache.add_item(item)
+            item.set_quality_score(score)
+
+        cache.remove_item(removed)
+        assert queue.peek() is kept
+        assert len(queue) == 1
+
+        cache.clear()
+        assert queue.peek() is None
+
+    def test_json_store_removed_items_dropped(self) -> None:
+        """测试从JSON存储删除或移出时间窗口的文章不再出队"""
+        cache = RSSCache(cache_dir=self.temp_dir, write_behind=False)
+        self._check_removed_items_dropped(cache)
+
+    def test_sqlite_store_removed_items_dropped(self) -> None:
+        """测试从SQLite存储删除或移出时间窗口的文章不再出队"""
+        cache = SQLiteRSSCache(cache_dir=self.temp_dir)
+        self._check_removed_items_dropped(cache)
+        cache.close()
+
+    def test_rebuild_from_store(self) -> None:
+        """测试启动时从存储重建队列"""
+        cache = SQLiteRSSCache(cache_dir=self.temp_dir)
+        item = RSSItem("已评分", "https://test.com/a", "描述", datetime.now())
+        cache.add_item(item)
+        item.set_quality_score(8)
+
+        queue = SendQueue(cache, half_life_hours=0)
+        assert queue.peek().title == "已评分"
+        cache.close()
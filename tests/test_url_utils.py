@@ -0,0 +1,45 @@
+"""
+URL规范化测试
+"""
+
+from src.core.url_utils import canonicalize_url, url_hash
+
+
+class TestCanonicalizeUrl:
+    """URL规范化测试"""
+
+    def test_strips_tracking_params_and_fragment(self) -> None:
+        """测试去除跟踪参数和片段，保留并排序其余参数"""
+        url = "https://example.com/post?utm_source=rss&id=2&fbclid=abc&a=1#comments"
+        assert canonicalize_url(url) == "https://example.com/post?a=1&id=2"
+
+    def test_normalizes_scheme_host_and_trailing_slash(self) -> None:
+        """测试统一协议、主机大小写、默认端口和结尾斜杠"""
+        variants = [
+            "http://WWW.Example.com/news/1/",
+            "https://example.com:443/news/1",
+            "https://m.example.com//news/1",
+        ]
+        assert {canonicalize_url(url) for url in variants} == {"https://example.com/news/1"}
+
+    def test_resolves_amp_variants(self) -> None:
+        """测试还原AMP链接"""
+        variants = [
+            "https://example.com/news/1/amp",
+            "https://example.com/amp/news/1",
+            "https://amp.example.com/news/1.amp",
+            "https://example.com/news/1?amp=1",
+            "https://example-com.cdn.ampproject.org/c/s/example.com/news/1/amp/",
+        ]
+        assert {canonicalize_url(url) for url in variants} == {"https://example.com/news/1"}
+
+    def test_keeps_distinct_paths_and_invalid_input(self) -> None:
+        """测试不同路径不合并，空值和非URL原样返回"""
+        assert canonicalize_url("https://example.com/News/1") != canonicalize_url("https://example.com/news/1")
+        assert canonicalize_url("") == ""
+        assert canonicalize_url(" not-a-url ") == "not-a-url"
+
+    def test_url_hash_is_stable(self) -> None:
+        """测试链接哈希长度固定且稳定"""
+        assert url_hash("https://example.com/") == url_hash("https://example.com/")
+        assert len(url_hash("https://example.com/")) == 16
@@ -3,11 +3,13 @@
 """
 import pytest
 import os
+import shutil
 import tempfile
 from datetime import datetime
 from unittest.mock import Mock, patch
 from dotenv import load_dotenv
 
+from src.integrations.wechat_media_cache import WeChatMediaCache
 from src.integrations.wechat_official_sender import WeChatOfficialSender
 from src.services.rss_service import RSSItem
 
@@ -33,7 +35,10 @@ class TestWeChatOfficialIntegration:
             'use_rich_formatting': True
         }
         
-        self.sender = WeChatOfficialSender(self.sender_config)
+        # 素材缓存使用临时目录，避免其他测试上传的相同内容命中缓存
+        self.temp_dir = tempfile.mkdtemp()
+        self.media_cache = WeChatMediaCache(os.path.join(self.temp_dir, 'wechat_media.db'))
+        self.sender = WeChatOfficialSender(self.sender_config, media_cache=self.media_cache)
         
         # 创建测试文章
         self.test_article = RSSItem(
@@ -145,7 +150,7 @@ class TestWeChatOfficialIntegration:
         finally:
             os.unlink(tmp_path)
     
-    @patch('requests.post')
+    @patch('src.core.http_client.HttpClient.post')
     def test_permanent_media_upload_mock(self, mock_post):
         """测试永久素材上传（模拟API调用）"""
         # 创建临时图片文件
@@ -182,7 +187,7 @@ class TestWeChatOfficialIntegration:
         finally:
             os.unlink(tmp_path)
     
-    @patch('requests.post')
+    @patch('src.core.http_client.HttpClient.post')
     def test_draft_creation_mock(self, mock_post):
         """测试草稿创建（模拟API调用）"""
         # 模拟成功响应
@@ -314,6 +319,8 @@ class TestWeChatOfficialIntegration:
                     os.unlink(file_path)
                 except Exception:
                     pass  # 忽略清理错误
+        self.media_cache.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     # ==================== 真实API测试方法 ====================
     # 注意：以下测试使用真实的微信公众号API
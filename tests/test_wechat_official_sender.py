@@ -3,10 +3,13 @@
 """
 import pytest
 import os
+import shutil
 import tempfile
 from unittest.mock import Mock, patch
 
+from src.integrations.wechat_media_cache import WeChatMediaCache
 from src.integrations.wechat_official_sender import WeChatOfficialSender
+from src.integrations.wechat_token_manager import WeChatTokenManager
 from src.services.rss_service import RSSItem
 
 
@@ -29,9 +32,21 @@ class TestWeChatOfficialSender:
             'author_name': 'Test Author'
         }
         
-        # Mock环境变量并创建发送器
+        # Mock环境变量并创建发送器（素材缓存和access_token文件使用临时目录）
+        self.temp_dir = tempfile.mkdtemp()
+        self.media_cache = WeChatMediaCache(os.path.join(self.temp_dir, 'wechat_media.db'))
+        self.token_manager = WeChatTokenManager(
+            'test_app_id', 'test_app_secret', token_dir=self.temp_dir, refresh_ahead_seconds=0
+        )
         with patch.dict(os.environ, self.env_config):
-            self.sender = WeChatOfficialSender(self.sender_config)
+            self.sender = WeChatOfficialSender(
+                self.sender_config, media_cache=self.media_cache, token_manager=self.token_manager
+            )
+
+    def teardown_method(self):
+        """测试清理"""
+        self.media_cache.close()
+        shutil.rmtree(self.temp_dir)
     
     def test_initialization(self):
         """测试初始化"""
@@ -95,7 +110,7 @@ class TestWeChatOfficialSender:
         assert '第一个要点' in formatted
         assert '第二个要点' in formatted
     
-    @patch('requests.get')
+    @patch('src.core.http_client.HttpClient.get')
     def test_get_access_token_success(self, mock_get):
         """测试获取access_token成功"""
         mock_response = Mock()
@@ -109,7 +124,7 @@ class TestWeChatOfficialSender:
         assert result == 'test_token_123'
         assert self.sender.access_token == 'test_token_123'
     
-    @patch('requests.get')
+    @patch('src.core.http_client.HttpClient.get')
     def test_get_access_token_failure(self, mock_get):
         """测试获取access_token失败"""
         mock_response = Mock()
@@ -122,7 +137,7 @@ class TestWeChatOfficialSender:
         result = self.sender._get_access_token()
         assert result is None
     
-    @patch('requests.post')
+    @patch('src.core.http_client.HttpClient.post')
     def test_upload_permanent_media_success(self, mock_post):
         """测试上传永久素材成功"""
         # 创建临时图片文件
@@ -146,7 +161,7 @@ class TestWeChatOfficialSender:
         finally:
             os.unlink(tmp_path)
     
-    @patch('requests.post')
+    @patch('src.core.http_client.HttpClient.post')
     def test_upload_thumb_media_success(self, mock_post):
         """测试上传缩略图成功"""
         # 创建临时图片文件
@@ -170,7 +185,7 @@ class TestWeChatOfficialSender:
         finally:
             os.unlink(tmp_path)
     
-    @patch('requests.post')
+    @patch('src.core.http_client.HttpClient.post')
     def test_upload_image_media_success(self, mock_post):
         """测试上传图片素材成功"""
         # 创建临时图片文件
@@ -194,7 +209,7 @@ class TestWeChatOfficialSender:
         finally:
             os.unlink(tmp_path)
     
-    @patch('requests.post')
+    @patch('src.core.http_client.HttpClient.post')
     def test_create_draft_success(self, mock_post):
         """测试创建草稿成功"""
         mock_response = Mock()
@@ -216,7 +231,59 @@ class TestWeChatOfficialSender:
         assert hasattr(self.sender, '_last_draft_media_id')
         assert self.sender._last_draft_media_id == 'draft_media_id_789'
     
-    @patch('requests.post')
+    @patch('src.core.http_client.HttpClient.post')
+    def test_repeated_upload_reuses_media_id(self, mock_post):
+        """测试相同内容的素材只上传一次"""
+        image_path = os.path.join(self.temp_dir, 'cover.jpg')
+        with open(image_path, 'wb') as f:
+            f.write(b'fake_image_data')
+        mock_response = Mock()
+        mock_response.json.return_value = {'errcode': 0, 'media_id': 'thumb_media_id_123'}
+        mock_post.return_value = mock_response
+        self.sender.access_token = 'test_token'
+
+        assert self.sender._upload_thumb_media(image_path) == 'thumb_media_id_123'
+        assert self.sender._upload_thumb_media(image_path) == 'thumb_media_id_123'
+
+        assert mock_post.call_count == 1
+        assert self.media_cache.get_stats()['entries'] == 1
+
+    @patch('src.core.http_client.HttpClient.post')
+    def test_invalid_cached_media_is_reuploaded(self, mock_post):
+        """测试缓存的素材失效后作废记录并重新上传"""
+        image_path = os.path.join(self.temp_dir, 'cover.jpg')
+        with open(image_path, 'wb') as f:
+            f.write(b'fake_image_data')
+        self.media_cache.put('test_app_id', 'thumb', 'stale-digest', 'stale_thumb', image_path)
+
+        responses = [
+            {'errcode': 40007, 'errmsg': 'invalid media_id'},
+            {'errcode': 0, 'media_id': 'fresh_thumb'},
+            {'media_id': 'draft_media_id_789'},
+        ]
+        mock_post.side_effect = [Mock(json=Mock(return_value=r)) for r in responses]
+        self.sender.access_token = 'test_token'
+
+        with patch('src.integrations.wechat_official_sender.time.sleep'):
+            assert self.sender._create_draft_v2("测试文章标题", "<p>内容</p>", thumb_media_id="stale_thumb")
+
+        assert '"thumb_media_id": "fresh_thumb"' in mock_post.call_args_list[2].kwargs['data'].decode('utf-8')
+        assert self.media_cache.invalidate('test_app_id', 'stale_thumb') is None
+
+    def test_cached_media_file_survives_source_eviction(self):
+        """测试图片存储淘汰原文件后，失效素材仍能找到可重新上传的文件"""
+        image_path = os.path.join(self.temp_dir, 'variant.jpg')
+        with open(image_path, 'wb') as f:
+            f.write(b'fake_image_data')
+        self.media_cache.put('test_app_id', 'thumb', 'digest-1', 'thumb_1', image_path)
+        os.remove(image_path)
+
+        media_type, file_path = self.media_cache.invalidate('test_app_id', 'thumb_1')
+        assert media_type == 'thumb'
+        with open(file_path, 'rb') as f:
+            assert f.read() == b'fake_image_data'
+
+    @patch('src.core.http_client.HttpClient.post')
     def test_create_draft_failure(self, mock_post):
         """测试创建草稿失败"""
         mock_response = Mock()
@@ -228,12 +295,36 @@ class TestWeChatOfficialSender:
         
         self.sender.access_token = 'test_token'
         
-        result = self.sender._create_draft_v2(
-            title="测试文章标题",
-            content="<p>测试文章内容</p>"
-        )
+        with patch.object(self.token_manager, 'force_refresh', return_value='fresh_token') as mock_refresh, \
+             patch('time.sleep'):
+            result = self.sender._create_draft_v2(
+                title="测试文章标题",
+                content="<p>测试文章内容</p>"
+            )
         
         assert not result
+        # 40001时强制刷新token并用新token重试
+        mock_refresh.assert_any_call('test_token')
+        assert 'access_token=fresh_token' in mock_post.call_args_list[1].args[0]
+
+    @patch('src.core.http_client.HttpClient.get')
+    @patch('src.core.http_client.HttpClient.post')
+    def test_upload_retries_with_refreshed_token(self, mock_post, mock_get):
+        """测试上传素材遇到token过期时刷新后重试"""
+        test_image_path = os.path.join(self.temp_dir, 'small.jpg')
+        with open(test_image_path, 'wb') as f:
+            f.write(b'fake_jpeg_data')
+        mock_get.return_value = Mock(json=Mock(return_value={'access_token': 'fresh_token', 'expires_in': 7200}))
+        mock_post.side_effect = [
+            Mock(json=Mock(return_value={'errcode': 42001, 'errmsg': 'access_token expired'})),
+            Mock(json=Mock(return_value={'media_id': 'media_123'})),
+        ]
+        self.sender.access_token = 'expired_token'
+
+        assert self.sender._upload_permanent_media(test_image_path, 'thumb') == 'media_123'
+        assert self.sender.access_token == 'fresh_token'
+        assert 'access_token=fresh_token' in mock_post.call_args_list[1].args[0]
+        assert mock_get.call_count == 1
     
     def test_send_message_with_rss_item(self):
         """测试发送包含RSS图片的消息"""
@@ -0,0 +1,110 @@
+"""
+微信access_token管理模块测试
+"""
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import Mock
+
+from src.integrations.wechat_token_manager import WeChatTokenManager
+
+
+def _token_response(token, expires_in=7200):
+    response = Mock()
+    response.json.return_value = {'access_token': token, 'expires_in': expires_in}
+    return response
+
+
+class TestWeChatTokenManager:
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.http_client = Mock()
+        self.http_client.get.return_value = _token_response('token_1')
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _manager(self, http_client=None, **kwargs):
+        kwargs.setdefault('refresh_ahead_seconds', 0)
+        return WeChatTokenManager('app', 'secret', http_client=http_client or self.http_client,
+                                  token_dir=self.temp_dir, **kwargs)
+
+    def test_token_cached_in_memory(self):
+        manager = self._manager()
+        assert manager.get_token() == 'token_1'
+        assert manager.get_token() == 'token_1'
+        assert self.http_client.get.call_count == 1
+
+    def test_token_shared_through_file(self):
+        """另一个进程（实例）直接使用已保存的token"""
+        assert self._manager().get_token() == 'token_1'
+
+        other_client = Mock()
+        other = self._manager(http_client=other_client)
+        assert other.get_token() == 'token_1'
+        other_client.get.assert_not_called()
+
+    def test_expired_file_token_is_refreshed(self):
+        self.http_client.get.return_value = _token_response('short', expires_in=30)
+        assert self._manager().get_token() == 'short'
+
+        other_client = Mock()
+        other_client.get.return_value = _token_response('token_2')
+        assert self._manager(http_client=other_client).get_token() == 'token_2'
+
+    def test_concurrent_callers_share_one_refresh(self):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return _token_response('token_1')
+        self.http_client.get.side_effect = slow_get
+        manager = self._manager()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(manager.get_token())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['token_1'] * 8
+        assert manager.api_requests == 1
+
+    def test_force_refresh_replaces_stale_token(self):
+        manager = self._manager()
+        assert manager.get_token() == 'token_1'
+
+        self.http_client.get.return_value = _token_response('token_2')
+        assert manager.force_refresh('token_1') == 'token_2'
+        assert manager.get_token() == 'token_2'
+
+    def test_force_refresh_adopts_token_refreshed_elsewhere(self):
+        """其他进程已换新token时，强制刷新不再请求微信接口"""
+        manager = self._manager()
+        assert manager.get_token() == 'token_1'
+
+        other_client = Mock()
+        other_client.get.return_value = _token_response('token_2')
+        assert self._manager(http_client=other_client).force_refresh('token_1') == 'token_2'
+
+        assert manager.force_refresh('token_1') == 'token_2'
+        assert self.http_client.get.call_count == 1
+
+    def test_background_refresh_before_expiry(self):
+        self.http_client.get.side_effect = [_token_response('token_1', expires_in=7200),
+                                            _token_response('token_2')]
+        manager = self._manager(refresh_ahead_seconds=7200)
+        try:
+            assert manager.get_token() == 'token_1'
+            deadline = time.time() + 10
+            while manager.get_token() != 'token_2' and time.time() < deadline:
+                time.sleep(0.1)
+            assert manager.get_token() == 'token_2'
+        finally:
+            manager.stop()
+
+    def test_failure_returns_none(self, monkeypatch):
+        monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+        self.http_client.get.return_value = Mock(json=Mock(return_value={'errcode': 40013}))
+        assert self._manager().get_token() is None
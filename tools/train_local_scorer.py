@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+本地评分模型训练工具
+读取文章存储中已由模型评分的文章，训练本地评分模型并保存到LOCAL_SCORER_PATH
+"""
+
+import argparse
+import os
+import sys
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.core.config import Config
+from src.services.article_store import create_rss_cache
+from src.services.local_scorer import DEFAULT_FEATURES, LocalScorer
+
+
+def is_llm_label(item) -> bool:
+    """只用模型给出的评分训练（规则、降级评分、沿用的聚类评分和本地模型自己给出的评分不作为标签）"""
+    if not item.has_quality_score():
+        return False
+    if item.score_source is not None:
+        return item.score_source == "llm"
+    # 记录评分来源之前的文章：排除预过滤判定的
+    return not (item.exclusion_reason or "").startswith("预过滤")
+
+
+def train_local_scorer(cache_dir: str, output: str, n_features: int, alpha: float, min_samples: int):
+    """训练并保存本地评分模型"""
+    cache = create_rss_cache(cache_dir)
+    print(f"📂 文章存储: {Config.CACHE_BACKEND} ({cache_dir})")
+    try:
+        items = [item for item in cache.iter_items() if is_llm_label(item)]
+    finally:
+        cache.close()
+
+    print(f"📚 找到 {len(items)} 篇带模型评分的文章")
+    if len(items) < min_samples:
+        print(f"❌ 训练样本不足（至少需要 {min_samples} 篇）")
+        return None
+
+    model, metrics = LocalScorer.train(items, n_features=n_features, alpha=alpha)
+    print(f"📊 留出集 {metrics['holdout']} 篇: RMSE {metrics['rmse']:.2f}, MAE {metrics['mae']:.2f}, "
+          f"发送门槛判断一致率 {metrics['decision_agreement']:.1%}")
+
+    model.save(output)
+    print(f"✅ 模型已保存: {output} ({os.path.getsize(output) / 1024:.0f} KB)")
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用历史模型评分训练本地评分模型")
+    parser.add_argument("--cache-dir", default="cache", help="文章存储目录")
+    parser.add_argument("--output", default=Config.LOCAL_SCORER_PATH, help="模型输出路径")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES, help="哈希特征维度")
+    parser.add_argument("--alpha", type=float, default=1.0, help="L2正则系数")
+    parser.add_argument("--min-samples", type=int, default=200, help="最少训练样本数")
+    args = parser.parse_args()
+
+    if train_local_scorer(args.cache_dir, args.output, args.features, args.alpha, args.min_samples) is None:
+        sys.exit(1)